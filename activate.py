@@ -1,11 +1,16 @@
 import argparse
 import logging
-from time import sleep
+import sys
 
 from config.path_config import setup_paths
 from utils.logging_system import activate_logging_system
 
 activate_logging_system()
+from utils.import_profiler import ImportProfiler
+
+# Started before the systems are imported, so every import they make is timed
+import_profiler = ImportProfiler().start() if "--import-profile" in sys.argv else None
+
 setup_paths()
 from EventHive.event_hive_runner import EventQueue
 from components.conversation_engine import ConversationEngine
@@ -17,8 +22,10 @@ from components.stt_system import STTOperations
 from components.chatbot_system import ChatbotOperations
 from components.command_system import CommandCheckOperations
 from components.pi_operations_system import PiOperations
-
-BOOT_SPLIT_WAIT = 5
+from config.event_config import event_dispatch_mode, polling_sleep_time
+from utils.boot_orchestrator import BootOrchestrator
+from utils.model_manager import model_manager_access
+from utils.event_dispatch import BlockingEventQueue
 
 logger = logging.getLogger(__name__)
 
@@ -28,9 +35,20 @@ def parse_arguments():
     parser = argparse.ArgumentParser(description="Activate the system with optional modes.")
     parser.add_argument("--demo_mode", action="store_true", help="Run in demo mode")
     parser.add_argument("--test_mode", action="store_true", help="Run in full run test mode")
+    parser.add_argument("--import-profile", action="store_true",
+                        help="Report the time taken to import each module, once the systems have booted")
     return parser.parse_args()
 
 
+def create_event_queue():
+    if event_dispatch_mode == "blocking":
+        return BlockingEventQueue()
+    elif event_dispatch_mode == "polling":
+        return EventQueue(sleep_time=polling_sleep_time)
+    else:
+        raise ValueError(f'Invalid event_dispatch_mode: {event_dispatch_mode}')
+
+
 def main():
     args = parse_arguments()
     demo_mode = args.demo_mode
@@ -45,28 +63,33 @@ def main():
     mode_str = ', '.join(modes) if modes else 'normal'
     logger.debug(f"Setting up systems in {mode_str} mode")
 
-    event_queue = EventQueue(sleep_time=1)
-    systems = [
-        LedResourceMonitor(),
-        AudioDetector(event_queue, test_mode=test_mode),
-        TTSOperations(event_queue, test_mode=test_mode),
-        STTOperations(event_queue, test_mode=test_mode),
-        AudioJawSync(event_queue, test_mode=test_mode),
-        ChatbotOperations(event_queue, test_mode=test_mode),
-        CommandCheckOperations(event_queue, test_mode=test_mode),
-        PiOperations(event_queue, test_mode=test_mode),
-        ConversationEngine(event_queue, demo_mode=demo_mode),
-    ]
+    event_queue = create_event_queue()
+
+    # Systems with no dependencies between them are built (loading models, opening mics, homing the servo) concurrently
+    boot_orchestrator = BootOrchestrator()
+    boot_orchestrator.add("LedResourceMonitor", LedResourceMonitor)
+    boot_orchestrator.add("AudioDetector", lambda: AudioDetector(event_queue, test_mode=test_mode))
+    boot_orchestrator.add("TTSOperations", lambda: TTSOperations(event_queue, test_mode=test_mode))
+    boot_orchestrator.add("STTOperations", lambda: STTOperations(event_queue, test_mode=test_mode))
+    boot_orchestrator.add("AudioJawSync", lambda: AudioJawSync(event_queue, test_mode=test_mode))
+    boot_orchestrator.add("ChatbotOperations", lambda: ChatbotOperations(event_queue, test_mode=test_mode))
+    boot_orchestrator.add("CommandCheckOperations", lambda: CommandCheckOperations(event_queue, test_mode=test_mode))
+    boot_orchestrator.add("PiOperations", lambda: PiOperations(event_queue, test_mode=test_mode))
+    # The conversation starts as soon as the engine is up, so it waits for everything else to be ready
+    boot_orchestrator.add("ConversationEngine", lambda: ConversationEngine(event_queue, demo_mode=demo_mode),
+                          depends_on=["AudioDetector", "TTSOperations", "STTOperations", "AudioJawSync",
+                                      "ChatbotOperations", "CommandCheckOperations", "PiOperations"])
 
     logger.debug("Starting producer and consumer threads")
 
-    try:
-        for system in systems:
-            logger.debug(f"Starting {system.__class__.__name__} thread")
-            system.start()
-            sleep(BOOT_SPLIT_WAIT)
-            logger.debug(f"Started {system.__class__.__name__} thread")
+    systems = boot_orchestrator.boot()
+    model_manager_access().report()
+    if import_profiler is not None:
+        # The systems import their backends as they are built, so the profile covers boot
+        import_profiler.stop()
+        import_profiler.report()
 
+    try:
         for system in systems[1:]:  # Skip LedResourceMonitor, it doesn't join
             logger.debug(f"Joining {system.__class__.__name__} thread")
             system.join()
@@ -0,0 +1,78 @@
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+top_dir = Path(__file__).parent.parent
+
+sys.path.append(str(top_dir))
+
+from components.command_system import CommandMatcher
+from config.command_config import override_word, de_override_word, voice_commands, command_filler_words
+from utils.string_ops import clean_text
+
+conversation_words = ("what is the weather like today tell me a story about the park why do you think people like "
+                      "music can you help me with my homework where did you come from do you dream about turning "
+                      "into a real person the shutters are down and the power is out in town").split()
+
+
+def misheard(phrase, rng):
+    """
+    A command phrase as Whisper might get it wrong: a letter dropped, a plural, filler words around it.
+    :param phrase:
+    :param rng:
+    :return:
+    """
+    words = phrase.split()
+    index = rng.randrange(len(words))
+    change = rng.choice(("drop", "plural", "none"))
+    if change == "drop" and len(words[index]) > 4:
+        position = rng.randrange(1, len(words[index]) - 1)
+        words[index] = words[index][:position] + words[index][position + 1:]
+    elif change == "plural":
+        words[index] = words[index][:-1] if words[index].endswith("s") else words[index] + "s"
+
+    before = rng.sample(command_filler_words, rng.randint(0, 2))
+    after = rng.sample(command_filler_words, rng.randint(0, 1))
+    return " ".join(before + words + after).capitalize() + rng.choice((".", "!", ""))
+
+
+def conversation(rng):
+    return " ".join(rng.choices(conversation_words, k=rng.randint(3, 15))).capitalize() + "?"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time command matching over synthetic transcripts, comparing the "
+                                                 "exact lookup with the fuzzy command index.")
+    parser.add_argument("--transcripts", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    phrases = [override_word, de_override_word] + [phrase for command in voice_commands.values()
+                                                   for phrase in command["phrases"]]
+    commands = [misheard(rng.choice(phrases), rng) for _ in range(args.transcripts // 2)]
+    conversations = [conversation(rng) for _ in range(args.transcripts - len(commands))]
+
+    matcher = CommandMatcher()
+    exact = matcher.index.exact
+    for name, match in (("exact lookup", lambda text: exact.get(clean_text(text))),
+                        ("fuzzy index", matcher.match)):
+        timings = []
+        found = []
+        for text in commands + conversations:
+            start_time = time.perf_counter()
+            found.append(match(text) is not None)
+            timings.append(time.perf_counter() - start_time)
+
+        timings = np.array(timings) * 1e6
+        print(f"{name}: {np.mean(timings):.1f} us mean, {np.percentile(timings, 99):.1f} us p99, "
+              f"{np.max(timings):.1f} us max | commands recognised {np.mean(found[:len(commands)]) * 100:.1f}%, "
+              f"conversation taken as a command {np.mean(found[len(commands):]) * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import argparse
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+top_dir = Path(__file__).parent.parent
+
+sys.path.append(str(top_dir))
+
+from config.path_config import setup_paths
+
+setup_paths()
+from EventHive.event_hive_runner import EventQueue
+from components.audio_detector_runner import AudioDetector
+from components.chatbot_system import ChatbotOperations
+from components.command_system import CommandCheckOperations
+from components.conversation_engine import ConversationEngine
+from components.jaw_system import AudioJawSync
+from components.pi_operations_system import PiOperations
+from components.stt_system import STTOperations
+from components.tts_system import TTSOperations
+from utils.event_dispatch import BlockingEventQueue
+
+
+class TimedConversationEngine(ConversationEngine):
+    """
+    ConversationEngine that records how long each conversation turn takes, from HUMAN_DETECTED to the action
+    graph being reset at the end of the turn.
+    """
+
+    def __init__(self, event_queue, turns):
+        super().__init__(event_queue, demo_mode=False)
+        self.turns = turns
+        self.turn_start_time = None
+        self.turn_durations = []
+        self.all_turns_done = threading.Event()
+
+    def conversation_cycle(self, event_type=None, event_data=None):
+        self.turn_start_time = time.perf_counter()
+        return super().conversation_cycle(event_type, event_data)
+
+    def reset_action_list(self, event_type=None, event_data=None):
+        # Command system activation also resets the graph mid turn, so only count the graph finishing
+        if (self.turn_start_time is not None and self.action_graph is not None
+                and len(self.completed_actions) == len(self.action_graph)):
+            self.turn_durations.append(time.perf_counter() - self.turn_start_time)
+            self.turn_start_time = None
+            if len(self.turn_durations) >= self.turns:
+                self.all_turns_done.set()
+        return super().reset_action_list(event_type, event_data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time full conversation turns with every system in test mode.")
+    parser.add_argument("--turns", type=int, default=8, help="Number of turns, 8 covers every test STT response.")
+    parser.add_argument("--dispatch_mode", choices=["blocking", "polling"], default="blocking")
+    parser.add_argument("--polling_sleep_time", type=float, default=1)
+    args = parser.parse_args()
+
+    event_queue = BlockingEventQueue() if args.dispatch_mode == "blocking" else EventQueue(
+        sleep_time=args.polling_sleep_time)
+
+    engine = TimedConversationEngine(event_queue, args.turns)
+    systems = [
+        AudioDetector(event_queue, test_mode=True),
+        TTSOperations(event_queue, test_mode=True),
+        STTOperations(event_queue, test_mode=True),
+        AudioJawSync(event_queue, test_mode=True),
+        ChatbotOperations(event_queue, test_mode=True),
+        CommandCheckOperations(event_queue, test_mode=True),
+        PiOperations(event_queue, test_mode=True),
+        engine,
+    ]
+
+    for system in systems:
+        system.daemon = True
+        system.start()
+
+    engine.all_turns_done.wait()
+
+    for system in systems:
+        system.shutdown()
+
+    durations = engine.turn_durations
+    print(f"{args.dispatch_mode} dispatch, {len(durations)} turns: mean {statistics.mean(durations):.3f} s | "
+          f"min {min(durations):.3f} s | max {max(durations):.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+import numpy as np
+
+top_dir = Path(__file__).parent.parent
+
+sys.path.append(str(top_dir))
+
+from utils.audio_features import EnvelopeFeatures
+
+
+def main():
+    """
+    Time the RMS of one audio chunk, as computed for every chunk by the jaw and the detector, comparing the original
+    int16 calculation (which overflows on loud audio), a float64 copy per chunk and the preallocated float32 buffer.
+    :return:
+    """
+    parser = argparse.ArgumentParser(description="Measure the per chunk cost of the RMS envelope features.")
+    parser.add_argument("--chunk", type=int, default=1024, help="Samples per chunk.")
+    parser.add_argument("--batch", type=int, default=8, help="Chunks per call when batching.")
+    parser.add_argument("--repeat", type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    chunk = rng.normal(0, 8000, args.chunk).astype(np.int16)
+    batch = rng.normal(0, 8000, args.chunk * args.batch).astype(np.int16)
+    features = EnvelopeFeatures(args.chunk, batch_frames=args.batch)
+
+    timings = {
+        "int16 square (overflows)": lambda: np.sqrt(np.mean(chunk ** 2)),
+        "float64 copy": lambda: np.sqrt(np.mean(chunk.astype(np.float64) ** 2)),
+        "preallocated float32": lambda: features.rms(chunk),
+    }
+    for name, function in timings.items():
+        seconds = timeit.timeit(function, number=args.repeat) / args.repeat
+        print(f"{name}: {seconds * 1e6:.2f} us per chunk")
+
+    seconds = timeit.timeit(lambda: features.frame_rms(batch), number=args.repeat) / args.repeat
+    print(f"preallocated float32, {args.batch} chunks per call: {seconds / args.batch * 1e6:.2f} us per chunk")
+
+    loud = (30000 * np.sin(np.linspace(0, 200 * np.pi, args.chunk))).astype(np.int16)
+    with np.errstate(invalid="ignore"):
+        overflowed_rms = np.sqrt(np.mean(loud ** 2))
+    print(f"RMS of a loud sine (expected {30000 / np.sqrt(2):.0f}): int16 square {overflowed_rms:.0f}, "
+          f"preallocated float32 {features.rms(loud):.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import argparse
+import statistics
+import sys
+import threading
+import time
+from itertools import cycle
+from pathlib import Path
+
+top_dir = Path(__file__).parent.parent
+
+sys.path.append(str(top_dir))
+
+from EventHive.event_hive_runner import EventQueue
+from config.custom_events import (AudioDetectControllerEvent, TTSEvent, STTEvent, MovementEvent, BotEvent,
+                                  CommandCheckEvent, HardwareEvent, ConversationDoneEvent)
+from utils.event_dispatch import BlockingEventQueue, EventActor
+
+# The event types consumed by the actors started in activate.main(), LedResourceMonitor has no queue so is left out
+# and ConversationEngine is played by the BenchmarkEngine below
+ACTOR_EVENTS = {
+    "AudioDetector": AudioDetectControllerEvent,
+    "TTSOperations": TTSEvent,
+    "STTOperations": STTEvent,
+    "AudioJawSync": MovementEvent,
+    "ChatbotOperations": BotEvent,
+    "CommandCheckOperations": CommandCheckEvent,
+    "PiOperations": HardwareEvent,
+}
+
+
+class EchoActor(EventActor):
+    """
+    Stand-in for a system actor, answers every event with CONVERSATION_ACTION_FINISHED like the real actors do.
+    """
+
+    def __init__(self, event_queue, event_class):
+        self.event_class = event_class
+        super().__init__(event_queue)
+
+    def echo(self, event_type=None, event_data=None):
+        self.produce_event(ConversationDoneEvent(["CONVERSATION_ACTION_FINISHED", event_data], 1))
+        return True
+
+    def get_event_handlers(self):
+        return {"PING": self.echo}
+
+    def get_consumable_events(self):
+        return [self.event_class]
+
+
+class BenchmarkEngine(EventActor):
+    """
+    Stand-in for the ConversationEngine, records the round trip time of every event that comes back.
+    """
+
+    def __init__(self, event_queue):
+        super().__init__(event_queue)
+        self.latencies = []
+        self.expected = 0
+        self.all_received = threading.Event()
+
+    def expect(self, count):
+        self.latencies = []
+        self.expected = count
+        self.all_received.clear()
+
+    def record(self, event_type=None, event_data=None):
+        self.latencies.append(time.perf_counter() - event_data)
+        if len(self.latencies) >= self.expected:
+            self.all_received.set()
+        return True
+
+    def get_event_handlers(self):
+        return {"CONVERSATION_ACTION_FINISHED": self.record}
+
+    def get_consumable_events(self):
+        return [ConversationDoneEvent]
+
+
+def run_benchmark(event_queue, round_trips, burst):
+    engine = BenchmarkEngine(event_queue)
+    actors = [engine] + [EchoActor(event_queue, event_class) for event_class in ACTOR_EVENTS.values()]
+    for actor in actors:
+        actor.daemon = True
+        actor.start()
+
+    # Sequential round trips, the same hand-off pattern as a conversation turn
+    round_trip_latencies = []
+    targets = cycle(ACTOR_EVENTS.values())
+    for _ in range(round_trips):
+        engine.expect(1)
+        event_queue.queue_addition(next(targets)(["PING", time.perf_counter()], 1))
+        engine.all_received.wait()
+        round_trip_latencies.extend(engine.latencies)
+
+    # Burst of events spread across all actors at once
+    engine.expect(burst)
+    start_time = time.perf_counter()
+    for _ in range(burst):
+        event_queue.queue_addition(next(targets)(["PING", time.perf_counter()], 1))
+    engine.all_received.wait()
+    throughput = burst / (time.perf_counter() - start_time)
+
+    for actor in actors:
+        actor.shutdown()
+
+    return round_trip_latencies, throughput
+
+
+def report(mode, latencies, throughput):
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    p95 = latencies_ms[int(len(latencies_ms) * 0.95) - 1]
+    print(f"{mode}: round trip mean {statistics.mean(latencies_ms):.3f} ms | median "
+          f"{statistics.median(latencies_ms):.3f} ms | p95 {p95:.3f} ms | max {latencies_ms[-1]:.3f} ms | "
+          f"throughput {throughput:.0f} events/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark event round trip latency and throughput across actors.")
+    parser.add_argument("--mode", choices=["blocking", "polling", "both"], default="both")
+    parser.add_argument("--round_trips", type=int, default=200)
+    parser.add_argument("--burst", type=int, default=5000)
+    parser.add_argument("--polling_sleep_time", type=float, default=0.01,
+                        help="Sleep time for the polling queue, activate.py has historically used 1 second.")
+    args = parser.parse_args()
+
+    if args.mode in ("blocking", "both"):
+        report("blocking", *run_benchmark(BlockingEventQueue(), args.round_trips, args.burst))
+
+    if args.mode in ("polling", "both"):
+        # Polling is orders of magnitude slower, so keep the run short
+        report(f"polling ({args.polling_sleep_time}s)",
+               *run_benchmark(EventQueue(sleep_time=args.polling_sleep_time), min(args.round_trips, 50),
+                              min(args.burst, 500)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import psutil
+
+top_dir = Path(__file__).parent.parent
+
+
+def main():
+    """
+    Run the skull in test mode and measure the CPU it uses, in test mode nothing is generated or inferred so almost all
+    of the CPU used is overhead of the systems themselves (event handling, detector loop, LED monitor).
+    :return:
+    """
+    parser = argparse.ArgumentParser(description="Measure CPU usage of the skull running in test mode.")
+    parser.add_argument("--seconds", type=float, default=30, help="How long to measure for, after boot.")
+    parser.add_argument("--boot_seconds", type=float, default=10, help="Time to let the systems boot first.")
+    args = parser.parse_args()
+
+    skull = subprocess.Popen([sys.executable, str(top_dir / "activate.py"), "--test_mode"], cwd=top_dir,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        process = psutil.Process(skull.pid)
+        time.sleep(args.boot_seconds)
+
+        start_cpu = process.cpu_times()
+        start_time = time.monotonic()
+        time.sleep(args.seconds)
+        end_cpu = process.cpu_times()
+        elapsed = time.monotonic() - start_time
+
+        cpu_seconds = (end_cpu.user - start_cpu.user) + (end_cpu.system - start_cpu.system)
+        print(f"Test mode skull used {cpu_seconds:.2f} CPU seconds in {elapsed:.1f} seconds: "
+              f"{cpu_seconds / elapsed * 100:.1f}% of one core ({psutil.cpu_count()} cores available)")
+    finally:
+        skull.terminate()
+        skull.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import argparse
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+import psutil
+
+top_dir = Path(__file__).parent.parent
+
+sys.path.append(str(top_dir))
+
+from components.resource_monitor_leds import LedResourceMonitor
+from hardware.inventor_hat_controller import InventorHATCoreInit
+
+
+class CountingLeds:
+    """
+    Passes calls through to the LEDs, counting them; every set with show=True and every show() writes to the board.
+    """
+
+    def __init__(self, leds):
+        self.leds = leds
+        self.calls = Counter()
+        self.bus_writes = 0
+
+    def set_hsv(self, index, h, s=1.0, v=1.0, show=True):
+        self.calls["set_hsv"] += 1
+        self.bus_writes += 1 + bool(show)
+        self.leds.set_hsv(index, h, s, v, show=show)
+
+    def set_rgb(self, index, r, g, b, show=True):
+        self.calls["set_rgb"] += 1
+        self.bus_writes += 1 + bool(show)
+        self.leds.set_rgb(index, r, g, b, show=show)
+
+    def show(self):
+        self.calls["show"] += 1
+        self.bus_writes += 1
+        self.leds.show()
+
+    def clear(self):
+        self.leds.clear()
+
+
+def original_update_leds(monitor, stop_event):
+    """
+    The LED update loop as it was, blocking on cpu_percent(interval=0.1) and setting every LED every frame.
+    """
+    updates = 50
+    while not stop_event.is_set():
+        start_time = time.monotonic()
+        monitor.current_mem_percentage += (psutil.virtual_memory().percent / 100.0 -
+                                           monitor.current_mem_percentage) * monitor.INTERPOLATION_SPEED
+        monitor.current_cpu_percentage += (psutil.cpu_percent(interval=0.1) / 100.0 -
+                                           monitor.current_cpu_percentage) * monitor.INTERPOLATION_SPEED
+        hue = 0.33 * (1.0 - monitor.current_cpu_percentage)
+        for i in range(InventorHATCoreInit.num_leds):
+            if float(i) / InventorHATCoreInit.num_leds <= monitor.current_mem_percentage:
+                InventorHATCoreInit.leds.set_hsv(i, hue, 1.0, monitor.LED_BRIGHTNESS * monitor.current_mem_percentage,
+                                                 show=False)
+            else:
+                InventorHATCoreInit.leds.set_hsv(i, 0, 0, 0, monitor.LED_BRIGHTNESS)
+        InventorHATCoreInit.leds.show()
+        time.sleep(max(0.0, start_time + 1 / updates - time.monotonic()))
+
+
+def run(name, seconds, target):
+    leds = CountingLeds(InventorHATCoreInit.leds)
+    InventorHATCoreInit.leds = leds
+    process = psutil.Process()
+    cpu_start = sum(process.cpu_times()[:2])
+    try:
+        frames = target(seconds)
+    finally:
+        InventorHATCoreInit.leds = leds.leds
+    cpu_seconds = sum(process.cpu_times()[:2]) - cpu_start
+    print(f"{name}: {frames / seconds:.1f} frames/s | {leds.bus_writes / seconds:.1f} bus writes/s "
+          f"({', '.join(f'{call} {count / seconds:.1f}/s' for call, count in sorted(leds.calls.items()))}) | "
+          f"{cpu_seconds / seconds * 100:.1f}% CPU")
+
+
+def run_original(seconds):
+    monitor = LedResourceMonitor(brightness=LedResourceMonitor.LED_BRIGHTNESS)
+    stop_event = threading.Event()
+    thread = threading.Thread(target=original_update_leds, args=(monitor, stop_event))
+    thread.start()
+    time.sleep(seconds)
+    stop_event.set()
+    thread.join()
+    return InventorHATCoreInit.leds.calls["show"]
+
+
+def run_framebuffer(seconds):
+    monitor = LedResourceMonitor(brightness=LedResourceMonitor.LED_BRIGHTNESS)
+    monitor.start()
+    time.sleep(seconds)
+    monitor.stop()
+    return monitor.frames
+
+
+def main():
+    """
+    Count the writes the LED resource monitor makes to the board a second, and the CPU it uses, for the original update
+    loop and the framebuffer renderer. Needs the Inventor HAT Mini.
+    :return:
+    """
+    parser = argparse.ArgumentParser(description="Measure LED resource monitor bus writes and CPU use.")
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    run("original", args.seconds, run_original)
+    run("framebuffer", args.seconds, run_framebuffer)
+
+
+if __name__ == "__main__":
+    main()
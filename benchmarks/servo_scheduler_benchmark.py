@@ -0,0 +1,63 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+top_dir = Path(__file__).parent.parent
+
+sys.path.append(str(top_dir))
+
+from config.head_config import jaw_servo_update_rate
+from hardware.jaw_controller import JawController
+
+
+def main():
+    """
+    Feed the jaw servo scheduler a synthetic speech envelope at audio chunk rate and report how often the servo was
+    actually written and how far behind the newest target the writes were. Needs the Inventor HAT Mini.
+    :return:
+    """
+    parser = argparse.ArgumentParser(description="Measure the update rate and lag of the jaw servo scheduler.")
+    parser.add_argument("--seconds", type=float, default=10, help="How long to feed the envelope for.")
+    parser.add_argument("--feed_rate", type=float, default=100, help="Targets per second, i.e. audio chunks a second.")
+    parser.add_argument("--update_rate", type=float, default=jaw_servo_update_rate, help="Servo writes per second.")
+    args = parser.parse_args()
+
+    jaw_controller = JawController(update_rate=args.update_rate)
+    jaw_controller.start()
+
+    # Syllable rate open/close envelope between the closed and open pulse widths
+    t = np.arange(0, args.seconds, 1 / args.feed_rate)
+    envelope = np.abs(np.sin(2 * np.pi * 2 * t))
+    pulse_widths = jaw_controller.close_pulse_width + envelope * (
+            jaw_controller.open_pulse_width - jaw_controller.close_pulse_width)
+
+    call_times = []
+    start_time = time.monotonic()
+    for index, pulse_width in enumerate(pulse_widths):
+        call_start = time.perf_counter()
+        jaw_controller.set_pulse_width(pulse_width)
+        call_times.append(time.perf_counter() - call_start)
+        time.sleep(max(0.0, start_time + (index + 1) / args.feed_rate - time.monotonic()))
+    elapsed = time.monotonic() - start_time
+
+    jaw_controller.close_jaw()
+    jaw_controller.stop()
+    jaw_controller.join()
+
+    write_rate = jaw_controller.writes / elapsed
+    mean_lag = jaw_controller.total_lag / max(jaw_controller.lagged_writes, 1)
+    print(f"Fed {jaw_controller.targets_set} targets in {elapsed:.1f} s "
+          f"({jaw_controller.targets_set / elapsed:.0f}/s), set_pulse_width took {np.mean(call_times) * 1e6:.0f} us "
+          f"mean, {np.max(call_times) * 1e6:.0f} us max")
+    print(f"Servo writes: {jaw_controller.writes} ({write_rate:.1f}/s, limit {args.update_rate}/s), "
+          f"suppressed writes: {jaw_controller.writes_suppressed}, "
+          f"coalesced targets: {jaw_controller.targets_coalesced}")
+    print(f"Lag from newest target to servo write: {mean_lag * 1000:.1f} ms mean, "
+          f"{jaw_controller.max_lag * 1000:.1f} ms max")
+
+
+if __name__ == "__main__":
+    main()
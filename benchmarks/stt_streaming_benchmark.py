@@ -0,0 +1,107 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import whisper
+
+top_dir = Path(__file__).parent.parent
+
+sys.path.append(str(top_dir))
+
+from components.stt_streaming import StreamingTranscriber, whisper_input
+from config.stt_config import (model_size, stt_stream_step_seconds, stt_stream_max_window_seconds,
+                               stt_stream_silence_duration)
+from config.tts_config import whisper_test_audio_path
+from utils.audio_buffer import AudioBuffer
+
+
+def report(mode, transcript, word_latencies, final_latency):
+    print(f"{mode}: word latency mean {np.mean(word_latencies):.2f} s, max {np.max(word_latencies):.2f} s | "
+          f"final transcript {final_latency:.2f} s after the speech ends")
+    print(f"    {transcript}")
+
+
+def batch(model, audio, silence_duration):
+    """
+    Record until silence then transcribe the whole recording, as RealSTTHandler does without streaming.
+    :return:
+    """
+    samples = whisper_input(audio)
+    start_time = time.perf_counter()
+    transcript = model.transcribe(samples, fp16=False)["text"].strip()
+    final_latency = silence_duration + time.perf_counter() - start_time
+
+    # Every word arrives with the final transcript
+    result = model.transcribe(samples, fp16=False, word_timestamps=True)
+    word_ends = [word["end"] for segment in result["segments"] for word in segment["words"]]
+    word_latencies = [audio.duration + final_latency - end for end in word_ends]
+    report(f"batch (silence {silence_duration} s)", transcript, word_latencies, final_latency)
+
+
+class TimedTranscriber(StreamingTranscriber):
+    """
+    Streaming transcriber noting the time each word was committed, in seconds from the start of the recording.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.start_time = time.perf_counter()
+        self.commit_times = []
+
+    def commit(self, words, transcribed_frames):
+        committed = super().commit(words, transcribed_frames)
+        self.commit_times.extend([time.perf_counter() - self.start_time] * len(committed))
+        return committed
+
+
+def stream(model, audio, silence_duration, step_seconds, chunk):
+    """
+    Play the audio into a StreamingTranscriber in real time, one chunk at a time as the capture buffer would, with the
+    transcriptions running on its worker thread as they do while recording.
+    :return:
+    """
+    transcriber = TimedTranscriber(model, audio.rate, step_seconds=step_seconds,
+                                   max_window_seconds=stt_stream_max_window_seconds)
+    samples = np.concatenate((audio.mono(), np.zeros(int(silence_duration * audio.rate), dtype=np.int16)))
+
+    transcriber.start()
+    for start in range(0, len(samples), chunk):
+        data = samples[start:start + chunk]
+        # Each chunk is read once it has been recorded
+        time.sleep(max(0.0, transcriber.start_time + (start + len(data)) / audio.rate - time.perf_counter()))
+        transcriber.add_audio(data)
+
+    transcript = transcriber.finish()
+    final_latency = time.perf_counter() - transcriber.start_time - audio.duration
+
+    word_latencies = [commit_time - end for commit_time, (_, end) in zip(transcriber.commit_times,
+                                                                          transcriber.committed)]
+    report(f"stream (silence {silence_duration} s, step {step_seconds} s)", transcript, word_latencies,
+           final_latency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare word and final transcript latency of batch and streaming "
+                                                 "Whisper transcription, replaying a recording in real time.")
+    parser.add_argument("--audio_file", default=str(whisper_test_audio_path))
+    parser.add_argument("--model_size", default=model_size)
+    parser.add_argument("--step", type=float, default=stt_stream_step_seconds)
+    parser.add_argument("--chunk", type=int, default=1024, help="Samples per chunk read from the capture buffer.")
+    parser.add_argument("--silence_duration", type=float, default=stt_stream_silence_duration,
+                        help="Silence that ends the recording, the same for both modes so only transcription differs.")
+    args = parser.parse_args()
+
+    audio = AudioBuffer.from_file(args.audio_file)
+    model = whisper.load_model(args.model_size)
+    # Warm up so model loading is not counted against the first mode run
+    model.transcribe(whisper_input(audio), fp16=False)
+    print(f"{args.audio_file}: {audio.duration:.2f} s, model {args.model_size}")
+
+    batch(model, audio, args.silence_duration)
+    stream(model, audio, args.silence_duration, args.step, args.chunk)
+
+
+if __name__ == "__main__":
+    main()
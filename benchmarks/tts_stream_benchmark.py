@@ -0,0 +1,56 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+top_dir = Path(__file__).parent.parent
+
+sys.path.append(str(top_dir))
+
+from components.tts_system import tts_class_map
+from config.tts_config import tts_mode, demo_text, tts_stream_min_chunk_length
+from utils.string_ops import split_sentences
+
+
+def timed_generate(tts, text):
+    start_time = time.perf_counter()
+    audio = tts.generate_buffer(text)
+    return time.perf_counter() - start_time, audio.duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare time to first audio for file and streamed TTS.")
+    parser.add_argument("--tts_mode", default=tts_mode, choices=[mode for mode in tts_class_map if mode != "test"])
+    parser.add_argument("--text", default=demo_text)
+    args = parser.parse_args()
+
+    tts = tts_class_map[args.tts_mode]()
+    # Warm up so model loading is not counted against the first mode run
+    tts.generate_buffer("Warm up.")
+
+    synthesis_time, audio_duration = timed_generate(tts, args.text)
+    print(f"file: time to first audio {synthesis_time:.2f} s | total synthesis {synthesis_time:.2f} s | "
+          f"audio {audio_duration:.2f} s")
+
+    chunks = split_sentences(args.text, min_length=tts_stream_min_chunk_length)
+    elapsed = 0.0
+    playback_end = None
+    underruns = 0
+    for chunk in chunks:
+        synthesis_time, audio_duration = timed_generate(tts, chunk)
+        elapsed += synthesis_time
+        if playback_end is None:
+            time_to_first_audio = elapsed
+            playback_end = elapsed
+        elif elapsed > playback_end:
+            # The next chunk was not ready when the previous one finished playing
+            underruns += 1
+            playback_end = elapsed
+        playback_end += audio_duration
+
+    print(f"stream ({len(chunks)} chunks): time to first audio {time_to_first_audio:.2f} s | total synthesis "
+          f"{elapsed:.2f} s | playback gaps {underruns} | finished speaking at {playback_end:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
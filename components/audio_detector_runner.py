@@ -1,13 +1,17 @@
 import logging
 import threading
-from time import sleep
+import time
 
 import numpy as np
 
-from EventHive.event_hive_runner import EventActor
 from components.audio_system import audio_engine_access
-from config.audio_config import audio_input_detection_threshold
-from config.custom_events import DetectEvent, AudioDetectControllerEvent, ConversationDoneEvent
+from config.audio_config import (audio_input_detection_threshold, voice_activity_detection, vad_frame_ms,
+                                 vad_window_ms, vad_speech_ratio, vad_energy_ratio, vad_noise_floor_alpha,
+                                 vad_zcr_range, vad_max_spectral_flatness)
+from config.chattinggpt_config import chat_history_reset_seconds
+from config.custom_events import DetectEvent, AudioDetectControllerEvent, BotEvent
+from utils.event_dispatch import EventActor
+from utils.voice_activity import VoiceActivityDetector
 
 logger = logging.getLogger(__name__)
 
@@ -25,26 +29,52 @@ class AudioDetectionHandler:
 class RealAudioDetectionHandler(AudioDetectionHandler):
     def __init__(self, audio_detector):
         self.audio_detector = audio_detector
+        self.voice_activity_detector = None
+        if voice_activity_detection:
+            rate = audio_engine_access().microphones[audio_detector.mic_key]["RATE"]
+            self.voice_activity_detector = VoiceActivityDetector(
+                rate, frame_ms=vad_frame_ms, window_ms=vad_window_ms, speech_ratio=vad_speech_ratio,
+                energy_ratio=vad_energy_ratio, min_peak=audio_input_detection_threshold,
+                noise_floor_alpha=vad_noise_floor_alpha, zcr_range=vad_zcr_range,
+                max_spectral_flatness=vad_max_spectral_flatness)
 
     def start_scan(self):
+        if self.voice_activity_detector:
+            # Sound from before this scan (e.g. the skull's own voice) must not count towards detection
+            self.voice_activity_detector.reset()
         audio_engine_access().init_recording_stream(mic_key=self.audio_detector.mic_key)
 
+    def detect_human(self, audio_amplitude):
+        if self.voice_activity_detector:
+            return self.voice_activity_detector.process(audio_amplitude)
+        return np.max(audio_amplitude) > audio_input_detection_threshold
+
     def stop_scan(self):
         audio_engine_access().close_recording_stream(mic_key=self.audio_detector.mic_key)
 
     def audio_scan(self):
         logger.info(f"Audio scan enabled with detection threshold: {audio_input_detection_threshold}")
 
-        while True:
-            if self.audio_detector.scan_mode_enabled:
-                audio_data = audio_engine_access().read_recording_stream(self.audio_detector.mic_key)
-                audio_amplitude = np.frombuffer(audio_data, dtype=np.int16)
-                if np.max(audio_amplitude) > audio_input_detection_threshold:
-                    self.audio_detector.produce_event(DetectEvent(["HUMAN_DETECTED"], 1))
-                    logger.info(
-                        f"Sound detected with amplitude {np.max(audio_amplitude)} exceeding threshold "
-                        f"{audio_input_detection_threshold}")
-                    self.audio_detector.scan_mode_off()
+        while self.audio_detector.wait_for_scan_mode():
+            audio_amplitude = audio_engine_access().read_recording_frames(self.audio_detector.mic_key)
+            if audio_amplitude is None:
+                if audio_engine_access().capture_failed(self.audio_detector.mic_key):
+                    # The mic stopped delivering audio, retry every second rather than spinning on the closed stream
+                    if self.audio_detector.stop_event.wait(1):
+                        break
+                    try:
+                        self.start_scan()
+                    except Exception as e:
+                        logger.warning(f"Reopening the detection mic failed: {e}")
+                # Otherwise the recording stream was closed as scan mode was turned off while waiting for audio
+                continue
+
+            if self.detect_human(audio_amplitude):
+                self.audio_detector.produce_event(DetectEvent(["HUMAN_DETECTED"], 1))
+                logger.info(f"Sound detected with amplitude {np.max(audio_amplitude)}")
+                self.audio_detector.scan_mode_off()
+
+        logger.debug("Audio scan thread stopped")
 
 
 # Implement the test audio detection handler
@@ -61,20 +91,27 @@ class TestAudioDetectionHandler(AudioDetectionHandler):
     def audio_scan(self):
         logger.debug("Audio scan test thread enabled")
 
-        while True:
-            if self.audio_detector.scan_mode_enabled:
-                # todo: figure out why sleep is required here, without it conversation engine stalls
-                sleep(1)
-                self.audio_detector.produce_event(DetectEvent(["HUMAN_DETECTED"], 1))
-                logger.debug(f"Simulation of sound detected for test mode.")
-                self.audio_detector.scan_mode_off()
+        while self.audio_detector.wait_for_scan_mode():
+            # Simulates a pause before someone arrives; it also lets the CONVERSATION_ACTION_FINISHED from turning
+            # scan mode on reach the conversation engine first, otherwise HUMAN_DETECTED can overtake it on a queue
+            # that does not keep the order of events with the same priority and the conversation engine stalls
+            if self.audio_detector.stop_event.wait(1):
+                break
+            self.audio_detector.produce_event(DetectEvent(["HUMAN_DETECTED"], 1))
+            logger.debug(f"Simulation of sound detected for test mode.")
+            self.audio_detector.scan_mode_off()
+
+        logger.debug("Audio scan test thread stopped")
 
 
 class AudioDetector(EventActor):
     def __init__(self, event_queue, test_mode=True):
         super().__init__(event_queue)
-        self.scan_mode_enabled = False
+        # The scan thread waits on this event while scan mode is off, rather than spinning
+        self.scan_mode_event = threading.Event()
+        self.stop_event = threading.Event()
         self.scan_thread = None
+        self.scan_started = None
         self.path = audio_engine_access().path
         self.mic_key = "DETECTION_MIC"
         audio_engine_access().set_microphone_name(self.mic_key, "USB PnP Sound Device")
@@ -84,7 +121,20 @@ class AudioDetector(EventActor):
 
         logger.debug("Initialized")
 
+    @property
+    def scan_mode_enabled(self):
+        return self.scan_mode_event.is_set()
+
+    def wait_for_scan_mode(self):
+        """
+        Block until scan mode is on, returns False if the detector is shutting down instead.
+        :return:
+        """
+        self.scan_mode_event.wait()
+        return not self.stop_event.is_set()
+
     def scan_mode_on(self, event_type=None, event_data=None):
+        self.scan_started = time.monotonic()
         self.audio_detection_handler.start_scan()
 
         if not self.scan_thread:
@@ -92,22 +142,40 @@ class AudioDetector(EventActor):
             self.scan_thread.start()
             logger.debug(f"Scan mode on, mic opened, thread started: {self.scan_thread}")
         else:
-            self.produce_event(ConversationDoneEvent(["CONVERSATION_ACTION_FINISHED"], 1))
+            self.finish_action(1)
             logger.debug(f"Audio already setup, thread already started: {self.scan_thread}, so just producing event "
                          f"to move to next conversation action")
 
-        self.scan_mode_enabled = True
+        self.scan_mode_event.set()
 
         return True
 
     def scan_mode_off(self, event_type=None, event_data=None):
-        self.scan_mode_enabled = False
+        self.scan_mode_event.clear()
         if self.scan_thread:
             self.audio_detection_handler.stop_scan()
             logger.debug("Scan mode off, mic closed")
 
+        if self.scan_started is not None and time.monotonic() - self.scan_started >= chat_history_reset_seconds:
+            # Nobody was heard for long enough that the conversation has ended, whoever was detected is someone new
+            logger.info(f"Nobody detected for {time.monotonic() - self.scan_started:.0f} seconds, resetting chat "
+                        f"history")
+            self.produce_event(BotEvent(["RESET_CHAT_HISTORY"], 1))
+        self.scan_started = None
+
         return True
 
+    def shutdown(self):
+        scanning = self.scan_mode_enabled
+        self.stop_event.set()
+        # Wake the scan thread so it sees the stop event
+        self.scan_mode_event.set()
+        if self.scan_thread:
+            self.scan_thread.join()
+            if scanning:
+                self.audio_detection_handler.stop_scan()
+        super().shutdown()
+
     def get_event_handlers(self):
         return {
             "SCAN_MODE_ON": self.scan_mode_on,
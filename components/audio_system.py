@@ -1,16 +1,24 @@
 import logging
+import time
 from pathlib import Path
-from threading import Condition
+from threading import Condition, RLock, Thread
 
+import numpy as np
 import pyaudio
-from playsound import playsound
 
+from config.audio_config import (capture_buffer_seconds, playback_chunk, playback_timeout_margin,
+                                 playback_idle_seconds)
 from config.tts_config import audio_on, file_name
+from utils.audio_buffer import AudioBuffer
+from utils.audio_features import EnvelopeFeatures
 
 logger = logging.getLogger(__name__)
 
 condition = Condition()
 
+# PortAudio device setup is not thread safe, so any access that opens devices goes through this lock
+engine_lock = RLock()
+
 
 def ensure_not_talking(func):
     """
@@ -26,16 +34,239 @@ def ensure_not_talking(func):
             audio_engine_access().talking = True
             logger.debug(f'Set talking state to: {audio_engine_access().talking}')
 
-        result = func(*args, **kwargs)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with condition:
+                audio_engine_access().talking = False
+                condition.notify_all()
+                logger.debug(f'Set talking state to: {audio_engine_access().talking}')
 
-        with condition:
-            audio_engine_access().talking = False
-            condition.notify_all()
-            logger.debug(f'Set talking state to: {audio_engine_access().talking}')
+    return wrapper
 
-        return result
 
-    return wrapper
+class CaptureBuffer:
+    """
+    Ring buffer of int16 frames filled by a single persistent capture thread per physical input device, with any
+    number of named readers each reading from its own position. If capture fails (e.g. the mic is unplugged) the buffer
+    is closed, waking every reader, and reads return None from then on.
+    """
+
+    def __init__(self, p, device, rate, chunk, seconds=capture_buffer_seconds):
+        self.device = device
+        self.rate = rate
+        self.chunk = chunk
+        self.capacity = int(rate * seconds)
+        self.buffer = np.zeros(self.capacity, dtype=np.int16)
+        # Total frames written since capture started, reader positions are in the same units
+        self.write_position = 0
+        self.readers = {}
+        self.condition = Condition()
+        self.closed = False
+        self.error = None
+
+        self.stream = p.open(
+            format=pyaudio.paInt16,
+            channels=1,
+            rate=rate,
+            input=True,
+            frames_per_buffer=chunk,
+            input_device_index=device
+        )
+        self.thread = Thread(target=self.capture, daemon=True)
+        self.thread.start()
+
+        logger.debug(f"Capture started for device: {device}, RATE: {rate}, CHUNK: {chunk}, "
+                     f"buffer: {self.capacity} frames")
+
+    def capture(self):
+        try:
+            while not self.closed:
+                data = np.frombuffer(self.stream.read(self.chunk, exception_on_overflow=False), dtype=np.int16)
+                if len(data):
+                    self.write(data)
+        except Exception as e:
+            self.error = e
+            logger.exception(f"Capture failed on device {self.device}: {e}")
+        finally:
+            self.close()
+
+    def write(self, data):
+        with self.condition:
+            start = self.write_position % self.capacity
+            end = start + len(data)
+            if end <= self.capacity:
+                self.buffer[start:end] = data
+            else:
+                split = self.capacity - start
+                self.buffer[start:] = data[:split]
+                self.buffer[:end - self.capacity] = data[split:]
+            self.write_position += len(data)
+            self.condition.notify_all()
+
+    def close(self):
+        """
+        Stop accepting audio and wake every reader, their reads return None from now on.
+        :return:
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def stop(self):
+        """
+        Stop capturing and close the stream.
+        :return:
+        """
+        self.close()
+        # The capture thread finishes the read it is in, at most a chunk, before it sees the buffer is closed
+        self.thread.join(self.chunk / self.rate + 1)
+        try:
+            self.stream.stop_stream()
+            self.stream.close()
+        except Exception as e:
+            logger.debug(f"Capture stream on device {self.device} already closed: {e}")
+
+    def add_reader(self, name):
+        with self.condition:
+            self.readers[name] = self.write_position
+
+    def remove_reader(self, name):
+        with self.condition:
+            self.readers.pop(name, None)
+            self.condition.notify_all()
+
+    def read(self, name, frames, timeout=None):
+        """
+        Read the next frames for the reader, waiting until enough have been captured.
+        :param name: reader name
+        :param frames: number of frames to read
+        :param timeout: seconds to wait before giving up and returning None
+        :return: int16 numpy array, or None if the reader was removed, the timeout passed or capture has stopped
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self.condition:
+            while name in self.readers and not self.closed and self.write_position - self.readers[name] < frames:
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0 or not self.condition.wait(remaining):
+                    return None
+
+            if name not in self.readers or self.closed:
+                return None
+
+            position = self.readers[name]
+            if self.write_position - position > self.capacity:
+                skipped = self.write_position - self.capacity - position
+                position = self.write_position - self.capacity
+                logger.warning(f"Reader {name} fell behind on device {self.device}, skipped {skipped} frames")
+
+            indices = np.arange(position, position + frames) % self.capacity
+            self.readers[name] = position + frames
+
+            return self.buffer[indices]
+
+
+class PlaybackStream:
+    """
+    Persistent output stream for one sample rate and channel count, fed by a PortAudio callback from the clip being
+    played (or silence), so playing audio only hands over a buffer rather than starting a new player each time. Once
+    nothing has been played for playback_idle_seconds the stream stops calling back, and the next clip restarts it.
+    """
+
+    def __init__(self, p, rate, channels, chunk=playback_chunk):
+        self.rate = rate
+        self.channels = channels
+        self.condition = Condition()
+        self.clip = None
+        self.position = 0
+        self.start_time = None
+        self.idle_since = time.monotonic()
+        self.stopped = False
+
+        self.stream = p.open(
+            format=pyaudio.paInt16,
+            channels=channels,
+            rate=rate,
+            output=True,
+            frames_per_buffer=chunk,
+            stream_callback=self.callback
+        )
+
+        logger.debug(f"Playback stream opened, RATE: {rate}, channels: {channels}, CHUNK: {chunk}")
+
+    def callback(self, in_data, frame_count, time_info, status):
+        output = np.zeros((frame_count, self.channels), dtype=np.int16)
+
+        with self.condition:
+            if self.clip is not None:
+                if self.start_time is None:
+                    # The first frames of the clip are heard once the buffers ahead of them have been played
+                    latency = time_info.get('output_buffer_dac_time', 0) - time_info.get('current_time', 0)
+                    self.start_time = time.monotonic() + max(latency, 0)
+
+                frames = self.clip[self.position:self.position + frame_count]
+                output[:len(frames)] = frames
+                self.position += len(frames)
+                if self.position >= len(self.clip):
+                    self.clip = None
+                    self.idle_since = time.monotonic()
+                    self.condition.notify_all()
+            elif time.monotonic() - self.idle_since > playback_idle_seconds:
+                # Rather than waking up to hand over silence until the next clip
+                self.stopped = True
+                return output.tobytes(), pyaudio.paComplete
+
+        return output.tobytes(), pyaudio.paContinue
+
+    def play(self, samples):
+        """
+        Play the samples, returning once they have been heard.
+        :param samples: int16 numpy array of shape (frames, channels)
+        :return:
+        :raises RuntimeError: if the stream stopped calling back before the clip was played
+        """
+        duration = len(samples) / self.rate
+        with self.condition:
+            self.clip = samples
+            self.position = 0
+            self.start_time = None
+            restart, self.stopped = self.stopped, False
+
+        if restart:
+            self.stream.stop_stream()
+            self.stream.start_stream()
+            logger.debug(f"Playback stream restarted, RATE: {self.rate}, channels: {self.channels}")
+
+        with self.condition:
+            deadline = time.monotonic() + duration + playback_timeout_margin
+            while self.clip is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.stream.is_active():
+                    self.clip = None
+                    raise RuntimeError(f"Playback stream (RATE: {self.rate}, channels: {self.channels}) stopped "
+                                       f"after {self.position} of {len(samples)} frames")
+                self.condition.wait(min(remaining, 0.5))
+
+        # The last frames are still in the output buffers when the callback hands them over
+        if self.start_time is not None:
+            time.sleep(max(0.0, self.start_time + duration - time.monotonic()))
+
+    def close(self):
+        try:
+            self.stream.stop_stream()
+            self.stream.close()
+        except Exception as e:
+            logger.debug(f"Playback stream already closed: {e}")
+
+    def elapsed(self):
+        """
+        Seconds of the current clip that have been heard.
+        :return:
+        """
+        with self.condition:
+            if self.start_time is None:
+                return 0.0
+            return max(0.0, time.monotonic() - self.start_time)
 
 
 class AudioEngine:
@@ -70,8 +301,16 @@ class AudioEngine:
         self.CHUNK = None
 
         self._recording_stream = None
+        self.capture_buffers = {}
         self.talking = False
 
+        # The output stream is opened on first use and kept open, it is only replaced for a clip in another format
+        self.output_stream = None
+        # The output stream while a clip is being played on it
+        self.playback_stream = None
+        # Audio files kept in memory, keyed by file path
+        self.clips = {}
+
         self.path = Path(__file__).parent / "../audio"
         self.audio_on = audio_on
 
@@ -79,14 +318,27 @@ class AudioEngine:
         self.online = self.path / "online.wav"
         self.training = self.path / "training.wav"
 
+        for clip in (self.online, self.training):
+            if clip.exists():
+                self.preload_clip(clip)
+
         logger.debug("Initialized")
 
     def set_microphone_name(self, mic_key, mic_name):
+        with engine_lock:
+            self.setup_microphone(mic_key, mic_name)
+
+    def setup_microphone(self, mic_key, mic_name):
         self.microphones[mic_key] = mic_name
         input_device = int(self.find_input_device(mic_name))
 
-        self.RATE = self.find_compatible_sample_rate(input_device)
-        self.CHUNK = self.find_compatible_chunk_size(input_device)
+        if input_device in self.capture_buffers:
+            # The device is already being captured, so use the same settings rather than probing it while in use
+            self.RATE = self.capture_buffers[input_device].rate
+            self.CHUNK = self.capture_buffers[input_device].chunk
+        else:
+            self.RATE = self.find_compatible_sample_rate(input_device)
+            self.CHUNK = self.find_compatible_chunk_size(input_device)
 
         # Store the RATE and CHUNK values in a dictionary for each microphone
         self.microphones[mic_key] = {
@@ -149,54 +401,179 @@ class AudioEngine:
                 # This chunk size is not supported. Continue checking the next one.
                 logger.debug(f"  Chunk size {chunk_size} is NOT supported: {err}")
 
+    def preload_clip(self, audio_file):
+        """
+        Decode an audio file into memory, so playing it later does not read the file again.
+        :param audio_file:
+        :return:
+        """
+        self.clips[str(audio_file)] = AudioBuffer.from_file(audio_file)
+        logger.debug(f"Preloaded {audio_file}")
+
+    def load_audio(self, audio_file):
+        clip = self.clips.get(str(audio_file))
+        return clip if clip is not None else AudioBuffer.from_file(audio_file)
+
+    def get_playback_stream(self, rate, channels):
+        with engine_lock:
+            output_stream = self.output_stream
+            if output_stream is not None and (output_stream.rate, output_stream.channels) != (rate, channels):
+                # The output device has no mixer, so it only takes a stream in another format once this one is closed
+                logger.debug(f"Replacing the playback stream for RATE: {rate}, channels: {channels}")
+                output_stream.close()
+                self.output_stream = None
+
+            if self.output_stream is None:
+                self.output_stream = PlaybackStream(self.p, rate, channels)
+            return self.output_stream
+
     @ensure_not_talking
+    def play_buffer(self, samples, rate):
+        """
+        Play audio from memory, returning once it has been heard.
+        :param samples: int16 numpy array of shape (frames, channels)
+        :param rate: sample rate
+        :return:
+        """
+        if not self.audio_on:
+            return
+
+        playback_stream = self.get_playback_stream(rate, samples.shape[1])
+        self.playback_stream = playback_stream
+        try:
+            playback_stream.play(samples)
+        except Exception:
+            # The next clip opens a fresh stream rather than waiting on this one again
+            with engine_lock:
+                if self.output_stream is playback_stream:
+                    self.output_stream = None
+            playback_stream.close()
+            raise
+        finally:
+            self.playback_stream = None
+
     def play_audio(self):
         """
         This function is used to play the generated TTS output.
         """
-        if self.audio_on:
-            playsound(self.audio_file)
+        audio = self.load_audio(self.audio_file)
+        self.play_buffer(audio.samples, audio.rate)
+
+    def playback_position(self):
+        """
+        Playback clock, the seconds of the audio being played that have been heard so far, 0 when nothing is playing.
+        :return:
+        """
+        playback_stream = self.playback_stream
+        return playback_stream.elapsed() if playback_stream else 0.0
 
     def init_recording_stream(self, mic_key):
-        mic_info = self.microphones.get(mic_key)
-        logger.debug(f"Initializing recording stream for {mic_key}, mic_info: {mic_info}")
-        if not mic_info:
-            logger.error(f"Microphone {mic_key} not initialized")
+        """
+        Start reading from the microphone, every mic key on the same physical device shares one persistent capture
+        stream, so opening a recording stream just adds a reader to it.
+        :param mic_key:
+        :return:
+        """
+        with engine_lock:
+            mic_info = self.microphones.get(mic_key)
+            logger.debug(f"Initializing recording stream for {mic_key}, mic_info: {mic_info}")
+            if not mic_info:
+                logger.error(f"Microphone {mic_key} not initialized")
+                return
+
+            if mic_key in self.recording_streams:
+                if not self.recording_streams[mic_key].closed:
+                    logger.debug(f"Recording stream for {mic_key} already initialized")
+                    return
+                del self.recording_streams[mic_key]
+
+            capture_buffer = self.capture_buffers.get(mic_info['device'])
+            if capture_buffer is None or capture_buffer.closed:
+                # A capture that failed is reopened, the device may have come back
+                capture_buffer = CaptureBuffer(self.p, mic_info['device'], mic_info['RATE'], mic_info['CHUNK'])
+                self.capture_buffers[mic_info['device']] = capture_buffer
+
+            capture_buffer.add_reader(mic_key)
+            self.recording_streams[mic_key] = capture_buffer
+
+    def read_recording_frames(self, mic_key, frames=None):
+        capture_buffer = self.recording_streams.get(mic_key)
+        if not capture_buffer:
+            logger.error(f"Recording stream for {mic_key} not initialized")
             return
 
-        if mic_key in self.recording_streams:
-            logger.debug(f"Recording stream for {mic_key} already initialized")
-            return
+        mic_info = self.microphones.get(mic_key)
+        return capture_buffer.read(mic_key, frames or mic_info['CHUNK'])
 
-        self.recording_streams[mic_key] = self.p.open(
-            format=pyaudio.paInt16,
-            channels=1,
-            rate=mic_info['RATE'],
-            input=True,
-            frames_per_buffer=mic_info['CHUNK'],
-            input_device_index=mic_info['device']
-        )
+    def capture_failed(self, mic_key):
+        """
+        :param mic_key:
+        :return: True if the capture stream the mic key reads from has stopped, so reads will return None
+        """
+        capture_buffer = self.recording_streams.get(mic_key)
+        return capture_buffer is not None and capture_buffer.closed
 
     def read_recording_stream(self, mic_key):
-        stream = self.recording_streams.get(mic_key)
-        if not stream:
-            logger.error(f"Recording stream for {mic_key} not initialized")
-            return
-
-        mic_info = self.microphones.get(mic_key)
-        data = stream.read(mic_info['CHUNK'], exception_on_overflow=False)
-        return data
+        data = self.read_recording_frames(mic_key)
+        return data.tobytes() if data is not None else None
 
     def close_recording_stream(self, mic_key):
-        stream = self.recording_streams.get(mic_key)
-        if not stream:
-            logger.error(f"Recording stream for {mic_key} not initialized")
-            return
-
-        stream.close()
-        del self.recording_streams[mic_key]
-        logger.debug(f"Recording stream for {mic_key} closed")
+        with engine_lock:
+            capture_buffer = self.recording_streams.get(mic_key)
+            if not capture_buffer:
+                logger.error(f"Recording stream for {mic_key} not initialized")
+                return
+
+            # The capture stream itself stays open for the other readers and the next recording
+            capture_buffer.remove_reader(mic_key)
+            del self.recording_streams[mic_key]
+            logger.debug(f"Recording stream for {mic_key} closed")
+
+    def record_until_silence(self, mic_key, max_seconds, silence_threshold, silence_duration, audio_file=None,
+                             on_chunk=None):
+        """
+        Record from the microphone until there has been silence for the silence duration, or the maximum recording time
+        is reached.
+        :param mic_key:
+        :param max_seconds: maximum recording length in seconds
+        :param silence_threshold: RMS level below which a chunk counts as silence
+        :param silence_duration: seconds of continuous silence that ends the recording
+        :param audio_file: wav file to also save the recording to
+        :param on_chunk: called with each chunk as it is recorded, e.g. to transcribe while the user is speaking
+        :return: AudioBuffer of the recording
+        """
+        self.init_recording_stream(mic_key)
+        rate = self.microphones[mic_key]['RATE']
+        envelope_features = EnvelopeFeatures(self.microphones[mic_key]['CHUNK'])
+
+        chunks = []
+        silent_frames = 0
+        recorded_frames = 0
+        start_time = time.time()
+
+        try:
+            while recorded_frames < max_seconds * rate and silent_frames < silence_duration * rate:
+                data = self.read_recording_frames(mic_key)
+                if data is None:
+                    break
+
+                chunks.append(data)
+                recorded_frames += len(data)
+                if on_chunk is not None:
+                    on_chunk(data)
+                silent = envelope_features.rms(data) < silence_threshold
+                silent_frames = silent_frames + len(data) if silent else 0
+        finally:
+            self.close_recording_stream(mic_key)
+
+        recording = AudioBuffer(np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int16), rate)
+        if audio_file is not None:
+            recording.to_file(audio_file)
+        logger.debug(f"Recorded {recorded_frames / rate:.2f} seconds in {time.time() - start_time:.2f} seconds")
+
+        return recording
 
 
 def audio_engine_access():
-    return AudioEngine()
+    with engine_lock:
+        return AudioEngine()
@@ -0,0 +1,167 @@
+import json
+import logging
+import os
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+logger.debug("Initialized")
+
+
+def create_session(pool_size=2):
+    """
+    A requests session holding its connections open between requests, so each request to a local server skips the TCP
+    connection set up.
+    :param pool_size: connections kept open, one for each request that may be made at the same time
+    :return:
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class ChatBackendError(Exception):
+    """
+    A request to the chat backend failed, raised in place of the error from whichever client the backend uses.
+    """
+
+
+class ChatStream:
+    """
+    Base for the streaming chat backends, keeping the conversation history (if enabled) in the chat message format
+    shared by Ollama and OpenAI.
+    """
+
+    # Errors from the backend's client, raised again as ChatBackendError
+    client_errors = ()
+
+    def __init__(self, role, history=None):
+        """
+        :param role: system prompt
+        :param history: ChatHistory sent with each message and added to, or None to send each message on its own
+        """
+        self.role = role
+        self.history = history
+
+    def build_messages(self, user_input):
+        if self.history is None:
+            return [{"role": "system", "content": self.role}, {"role": "user", "content": user_input}]
+        return self.history.build_messages(self.role, user_input)
+
+    def stream(self, user_input):
+        """
+        Yield the response to the user input token by token, adding the full exchange to the history at the end.
+        :param user_input:
+        :return:
+        """
+        reply = []
+        try:
+            for token in self.stream_tokens(self.build_messages(user_input)):
+                reply.append(token)
+                yield token
+        except self.client_errors as e:
+            raise ChatBackendError(f"{type(self).__name__}: {e}") from e
+
+        if self.history is not None:
+            self.history.add_turn(user_input, "".join(reply))
+
+    def get_response(self, user_input):
+        return "".join(self.stream(user_input))
+
+    def stream_tokens(self, messages):
+        raise NotImplementedError
+
+    def warm_up(self):
+        pass
+
+
+class OllamaChatStream(ChatStream):
+    client_errors = (requests.RequestException,)
+
+    def __init__(self, model, role, history, host, num_predict=None, keep_alive=None, session=None, timeout=None):
+        """
+        :param model:
+        :param role:
+        :param history:
+        :param host:
+        :param num_predict: most tokens generated, or None to use the Modelfile's
+        :param keep_alive: how long Ollama keeps the model loaded after each request, e.g. "30m", or -1 for as long as
+        it runs; None to use Ollama's default
+        :param session: requests session to share, with its connection pool, a new one is made if None
+        :param timeout: seconds to wait to connect, and between lines of the response, as (connect, read); None to wait
+        for as long as it takes
+        """
+        super().__init__(role, history)
+        self.model = model
+        self.url = f"{host}/api/chat"
+        self.num_predict = num_predict
+        self.keep_alive = keep_alive
+        self.session = session or create_session()
+        self.timeout = timeout
+
+    def build_payload(self, messages, stream):
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "stream": stream,
+        }
+        if self.num_predict is not None:
+            payload["options"] = {"num_predict": self.num_predict}
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        return payload
+
+    def warm_up(self):
+        """
+        Load the model into memory (an empty chat loads it without generating anything), so the next response does not
+        wait for it.
+        :return:
+        """
+        start_time = time.time()
+        response = self.session.post(self.url, json=self.build_payload([], stream=False), timeout=self.timeout)
+        response.raise_for_status()
+        logger.info(f"Warmed up {self.model} in {time.time() - start_time:.2f} seconds")
+
+    def stream_tokens(self, messages):
+        payload = self.build_payload(messages, stream=True)
+
+        with self.session.post(self.url, json=payload, stream=True, timeout=self.timeout) as response:
+            response.raise_for_status()
+            # Ollama streams one JSON object per line, the last one is marked as done. The stream is read to its end
+            # rather than left at the done line, otherwise the connection is dropped instead of going back to the pool
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                token = chunk.get("message", {}).get("content", "")
+                if token:
+                    yield token
+
+
+class ChatGPTChatStream(ChatStream):
+    def __init__(self, model, role, history):
+        super().__init__(role, history)
+        self.model = model
+        # Imported here so the Ollama backend does not load the OpenAI client
+        from dotenv import load_dotenv
+        from openai import OpenAI, OpenAIError
+
+        self.client_errors = (OpenAIError,)
+        load_dotenv()
+        self.client = OpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+        )
+
+    def stream_tokens(self, messages):
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            stream=True,
+        )
+        for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
@@ -1,10 +1,16 @@
 import logging
-from time import sleep
-
-from ChattingGPT.integrate_chatgpt import IntegrateChatGPT, IntegrateOllama
-from EventHive.event_hive_runner import EventActor
-from config.chattinggpt_config import role, chat_backend, use_history, ollama_model
-from config.custom_events import BotEvent, BotDoneEvent, ConversationDoneEvent
+import threading
+
+from components.chat_streaming import OllamaChatStream, ChatGPTChatStream, ChatBackendError, create_session
+from config.chattinggpt_config import (role, chat_backend, use_history, ollama_model, stream_min_phrase_length,
+                                       ollama_host, ollama_stream_num_predict, openai_chat_model, ollama_keep_alive,
+                                       ollama_timeout,
+                                       chat_history_token_budget, chat_history_summary_token_budget,
+                                       chat_history_min_turns, chat_history_chars_per_token)
+from config.custom_events import BotEvent, BotDoneEvent, TTSEvent
+from utils.chat_history import ChatHistory
+from utils.event_dispatch import EventActor
+from utils.string_ops import assemble_phrases
 
 logger = logging.getLogger(__name__)
 logger.debug("Initialized")
@@ -15,21 +21,64 @@ class ChatHandler:
     def get_response(self, event_data):
         raise NotImplementedError
 
+    def stream_response(self, event_data):
+        yield self.get_response(event_data)
+
+    def reset_history(self):
+        pass
+
+    def warm_up(self):
+        pass
+
 
 # Implement the real chat handler
 class RealChatHandler(ChatHandler):
     def __init__(self):
+        self.history = ChatHistory(token_budget=chat_history_token_budget,
+                                   summary_token_budget=chat_history_summary_token_budget,
+                                   min_turns=chat_history_min_turns,
+                                   chars_per_token=chat_history_chars_per_token) if use_history else None
+
         if chat_backend == "gpt":
-            self.handler = IntegrateChatGPT(role=role, use_history=use_history)
+            # Only the selected backend is imported, the chat libraries are not needed in test mode
+            from ChattingGPT.integrate_chatgpt import IntegrateChatGPT
+
+            self.stream_handler = ChatGPTChatStream(model=openai_chat_model, role=role, history=self.history)
+            # ChattingGPT's own history grows without limit, so with history on whole responses go through the stream,
+            # sharing its history, which is kept within its token budget
+            self.handler = self.stream_handler if use_history else IntegrateChatGPT(role=role, use_history=False)
             logger.debug("ChatGPT handler initialized")
         elif chat_backend == "ollama":
-            self.handler = IntegrateOllama(model=ollama_model, role=role, use_history=use_history)
+            # Every request to the Ollama server goes over the same pool of kept open connections, and keeps the model
+            # loaded. Whole responses are not cut short like streamed ones, so they have a stream of their own
+            session = create_session()
+            self.stream_handler = OllamaChatStream(model=ollama_model, role=role, history=self.history,
+                                                   host=ollama_host, num_predict=ollama_stream_num_predict,
+                                                   keep_alive=ollama_keep_alive, session=session,
+                                                   timeout=ollama_timeout)
+            self.handler = OllamaChatStream(model=ollama_model, role=role, history=self.history, host=ollama_host,
+                                            keep_alive=ollama_keep_alive, session=session, timeout=ollama_timeout)
             logger.debug("Ollama handler initialized")
         else:
             raise ValueError("Unsupported chat backend")
 
     def get_response(self, event_data):
-        return self.handler.get_response(event_data)
+        try:
+            return self.handler.get_response(event_data)
+        except self.stream_handler.client_errors as e:
+            # ChattingGPT's handler raises its client's errors as they are
+            raise ChatBackendError(f"{type(self.handler).__name__}: {e}") from e
+
+    def stream_response(self, event_data):
+        return self.stream_handler.stream(event_data)
+
+    def warm_up(self):
+        self.stream_handler.warm_up()
+
+    def reset_history(self):
+        if self.history is not None:
+            self.history.reset()
+            logger.debug(f"Chat history stats: {self.history.stats()}")
 
 
 # Implement the test chat handler
@@ -37,26 +86,98 @@ class TestChatHandler(ChatHandler):
     def get_response(self, event_data):
         return "chatbot test response"
 
+    def stream_response(self, event_data):
+        for token in ["chatbot ", "streamed ", "test ", "response. ", "second ", "streamed ", "test ", "response."]:
+            yield token
+
 
 # ChatbotOperations modified to use the Strategy Pattern
 class ChatbotOperations(EventActor):
     def __init__(self, event_queue, test_mode=True):
         super().__init__(event_queue)
         self.chat_handler = TestChatHandler() if test_mode else RealChatHandler()
+        self.warm_up_thread = None
 
     def process_chatbot_response(self, event_type=None, event_data=None):
-        bot_response = self.chat_handler.get_response(event_data)
+        try:
+            bot_response = self.chat_handler.get_response(event_data)
+        except ChatBackendError as e:
+            # An empty response restarts the conversation, rather than leaving it waiting for one that never comes
+            logger.error(f"Chat backend request failed: {e}")
+            bot_response = ""
         logger.debug(f"Bot response: {bot_response}")
 
         self.produce_event(BotDoneEvent(["BOT_FINISHED", bot_response], 1))
-        sleep(1)
-        self.produce_event(ConversationDoneEvent(["CONVERSATION_ACTION_FINISHED"], 2))
+        self.finish_action(2)
+
+        return True
+
+    def stream_chatbot_response(self, event_type=None, event_data=None):
+        """
+        Stream the bot response to the TTS system phrase by phrase as it is generated, the conversation moves on to
+        playback as soon as the first phrase has been sent.
+        :param event_type:
+        :param event_data:
+        :return:
+        """
+        self.produce_event(TTSEvent(["START_TTS_STREAM"], 1))
+
+        phrases = []
+        try:
+            for phrase in assemble_phrases(self.chat_handler.stream_response(event_data), stream_min_phrase_length):
+                logger.debug(f"Bot response phrase: {phrase}")
+                self.produce_event(TTSEvent(["QUEUE_TTS_PHRASE", phrase], 1))
+                if not phrases:
+                    self.finish_action(2)
+                phrases.append(phrase)
+        except ChatBackendError as e:
+            # The phrases sent so far are still spoken, the stream ends there
+            logger.error(f"Chat backend request failed after {len(phrases)} phrases: {e}")
+
+        self.produce_event(TTSEvent(["END_TTS_STREAM"], 1))
+
+        if not phrases:
+            self.finish_action(2)
+
+        bot_response = " ".join(phrases)
+        logger.debug(f"Bot response: {bot_response}")
+        self.produce_event(BotDoneEvent(["BOT_STREAM_FINISHED", bot_response], 1))
+
+        return True
+
+    def warm_up_chatbot(self, event_type=None, event_data=None):
+        """
+        Load the chat model in the background, so the bot engine is ready by the time the speech has been transcribed.
+        :param event_type:
+        :param event_data:
+        :return:
+        """
+        if self.warm_up_thread is not None and self.warm_up_thread.is_alive():
+            return True
+
+        self.warm_up_thread = threading.Thread(target=self.warm_up, daemon=True)
+        self.warm_up_thread.start()
+
+        return True
+
+    def warm_up(self):
+        try:
+            self.chat_handler.warm_up()
+        except Exception as e:
+            # The response will load the model anyway, just more slowly
+            logger.warning(f"Chat model warm up failed: {e}")
+
+    def reset_chat_history(self, event_type=None, event_data=None):
+        self.chat_handler.reset_history()
 
         return True
 
     def get_event_handlers(self):
         return {
-            "GET_BOT_RESPONSE": self.process_chatbot_response
+            "GET_BOT_RESPONSE": self.process_chatbot_response,
+            "STREAM_BOT_RESPONSE": self.stream_chatbot_response,
+            "RESET_CHAT_HISTORY": self.reset_chat_history,
+            "WARM_UP_BOT": self.warm_up_chatbot,
         }
 
     def get_consumable_events(self):
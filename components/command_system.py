@@ -1,17 +1,46 @@
 import logging
 from abc import ABC, abstractmethod
-from time import sleep
 
-from EventHive.event_hive_runner import EventActor
-from config.command_config import override_word, de_override_word
-from config.custom_events import CommandCheckEvent, CommandCheckDoneEvent, ConversationDoneEvent
-from config.tts_config import test_command_text, shutdown_text, reboot_text, no_command_text
-from utils.string_ops import clean_text
+from config.command_config import (override_word, de_override_word, voice_commands, command_filler_words,
+                                   command_match_threshold)
+from config.custom_events import CommandCheckEvent, CommandCheckDoneEvent
+from config.tts_config import no_command_text
+from utils.command_index import CommandIndex
+from utils.event_dispatch import EventActor
 
 logger = logging.getLogger(__name__)
 logger.debug("Initialized")
 
 
+class CommandMatcher:
+    """
+    Matches a transcript against the override phrases and the voice commands in command_config.py. The phrases are
+    compiled into a fuzzy index up front, so the conversation engine can run it as soon as the transcript arrives.
+    """
+
+    no_command = ["COMMAND_FOUND", ["no_command", no_command_text]]
+
+    def __init__(self):
+        phrases = {override_word: ["OVERRIDE_COMMAND_FOUND"], de_override_word: ["DE_OVERRIDE_COMMAND_FOUND"]}
+        for command, config in voice_commands.items():
+            for phrase in config["phrases"]:
+                phrases[phrase] = ["COMMAND_FOUND", [command, config["response"]]]
+
+        self.index = CommandIndex(phrases, filler_words=command_filler_words, threshold=command_match_threshold)
+
+    def match(self, text):
+        """
+        :param text: transcript
+        :return: content of the CommandCheckDoneEvent for the command spoken, or None if it is not a command
+        """
+        command_match = self.index.search(text)
+        if command_match is None:
+            return None
+
+        logger.debug(f"Matched command phrase: {command_match.phrase}, confidence: {command_match.confidence:.2f}")
+        return command_match.command
+
+
 # Define a generic interface for command operations
 class CommandOperationsInterface(ABC):
     @abstractmethod
@@ -23,28 +52,16 @@ class CommandOperationsInterface(ABC):
 class RealCommandOperations(CommandOperationsInterface):
     def __init__(self, event_producer):
         self.event_producer = event_producer
+        self.command_matcher = CommandMatcher()
 
     def process_command(self, event_data):
-        # Clean and normalize both input and comparison strings
-        clean_event_data = clean_text(event_data)
-
-        if clean_event_data == override_word:
-            self.event_producer(CommandCheckDoneEvent(["OVERRIDE_COMMAND_FOUND"], 1))
-        elif clean_event_data == de_override_word:
-            self.event_producer(CommandCheckDoneEvent(["DE_OVERRIDE_COMMAND_FOUND"], 1))
-        elif clean_event_data in ["SHUTDOWN", "SHUT DOWN", "shutdown", "shut down", "power off", "poweroff",
-                                  "turn off"]:
-            self.event_producer(CommandCheckDoneEvent(["COMMAND_FOUND", ["shutdown_command", shutdown_text]], 1))
-            logger.debug("Command checker finished, event output: SHUTDOWN")
-        elif clean_event_data in ["REBOOT", "restart", "reboot", "restart now", "reboot now"]:
-            self.event_producer(CommandCheckDoneEvent(["COMMAND_FOUND", ["reboot_command", reboot_text]], 1))
-            logger.debug("Command checker finished, event output: REBOOT")
-        elif clean_event_data in ["TEST", "test", "test command"]:
-            self.event_producer(CommandCheckDoneEvent(["COMMAND_FOUND", ["test_command", test_command_text]], 1))
-            logger.debug("Command checker finished, event output: TEST COMMAND")
-        else:
-            self.event_producer(CommandCheckDoneEvent(["COMMAND_FOUND", ["no_command", no_command_text]], 1))
+        match = self.command_matcher.match(event_data)
+        if match is None:
+            self.event_producer(CommandCheckDoneEvent(CommandMatcher.no_command, 1))
             logger.debug("Command checker finished, no commands detected")
+        else:
+            self.event_producer(CommandCheckDoneEvent(match, 1))
+            logger.debug(f"Command checker finished, event output: {match}")
 
 
 # Implement the test command operations
@@ -68,8 +85,7 @@ class CommandCheckOperations(EventActor):
 
     def check_and_process_commands(self, event_type=None, event_data=None):
         self.command_processor.process_command(event_data)
-        sleep(1)
-        self.produce_event(ConversationDoneEvent(["CONVERSATION_ACTION_FINISHED"], 2))
+        self.finish_action(2)
         return True
 
     def get_event_handlers(self):
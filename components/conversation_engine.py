@@ -1,12 +1,17 @@
 import logging
 
-from EventHive.event_hive_runner import EventActor
-from config.conversation_config import conversation_function_list, demo_mode_function_list, command_function_list
-from config.custom_events import (STTEvent, TTSEvent, BotEvent, MovementEvent, DetectEvent, STTDoneEvent, BotDoneEvent,
-                                  ConversationDoneEvent, AudioDetectControllerEvent, CommandCheckEvent,
+from components.command_system import CommandMatcher
+from config.chattinggpt_config import stream_chat_response, ollama_warm_up_on_detection
+from config.command_config import voice_commands
+from config.conversation_config import (conversation_action_graph, demo_mode_action_graph, command_action_graph,
+                                        streamed_conversation_action_graph, action_systems, action_result_tokens,
+                                        command_fast_path)
+from config.custom_events import (STTEvent, TTSEvent, TTSDoneEvent, BotEvent, MovementEvent, DetectEvent, STTDoneEvent,
+                                  BotDoneEvent, ConversationDoneEvent, AudioDetectControllerEvent, CommandCheckEvent,
                                   CommandCheckDoneEvent, HardwareEvent)
-from config.path_config import tts_audio_path
-from config.tts_config import demo_text, greeting_text, override_text
+from config.tts_config import demo_text, greeting_text, override_text, tts_playback_mode, command_locked_text
+from utils.action_graph import ActionGraph
+from utils.event_dispatch import EventActor
 
 logger = logging.getLogger(__name__)
 
@@ -20,15 +25,39 @@ class ConversationEngine(EventActor):
         """
         self.demo_mode = demo_mode
 
-        self.functions_list = []
+        # Streamed chat responses are spoken through the streamed TTS playback
+        self.stream_playback = tts_playback_mode == "stream" or stream_chat_response
+
+        # The action graphs are compiled up front, so a bad graph in the config fails at boot rather than mid
+        # conversation
+        self.action_graphs = {
+            "conversation": self.compile_action_graph("conversation", conversation_action_graph),
+            "streamed_conversation": self.compile_action_graph("streamed_conversation",
+                                                               streamed_conversation_action_graph),
+            "demo": self.compile_action_graph("demo", demo_mode_action_graph),
+            "command": self.compile_action_graph("command", command_action_graph),
+        }
+        self.default_action_graph = self.action_graphs["streamed_conversation" if stream_chat_response
+                                                       else "conversation"]
 
-        self.current_index = 0
+        self.action_graph = None
+        self.completed_actions = set()
+        # Name of each running action, in the order they were started, to the results it is still waiting on
+        self.running_actions = {}
+        self.current_action = None
+        self.scheduling = False
+        self.reschedule = False
 
         self.inference_output = None
+        # TTS audio of the bot response, until it is handed to the jaw system to play
+        self.tts_audio = None
 
         self.command_mode = False
         self.run_command = None
 
+        self.command_matcher = CommandMatcher() if command_fast_path else None
+        self.command_match = None
+
         self.bot_response = greeting_text
         self.stored_bot_response = greeting_text
 
@@ -52,12 +81,27 @@ class ConversationEngine(EventActor):
         This function is used to speak the bot response.
         :return:
         """
-        self.produce_event(TTSEvent(["GENERATE_TTS", self.bot_response], 1))
+        if self.stream_playback:
+            self.produce_event(TTSEvent(["STREAM_TTS", self.bot_response], 1))
+        else:
+            self.produce_event(TTSEvent(["GENERATE_TTS", self.bot_response], 1))
 
         logger.debug(f"TTS event produced with text: {self.bot_response}")
 
         return True
 
+    def set_tts_audio(self, event_type=None, event_data=None):
+        """
+        This function sets the TTS audio of the bot response.
+        :param event_type:
+        :param event_data: AudioBuffer, or None if there is no audio to hand on
+        :return:
+        """
+        self.tts_audio = event_data
+        self.complete_token("TTS_FINISHED")
+
+        return True
+
     def scan_mode_on(self, event_type=None, event_data=None):
         """
         This function is used to speak the bot response.
@@ -87,13 +131,20 @@ class ConversationEngine(EventActor):
         :param event_data:
         :return:
         """
+        self.command_match = None
         # Check if the string is empty or contains only whitespace
         if event_data.strip() == "":
-            self.current_index = 0
-            logger.debug("The inference output is empty, resetting action list index.")
-        else:
-            self.inference_output = event_data
-            logger.debug(f"Retrieved Speech to Text output and set output response to: {self.inference_output}")
+            logger.debug("The inference output is empty, restarting the conversation.")
+            self.start_actions(self.action_graph)
+            return True
+
+        self.inference_output = event_data
+        logger.debug(f"Retrieved Speech to Text output and set output response to: {self.inference_output}")
+        if self.command_matcher is not None:
+            self.command_match = self.command_matcher.match(event_data)
+            logger.debug(f"Command matched on arrival: {self.command_match}")
+
+        self.complete_token("STT_FINISHED")
 
         return True
 
@@ -104,13 +155,21 @@ class ConversationEngine(EventActor):
         :param event_data:
         :return:
         """
+        if not self.awaiting("BOT_FINISHED"):
+            # Asked for alongside the command check, which found a command and moved the conversation on
+            logger.debug(f"Bot response no longer needed, dropping: {event_data}")
+            return True
+
         # Check if the string is empty or contains only whitespace
         if event_data.strip() == "":
-            self.current_index = 0
-            logger.debug("The bot response is empty, resetting action list index.")
-        else:
-            self.bot_response = event_data
-            logger.debug(f"Retrieved bot response and set output response to: {self.bot_response}")
+            logger.debug("The bot response is empty, restarting the conversation.")
+            self.start_actions(self.action_graph)
+            return True
+
+        self.bot_response = event_data
+        logger.debug(f"Retrieved bot response and set output response to: {self.bot_response}")
+
+        self.complete_token("BOT_FINISHED")
 
         return True
 
@@ -119,18 +178,75 @@ class ConversationEngine(EventActor):
         This function returns the bot response.
         :return:
         """
+        if self.answer_command(stream=False):
+            return True
+
         self.produce_event(BotEvent(["GET_BOT_RESPONSE", self.inference_output], 1))
         logger.debug(f"Bot event produced with input: {self.inference_output}")
 
         return True
 
+    def stream_bot_engine_response(self, event_type=None, event_data=None):
+        """
+        This function streams the bot response straight to TTS as it is generated.
+        :return:
+        """
+        if self.answer_command(stream=True):
+            return True
+
+        self.produce_event(BotEvent(["STREAM_BOT_RESPONSE", self.inference_output], 1))
+        logger.debug(f"Bot stream event produced with input: {self.inference_output}")
+
+        return True
+
+    def set_streamed_bot_response(self, event_type=None, event_data=None):
+        """
+        This function is called once a streamed bot response has been fully generated, as it has already been spoken
+        the bot response goes back to the greeting for the next person detected.
+        :param event_type:
+        :param event_data:
+        :return:
+        """
+        logger.debug(f"Streamed bot response finished: {event_data}")
+        self.bot_response = greeting_text
+
+        return True
+
     def activate_jaw_audio(self, event_type=None, event_data=None):
         """
         This function returns the bot response.
         :return:
         """
-        self.produce_event(MovementEvent(["JAW_TTS_AUDIO", tts_audio_path], 1))
-        logger.debug(f"Jaw audio event produced with audio file: {tts_audio_path}")
+        if self.stream_playback:
+            self.produce_event(MovementEvent(["JAW_TTS_AUDIO_STREAM"], 1))
+            logger.debug("Jaw audio event produced for streamed TTS")
+        elif self.tts_audio is not None:
+            tts_audio, self.tts_audio = self.tts_audio, None
+            self.produce_event(MovementEvent(["JAW_TTS_AUDIO", tts_audio], 1))
+            logger.debug(f"Jaw audio event produced with {tts_audio.duration:.2f} seconds of audio")
+        else:
+            logger.debug("No TTS audio to play.")
+            self.complete_action(self.current_action)
+
+        return True
+
+    def answer_command(self, stream):
+        """
+        If a command was spoken outside of command mode, reply that the override is needed in place of the LLM
+        response, saving the LLM round trip.
+        :param stream: whether the LLM response would have been streamed straight to TTS
+        :return: whether the command was answered
+        """
+        if self.command_match is None:
+            return False
+
+        logger.debug(f"Command spoken outside of command mode, skipping the LLM: {self.command_match}")
+        if stream:
+            # Spoken through the same streamed playback as the LLM response
+            self.produce_event(TTSEvent(["STREAM_TTS", command_locked_text], 1))
+        else:
+            self.set_bot_response(event_data=command_locked_text)
+        self.complete_action(self.current_action)
 
         return True
 
@@ -139,6 +255,18 @@ class ConversationEngine(EventActor):
         This function returns the bot response.
         :return:
         """
+        if self.command_matcher is not None:
+            # Already matched as the STT output arrived, so the command system is not needed
+            content = self.command_match or CommandMatcher.no_command
+            if content[0] == "COMMAND_FOUND":
+                action = self.current_action
+                self.set_command(event_data=content[1])
+                self.complete_action(action)
+            else:
+                # The override phrases restart the conversation
+                self.get_event_handlers()[content[0]](event_type=content[0])
+            return True
+
         self.produce_event(CommandCheckEvent(["CHECK_VOICE_COMMANDS", self.inference_output], 1))
         logger.debug(f"Command check event produced with input: {self.inference_output}")
 
@@ -151,12 +279,11 @@ class ConversationEngine(EventActor):
         """
         self.command_mode = True
         self.stored_bot_response = self.bot_response
-        self.reset_action_list()
         self.bot_response = override_text
-        self.functions_list = command_function_list
 
-        logger.debug(f"Command system online, with response: {self.bot_response} and functions list: "
-                     f"{self.functions_list}")
+        logger.debug(f"Command system online, with response: {self.bot_response}")
+
+        self.start_actions(self.action_graphs["command"])
 
         return True
 
@@ -166,12 +293,11 @@ class ConversationEngine(EventActor):
         :return:
         """
         self.command_mode = False
-        self.reset_action_list()
         self.bot_response = self.stored_bot_response
-        self.functions_list = conversation_function_list
 
-        logger.debug(f"Command system offline, with response: {self.bot_response} and "
-                     f"functions list: {self.functions_list}")
+        logger.debug(f"Command system offline, with response: {self.bot_response}")
+
+        self.start_actions(self.default_action_graph)
 
         return True
 
@@ -187,6 +313,8 @@ class ConversationEngine(EventActor):
         else:
             logger.debug("Command mode off, no command set.")
 
+        self.complete_token("COMMAND_CHECKED")
+
         return True
 
     def execute_command(self, event_type=None, event_data=None):
@@ -196,34 +324,38 @@ class ConversationEngine(EventActor):
         :param event_data:
         :return:
         """
-        if self.run_command == "shutdown_command":
-            self.produce_event(HardwareEvent(["SHUTDOWN"], 3))
-            logger.debug("Command checker finished, event output: SHUTDOWN")
-        elif self.run_command == "reboot_command":
-            self.produce_event(HardwareEvent(["REBOOT"], 3))
-            logger.debug("Command checker finished, event output: REBOOT")
-        elif self.run_command == "test_command":
-            self.produce_event(HardwareEvent(["SHUTDOWN"], 3))
-            logger.debug("Command checker finished, event output: TEST COMMAND")
-        elif self.run_command == "no_command":
-            logger.debug("No command to run.")
-            self.next_action()
+        command = voice_commands.get(self.run_command)
+        if command is not None:
+            self.produce_event(HardwareEvent([command["hardware_event"]], 3))
+            logger.debug(f"Command {self.run_command} finished, event output: {command['hardware_event']}")
         else:
             logger.debug("No command to run.")
-            self.next_action()
+            self.complete_action(self.current_action)
 
         return True
 
-    def reset_action_list(self, event_type=None, event_data=None):
+    def compile_action_graph(self, name, spec):
         """
-        This function returns the bot response.
+        Compile an action graph from the config, binding each action to its method.
+        :param name:
+        :param spec:
         :return:
         """
+        def tokens(action_name):
+            return [action_systems[action_name], *action_result_tokens.get(action_name, [])]
 
-        self.functions_list = []
-        self.current_index = 0
+        return ActionGraph(name, spec, bind=lambda action_name: getattr(self, action_name), tokens=tokens)
 
-        logger.debug(f"All functions have been executed, action list and index reset to {self.current_index}")
+    def reset_action_list(self, event_type=None, event_data=None):
+        """
+        This function clears the running action graph.
+        :return:
+        """
+        self.action_graph = None
+        self.completed_actions = set()
+        self.running_actions = {}
+
+        logger.debug("All actions have been executed, action graph reset")
 
     def conversation_cycle(self, event_type=None, event_data=None):
         """
@@ -232,52 +364,119 @@ class ConversationEngine(EventActor):
         """
 
         if self.demo_mode:
-            self.functions_list = demo_mode_function_list
+            action_graph = self.action_graphs["demo"]
             self.bot_response = demo_text
         elif self.command_mode:
-            self.functions_list = command_function_list
+            action_graph = self.action_graphs["command"]
         else:
-            self.functions_list = conversation_function_list
+            action_graph = self.default_action_graph
+            if ollama_warm_up_on_detection:
+                # The chat model loads while the greeting is spoken and the visitor is listened to
+                self.produce_event(BotEvent(["WARM_UP_BOT"], 1))
 
         logger.debug(f"Conversation activated, demo mode: {self.demo_mode} "
-                     f"with response: {self.bot_response} and functions list: {self.functions_list}")
+                     f"with response: {self.bot_response} and action graph: {action_graph.name}")
 
-        self.next_action()
+        self.start_actions(action_graph)
 
         return True
 
-    def next_action(self, event_type=None, event_data=None):
+    def start_actions(self, action_graph):
         """
-        This function runs the next action.
-        Some things we want to run asynchronously, but there are certain actions that rely on the completion of prior
-        actions. This function is used to run the next action in the list (generated prior to calling this)
-        and make sure that the previous action has completed.
-        :param event_type:
-        :param event_data:
+        This function (re)starts an action graph from the beginning, any actions still running from before are
+        forgotten, and their results ignored.
+        :param action_graph:
         :return:
         """
-        logger.debug(f"Next action called, with functions list: {self.functions_list}, current index: "
-                     f"{self.current_index}")
-        if self.functions_list:  # This checks if the list is not empty
-            if self.current_index < len(self.functions_list):
-                func_name = self.functions_list[self.current_index]
-                logger.debug(
-                    f"Running next action: {func_name}, current index: {self.current_index}, "
-                    f"total length: {len(self.functions_list)}")
-                self.current_index += 1
-                func = getattr(self, func_name)
-                func()
+        self.reset_action_list()
+        self.action_graph = action_graph
+        logger.debug("Starting action graph: %s", action_graph.name)
+        self.run_ready_actions()
 
-                return True
-            else:
+        return True
+
+    def run_ready_actions(self):
+        """
+        This function runs every action whose dependencies have finished. Actions can finish, or restart the graph,
+        while they are being run, in which case the actions ready to run are worked out again.
+        :return:
+        """
+        if self.scheduling:
+            self.reschedule = True
+            return
+
+        self.scheduling = True
+        try:
+            self.reschedule = True
+            while self.reschedule and self.action_graph is not None:
+                self.reschedule = False
+                for node in self.action_graph.ready(self.completed_actions, self.running_actions):
+                    logger.debug("Running action: %s, waiting on: %s", node.name, sorted(node.tokens))
+                    # Set before running the action, as a synchronous action may complete (and move on) straight away
+                    self.running_actions[node.name] = set(node.tokens)
+                    self.current_action = node.name
+                    node.action()
+                    self.current_action = None
+                    if self.reschedule:
+                        break
+
+            if self.action_graph is not None and len(self.completed_actions) == len(self.action_graph):
                 self.reset_action_list()
+        finally:
+            self.scheduling = False
+
+    def awaiting(self, token):
+        return any(token in tokens for tokens in self.running_actions.values())
+
+    def complete_action(self, name):
+        """
+        This function marks a running action as finished, and runs any actions that were waiting on it.
+        :param name:
+        :return:
+        """
+        if self.running_actions.pop(name, None) is None:
+            return
+
+        self.completed_actions.add(name)
+        logger.debug("Action finished: %s, running: %s", name, list(self.running_actions))
+        self.run_ready_actions()
 
+    def complete_token(self, token):
+        """
+        This function marks a result as received by the running action waiting on it (the earliest started, if more than
+        one is), once every result an action was started with has come back it has finished, so ordering does not
+        depend on the order the events arrive in.
+        :param token:
+        :return:
+        """
+        for name, tokens in self.running_actions.items():
+            if token in tokens:
+                tokens.discard(token)
+                if tokens:
+                    logger.debug("Received %s for %s, still waiting on: %s", token, name, sorted(tokens))
+                else:
+                    self.complete_action(name)
                 return True
-        else:
-            logger.debug("No functions to execute.")
 
-            return True
-            # Optionally, you can add additional logic here if needed when the list is empty.
+        logger.debug("Received %s but no running action is waiting on it, ignoring", token)
+        return True
+
+    def action_finished(self, event_type=None, event_data=None):
+        """
+        This function is called when a system reports it has finished an action, the event data names the system.
+        :param event_type:
+        :param event_data:
+        :return:
+        """
+        if event_data is None:
+            # Not named, so it finishes the earliest started action that is waiting on any system
+            event_data = next((token for tokens in self.running_actions.values() for token in tokens
+                               if token in action_systems.values()), None)
+            if event_data is None:
+                logger.debug("Received CONVERSATION_ACTION_FINISHED but no running action is waiting on it, ignoring")
+                return True
+
+        return self.complete_token(event_data)
 
     def get_event_handlers(self):
         """
@@ -286,9 +485,11 @@ class ConversationEngine(EventActor):
         """
         return {
             "HUMAN_DETECTED": self.conversation_cycle,
-            "CONVERSATION_ACTION_FINISHED": self.next_action,
+            "CONVERSATION_ACTION_FINISHED": self.action_finished,
             "STT_FINISHED": self.set_inference_output,
+            "TTS_FINISHED": self.set_tts_audio,
             "BOT_FINISHED": self.set_bot_response,
+            "BOT_STREAM_FINISHED": self.set_streamed_bot_response,
             "OVERRIDE_COMMAND_FOUND": self.activate_command_system,
             "DE_OVERRIDE_COMMAND_FOUND": self.de_activate_command_system,
             "COMMAND_FOUND": self.set_command,
@@ -299,4 +500,4 @@ class ConversationEngine(EventActor):
         This method returns a list of event types that this consumer can consume.
         :return:
         """
-        return [DetectEvent, ConversationDoneEvent, STTDoneEvent, BotDoneEvent, CommandCheckDoneEvent]
+        return [DetectEvent, ConversationDoneEvent, STTDoneEvent, TTSDoneEvent, BotDoneEvent, CommandCheckDoneEvent]
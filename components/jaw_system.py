@@ -1,14 +1,19 @@
 import logging
+import queue
 import time
-from threading import Thread
+from threading import Thread, Event
 
 import numpy as np
 
-from EventHive.event_hive_runner import EventActor
 from components.audio_system import audio_engine_access
 from config.audio_config import loopback_name, microphone_name
-from config.custom_events import MovementEvent, ConversationDoneEvent
+from config.custom_events import MovementEvent
+from config.head_config import jaw_sync_mode, jaw_track_frame_ms, jaw_min_rms, jaw_max_rms
 from hardware.jaw_controller import JawController
+from utils.audio_buffer import AudioBuffer
+from utils.audio_features import EnvelopeFeatures
+from utils.event_dispatch import EventActor
+from utils.jaw_track import buffer_jaw_track
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +23,9 @@ class JawMovementHandler:
     def start_movement(self, event_type=None, event_data=None):
         raise NotImplementedError
 
+    def start_stream_movement(self, audio_buffers):
+        raise NotImplementedError
+
 
 # Implement the real jaw movement handling
 class RealJawMovementHandler(JawMovementHandler):
@@ -27,6 +35,9 @@ class RealJawMovementHandler(JawMovementHandler):
     def start_movement(self, event_type=None, event_data=None):
         self.audio_jaw_sync.audio_to_jaw_movement(event_type=None, event_data=event_data)
 
+    def start_stream_movement(self, audio_buffers):
+        self.audio_jaw_sync.stream_to_jaw_movement(audio_buffers)
+
 
 # Implement the test jaw movement handling
 class TestJawMovementHandler(JawMovementHandler):
@@ -36,26 +47,36 @@ class TestJawMovementHandler(JawMovementHandler):
     def start_movement(self, event_type=None, event_data=None):
         logger.debug("Jaw Audio Test Mode - No actual movement")
         # todo: move this produce event into main class?
-        self.audio_jaw_sync.produce_event(ConversationDoneEvent(["CONVERSATION_ACTION_FINISHED"], 1))
+        self.audio_jaw_sync.finish_action(1)
 
         return True
 
+    def start_stream_movement(self, audio_buffers):
+        for _ in audio_buffers:
+            logger.debug("Jaw Audio Test Mode - No actual movement for streamed audio")
+
 
 class AudioJawSync(EventActor):
     def __init__(self, event_queue, test_mode=True):
         super().__init__(event_queue)
         self.servo_controller = JawController()
+        self.servo_controller.start()
         self.path = audio_engine_access().path
         audio_engine_access().set_microphone_name(mic_key="USB Microphone", mic_name=microphone_name)
-        audio_engine_access().set_microphone_name(mic_key="Loopback", mic_name=loopback_name)
+        if jaw_sync_mode == "loopback":
+            audio_engine_access().set_microphone_name(mic_key="Loopback", mic_name=loopback_name)
+        elif jaw_sync_mode != "track":
+            raise ValueError(f'Invalid jaw_sync_mode: {jaw_sync_mode}')
         self.analyzing = False
+        self.stream_chunks = queue.Queue()
 
         self.hw_accel = False
 
         self.seconds_to_analyze = 30
 
-        self.max_rms = 50  # Set the maximum RMS value to 50
-        self.min_rms = 15  # Set the minimum RMS value to 15
+        self.max_rms = jaw_max_rms
+        self.min_rms = jaw_min_rms
+        self.envelope_features = EnvelopeFeatures(audio_engine_access().microphones["USB Microphone"]["CHUNK"])
 
         # Normalize RMS value to desired pulse width range (25 to 75)
         self.min_pulse_width = self.servo_controller.close_pulse_width
@@ -64,6 +85,10 @@ class AudioJawSync(EventActor):
         self.jaw_movement_handler = TestJawMovementHandler(self) if test_mode else RealJawMovementHandler(self)
         logger.debug("Initialized")
 
+    def shutdown(self):
+        self.servo_controller.stop()
+        super().shutdown()
+
     def set_jaw_position(self, pulse_width, event_type=None, event_data=None):
         self.servo_controller.set_pulse_width(pulse_width)
 
@@ -73,8 +98,73 @@ class AudioJawSync(EventActor):
     def open_jaw(self, event_type=None, event_data=None):
         self.set_jaw_position(self.servo_controller.open_pulse_width)
 
+    def log_servo_writes(self):
+        logger.debug(f"Servo writes issued: {self.servo_controller.writes}, "
+                     f"suppressed: {self.servo_controller.writes_suppressed}")
+
     def calculate_rms_on_cpu(self):
-        self.rms = min(np.sqrt(np.mean(self.data ** 2)), self.max_rms)
+        self.rms = min(self.envelope_features.rms(self.data), self.max_rms)
+
+    def pulse_widths_for_rms(self, rms, min_rms, max_rms):
+        """
+        Normalize RMS values to the pulse width range, the jaw is closed at or below min_rms.
+        :param rms: numpy array of RMS values
+        :param min_rms:
+        :param max_rms:
+        :return:
+        """
+        normalized_rms = np.minimum(rms, max_rms) / max_rms
+        pulse_widths = (normalized_rms * (self.max_pulse_width - self.min_pulse_width)) + self.min_pulse_width
+        return np.where(rms > min_rms, pulse_widths, self.min_pulse_width)
+
+    def replay_jaw_track(self, pulse_widths, done):
+        """
+        Move the jaw through the pulse widths of a jaw track, following the playback clock of the audio engine. Frames
+        whose time has passed while the replay was held up are skipped, so the jaw keeps up with the audio.
+        :param pulse_widths:
+        :param done: set when playback has finished
+        :return:
+        """
+        frame_seconds = jaw_track_frame_ms / 1000
+        while not done.is_set():
+            position = audio_engine_access().playback_position()
+            frame = int(position / frame_seconds)
+            if frame >= len(pulse_widths):
+                break
+
+            self.set_jaw_position(pulse_widths[frame])
+            done.wait((frame + 1) * frame_seconds - position)
+
+    def play_with_jaw_track(self, audio):
+        """
+        Play the audio while replaying its jaw track, no audio is captured or analysed live.
+        :param audio: AudioBuffer
+        :return:
+        """
+        envelope = buffer_jaw_track(audio, jaw_track_frame_ms)
+        pulse_widths = self.pulse_widths_for_rms(envelope, self.min_rms, self.max_rms)
+
+        done = Event()
+        replay_thread = Thread(target=self.replay_jaw_track, args=(pulse_widths, done), daemon=True)
+        replay_thread.start()
+        try:
+            audio_engine_access().play_buffer(audio.samples, audio.rate)
+        finally:
+            done.set()
+            replay_thread.join()
+            self.close_jaw()
+
+    @staticmethod
+    def tts_audio(event_data):
+        """
+        The audio to play for a JAW_TTS_AUDIO event.
+        :param event_data: AudioBuffer, or the path of an audio file
+        :return: AudioBuffer
+        """
+        if isinstance(event_data, AudioBuffer):
+            return event_data
+
+        return audio_engine_access().load_audio(event_data)
 
     def activate_audio_to_jaw_movement(self, event_type=None, event_data=None):
         logger.debug("Audio to jaw movement")
@@ -83,16 +173,86 @@ class AudioJawSync(EventActor):
 
         return True
 
+    def queue_stream_chunk(self, event_type=None, event_data=None):
+        self.stream_chunks.put(event_data)
+
+        return True
+
+    def end_stream(self, event_type=None, event_data=None):
+        self.stream_chunks.put(None)
+
+        return True
+
+    def activate_stream_to_jaw_movement(self, event_type=None, event_data=None):
+        logger.debug("Streamed audio to jaw movement")
+
+        Thread(target=self.run_stream_movement, daemon=True).start()
+
+        return True
+
+    def stream_audio_buffers(self):
+        """
+        Yield the streamed TTS audio in order as it is generated, until the end of the stream.
+        :return:
+        """
+        first_chunk = True
+        while True:
+            chunk = self.stream_chunks.get()
+            if chunk is None:
+                return
+
+            audio, request_time = chunk
+            if first_chunk:
+                logger.info(f"Time to first audio: {time.time() - request_time:.2f} seconds")
+                first_chunk = False
+
+            if audio is not None:
+                yield audio
+
+    def run_stream_movement(self):
+        audio_buffers = self.stream_audio_buffers()
+        try:
+            self.jaw_movement_handler.start_stream_movement(audio_buffers)
+        except Exception:
+            logger.exception("Streamed audio to jaw movement failed")
+            # Drop the rest of the stream, otherwise it would be played ahead of the next one
+            for _ in audio_buffers:
+                pass
+        finally:
+            self.finish_action(1)
+            logger.info("Streamed audio to jaw movement finished")
+            self.log_servo_writes()
+
+    def stream_to_jaw_movement(self, audio_buffers):
+        logger.info("Playing streamed audio and moving jaw in sync with audio")
+
+        if jaw_sync_mode == "track":
+            for audio in audio_buffers:
+                self.play_with_jaw_track(audio)
+            return
+
+        # One analysis thread covers the whole stream, so the loopback stream stays open between sentences
+        audio_analysis_thread = Thread(target=self.analyze_audio, args=("Loopback",), daemon=True)
+        self.analyzing = True
+        audio_analysis_thread.start()
+
+        try:
+            for audio in audio_buffers:
+                audio_engine_access().play_buffer(audio.samples, audio.rate)
+        finally:
+            self.analyzing = False
+
     def analyze_audio(self, device="Microphone"):
         audio_engine_access().init_recording_stream(mic_key=device)
+        # Checked once rather than every chunk, the level is fixed at boot
+        debug = logger.isEnabledFor(logging.DEBUG)
 
         try:
             while self.analyzing:
                 start_time = time.time()  # Record the start time
 
                 # Read data
-                self.data = np.frombuffer(audio_engine_access().read_recording_stream(mic_key=device),
-                                          dtype=np.int16)
+                self.data = audio_engine_access().read_recording_frames(mic_key=device)
 
                 # Calculate RMS
                 self.calculate_rms_on_cpu()
@@ -104,18 +264,19 @@ class AudioJawSync(EventActor):
                     pulse_width = (normalized_rms * (
                             self.max_pulse_width - self.min_pulse_width)) + self.min_pulse_width
 
-                    logger.debug(f"RMS: {self.rms} | Pulse width: {pulse_width}")
+                    if debug:
+                        logger.debug("RMS: %s | Pulse width: %s", self.rms, pulse_width)
 
                     # Set pulse width
                     self.set_jaw_position(pulse_width)
                 else:
-                    logger.debug("RMS below threshold, closing jaw")
+                    if debug:
+                        logger.debug("RMS below threshold, closing jaw")
                     self.close_jaw()
 
-                # Print processing time
-                end_time = time.time()  # Record the end time
-                processing_time = end_time - start_time
-                logger.debug(f"Processing time: {processing_time:.6f} seconds")
+                if debug:
+                    # Print processing time
+                    logger.debug("Processing time: %.6f seconds", time.time() - start_time)
         except Exception as e:
             logger.exception("Exception occurred during audio analysis: " + str(e))
         finally:
@@ -133,31 +294,39 @@ class AudioJawSync(EventActor):
             if event_data is None:
                 # Start audio analysis in a separate thread
                 audio_analysis_thread = Thread(target=self.analyze_audio, args=("USB Microphone",), daemon=True)
+                self.analyzing = True
                 audio_analysis_thread.start()
 
-                self.analyzing = True
                 # Wait for the specified number of seconds
                 time.sleep(self.seconds_to_analyze)
                 self.analyzing = False
+            elif jaw_sync_mode == "track":
+                self.play_with_jaw_track(self.tts_audio(event_data))
             else:
                 # Start audio analysis in a separate thread
                 audio_analysis_thread = Thread(target=self.analyze_audio, args=("Loopback",), daemon=True)
+                self.analyzing = True
                 audio_analysis_thread.start()
 
-                self.analyzing = True
-                # Set and play audio file from location
-                audio_engine_access().audio_file = event_data
-                audio_engine_access().play_audio()
+                audio = self.tts_audio(event_data)
+                audio_engine_access().play_buffer(audio.samples, audio.rate)
                 self.analyzing = False
+        except Exception:
+            logger.exception("Audio to jaw movement failed")
         finally:
             self.analyzing = False
-            self.produce_event(ConversationDoneEvent(["CONVERSATION_ACTION_FINISHED"], 1))
+            self.finish_action(1)
             logger.info("Audio to jaw movement finished")
-            return True
+            self.log_servo_writes()
+
+        return True
 
     def get_event_handlers(self):
         return {
-            "JAW_TTS_AUDIO": self.activate_audio_to_jaw_movement
+            "JAW_TTS_AUDIO": self.activate_audio_to_jaw_movement,
+            "JAW_TTS_AUDIO_STREAM": self.activate_stream_to_jaw_movement,
+            "JAW_TTS_AUDIO_CHUNK": self.queue_stream_chunk,
+            "JAW_TTS_AUDIO_STREAM_END": self.end_stream,
         }
 
     def get_consumable_events(self):
@@ -1,10 +1,10 @@
 import logging
 from abc import ABC, abstractmethod
 
-from EventHive.event_hive_runner import EventActor
-from config.custom_events import HardwareEvent, ConversationDoneEvent
+from config.custom_events import HardwareEvent
 from config.hardware_control_config import shutdown_wait_seconds
 from hardware.linux_command_controller import LinuxCommandProcessor
+from utils.event_dispatch import EventActor
 
 logger = logging.getLogger(__name__)
 logger.debug("Initialized")
@@ -51,12 +51,12 @@ class PiOperations(EventActor):
 
     def shutdown(self, event_type=None, event_data=None):
         self.operation_handler.shutdown()
-        self.produce_event(ConversationDoneEvent(["CONVERSATION_ACTION_FINISHED"], 2))
+        self.finish_action(2)
         return True
 
     def reboot(self, event_type=None, event_data=None):
         self.operation_handler.reboot()
-        self.produce_event(ConversationDoneEvent(["CONVERSATION_ACTION_FINISHED"], 2))
+        self.finish_action(2)
         return True
 
     def get_event_handlers(self):
@@ -1,25 +1,66 @@
+import colorsys
 import logging
 import threading
 import time
 
 import psutil
 
-from config.resource_monitor_config import led_brightness
+from config.resource_monitor_config import led_brightness, led_frame_rate, led_sample_rate
 from hardware.inventor_hat_controller import InventorHATCoreInit
 
 logger = logging.getLogger(__name__)
 
 
+class LedFramebuffer:
+    """
+    The colour last written to each LED, so each frame only writes the LEDs that have changed, and the LEDs are only
+    shown (pushing the frame out to them) when any have.
+    """
+
+    def __init__(self, leds, num_leds):
+        self.leds = leds
+        self.pixels = [None] * num_leds
+        self.led_writes = 0
+        self.shows = 0
+
+    def render(self, pixels):
+        """
+        :param pixels: (r, g, b) of each LED, 0 to 255
+        :return: whether anything was written
+        """
+        changed = False
+        for index, rgb in enumerate(pixels):
+            if rgb != self.pixels[index]:
+                self.leds.set_rgb(index, *rgb, show=False)
+                self.pixels[index] = rgb
+                self.led_writes += 1
+                changed = True
+
+        if changed:
+            self.leds.show()
+            self.shows += 1
+
+        return changed
+
+    def clear(self):
+        self.leds.clear()
+        self.pixels = [(0, 0, 0)] * len(self.pixels)
+
+
 class LedResourceMonitor:
-    UPDATES = 50  # How many times the LEDs will be updated per second
-    UPDATE_RATE = 1 / UPDATES
-    AUTO_SHOW = False  # Update all LEDs at once after they have all been set
     INTERPOLATION_SPEED = 0.1  # Speed of interpolation (higher is faster)
     LED_BRIGHTNESS = led_brightness  # Default LED brightness (0.0 to 1.0)
 
-    def __init__(self, brightness=1.0):
+    def __init__(self, brightness=1.0, frame_rate=led_frame_rate, sample_rate=led_sample_rate):
+        self.frame_interval = 1 / frame_rate
+        self.sample_interval = 1 / sample_rate
         self.current_mem_percentage = 0.0
         self.current_cpu_percentage = 0.0
+        self.target_mem_percentage = 0.0
+        self.target_cpu_percentage = 0.0
+        self.frames = 0
+        self.start_time = None
+        self.framebuffer = LedFramebuffer(InventorHATCoreInit.leds, InventorHATCoreInit.num_leds)
         self.stop_event = threading.Event()
         self.thread = threading.Thread(target=self.update_leds)
         self.set_brightness(brightness)  # Set the initial brightness
@@ -30,46 +71,63 @@ class LedResourceMonitor:
         """Set the brightness level for the LEDs."""
         self.LED_BRIGHTNESS = max(0.0, min(1.0, brightness))  # Clamp value between 0.0 and 1.0
 
-    def sleep_until(self, end_time):
-        time_to_sleep = end_time - time.monotonic()
-        if time_to_sleep > 0.0:
-            time.sleep(time_to_sleep)
+    def sample(self):
+        """
+        Sample CPU and memory use. The CPU use is the average since the previous sample, so nothing blocks waiting for
+        it to be measured.
+        :return:
+        """
+        self.target_mem_percentage = psutil.virtual_memory().percent / 100.0
+        self.target_cpu_percentage = psutil.cpu_percent(interval=None) / 100.0
+
+    def frame(self):
+        """
+        Ease towards the latest sample and work out the colour of each LED, memory use sets how many are lit and CPU
+        use their hue, from green to red.
+        :return: (r, g, b) of each LED, 0 to 255
+        """
+        self.current_mem_percentage += (self.target_mem_percentage - self.current_mem_percentage) * \
+            self.INTERPOLATION_SPEED
+        self.current_cpu_percentage += (self.target_cpu_percentage - self.current_cpu_percentage) * \
+            self.INTERPOLATION_SPEED
+
+        hue = 0.33 * (1.0 - self.current_cpu_percentage)
+        lit = tuple(round(channel * 255) for channel in colorsys.hsv_to_rgb(
+            hue, 1.0, self.LED_BRIGHTNESS * self.current_mem_percentage))
+
+        num_leds = InventorHATCoreInit.num_leds
+        return [lit if float(i) / num_leds <= self.current_mem_percentage else (0, 0, 0) for i in range(num_leds)]
 
     def update_leds(self):
         logger.debug("LED update thread started.")
+        psutil.cpu_percent(interval=None)  # The first call only starts the measurement
+        next_sample = time.monotonic()
+        next_frame = next_sample
         while not self.stop_event.is_set():
-            start_time = time.monotonic()
-
-            mem_info = psutil.virtual_memory()
-            target_mem_percentage = mem_info.percent / 100.0
-            self.current_mem_percentage += (
-                                                   target_mem_percentage - self.current_mem_percentage) * self.INTERPOLATION_SPEED
-
-            target_cpu_percentage = psutil.cpu_percent(interval=0.1) / 100.0
-            self.current_cpu_percentage += (
-                                                   target_cpu_percentage - self.current_cpu_percentage) * self.INTERPOLATION_SPEED
-
-            hue = 0.33 * (1.0 - self.current_cpu_percentage)
-
-            # todo: find out why the LED_BRIGHTNESS is not working on the inventor HAT
-            for i in range(InventorHATCoreInit.num_leds):
-                if float(i) / InventorHATCoreInit.num_leds <= self.current_mem_percentage:
-                    InventorHATCoreInit.leds.set_hsv(i, hue, 1.0, self.LED_BRIGHTNESS * self.current_mem_percentage,
-                                                     show=self.AUTO_SHOW)
-                else:
-                    InventorHATCoreInit.leds.set_hsv(i, 0, 0, 0, self.LED_BRIGHTNESS)
+            now = time.monotonic()
+            if now >= next_sample:
+                self.sample()
+                next_sample = now + self.sample_interval
 
-            if not self.AUTO_SHOW:
-                InventorHATCoreInit.leds.show()
+            self.framebuffer.render(self.frame())
+            self.frames += 1
 
-            self.sleep_until(start_time + self.UPDATE_RATE)
+            next_frame += self.frame_interval
+            if next_frame < now:
+                # Fell behind, so skip the missed frames rather than rushing to catch up
+                next_frame = now + self.frame_interval
+            self.stop_event.wait(max(0.0, next_frame - time.monotonic()))
 
     def start(self):
+        self.start_time = time.monotonic()
         self.thread.start()
         logger.debug("LED Resource Monitor started.")
 
     def stop(self):
         self.stop_event.set()
         self.thread.join()
-        InventorHATCoreInit.leds.clear()
-        logger.debug("LED Resource Monitor stopped.")
+        self.framebuffer.clear()
+        elapsed = time.monotonic() - self.start_time
+        logger.debug(f"LED Resource Monitor stopped. {self.frames / elapsed:.1f} frames/s, "
+                     f"{self.framebuffer.led_writes / elapsed:.1f} LED writes/s, "
+                     f"{self.framebuffer.shows / elapsed:.1f} shows/s")
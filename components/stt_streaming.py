@@ -0,0 +1,206 @@
+import logging
+import re
+from threading import Condition, Thread
+
+import numpy as np
+
+from utils.audio_buffer import AudioBuffer
+
+logger = logging.getLogger(__name__)
+
+whisper_sample_rate = 16000
+
+
+def whisper_input(audio):
+    """
+    Convert audio to the mono float32 16kHz samples Whisper transcribes.
+    :param audio: AudioBuffer
+    :return:
+    """
+    samples = audio.mono().astype(np.float32) / 32768
+    if audio.rate != whisper_sample_rate:
+        from scipy.signal import resample_poly
+
+        samples = resample_poly(samples, whisper_sample_rate, audio.rate).astype(np.float32)
+    return samples
+
+
+def normalize_word(word):
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+class StreamingTranscriber:
+    """
+    Transcribes speech with Whisper while it is still being recorded. Every step the audio not yet committed is
+    transcribed again; the words at the start that two transcriptions in a row agree on are committed, as they will not
+    change with more audio, and the audio up to the end of the last committed word is dropped. So each transcription
+    only covers the last few words, and only a short tail is left to transcribe once the speaker stops.
+    Once started, the transcriptions run on a worker thread and add_audio only copies the samples into the window, so
+    the recording is never held up by Whisper. Steps of audio added while a transcription runs are covered by the next
+    one, which takes the newest window.
+    """
+
+    def __init__(self, model, rate, step_seconds=1.0, max_window_seconds=15.0):
+        """
+        :param model: loaded Whisper model
+        :param rate: sample rate of the audio added
+        :param step_seconds: seconds of new audio between transcriptions
+        :param max_window_seconds: once the uncommitted audio is this long, everything transcribed so far is committed
+        """
+        self.model = model
+        self.rate = rate
+        self.step_frames = int(step_seconds * rate)
+        self.max_window_frames = int(max_window_seconds * rate)
+
+        # The uncommitted audio is the first window_frames of the buffer, it is only reallocated if it fills up
+        self.buffer = np.zeros(self.max_window_frames + 4 * self.step_frames, dtype=np.int16)
+        self.window_frames = 0
+        # Seconds of audio dropped so far, to give committed words their time in the whole recording
+        self.offset = 0.0
+        self.new_frames = 0
+        self.previous = []
+        # (word, end time in seconds) of every committed word
+        self.committed = []
+
+        self.condition = Condition()
+        self.worker = None
+        self.finished = False
+
+    def start(self):
+        """
+        Transcribe on a worker thread from now on, until finish or close.
+        :return:
+        """
+        self.worker = Thread(target=self.run, daemon=True)
+        self.worker.start()
+
+    def run(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.new_frames >= self.step_frames or self.finished)
+                if self.finished:
+                    return
+            self.step()
+
+    def close(self):
+        """
+        Stop the worker thread, once the transcription it is running has finished.
+        :return:
+        """
+        with self.condition:
+            self.finished = True
+            self.condition.notify()
+        if self.worker is not None:
+            self.worker.join()
+            self.worker = None
+
+    def transcribe(self, samples):
+        """
+        Transcribe uncommitted audio.
+        :param samples: int16 samples from the start of the uncommitted audio
+        :return: list of (word, end time in seconds from the start of the uncommitted audio)
+        """
+        prompt = " ".join(word for word, _ in self.committed[-20:]) or None
+        result = self.model.transcribe(whisper_input(AudioBuffer(samples, self.rate)), fp16=False,
+                                       word_timestamps=True, initial_prompt=prompt,
+                                       condition_on_previous_text=False)
+        return [(word["word"].strip(), word["end"]) for segment in result["segments"]
+                for word in segment.get("words", []) if word["word"].strip()]
+
+    def commit(self, words, transcribed_frames):
+        """
+        Commit words and drop the audio up to the end of the last one.
+        :param words: list of (word, end time in seconds from the start of the uncommitted audio)
+        :param transcribed_frames: frames of uncommitted audio the words were transcribed from
+        :return: the words committed
+        """
+        if not words:
+            return []
+
+        end = words[-1][1]
+        self.committed.extend((word, self.offset + word_end) for word, word_end in words)
+        self.drop(min(int(end * self.rate), transcribed_frames))
+
+        return [word for word, _ in words]
+
+    def drop(self, frames):
+        """
+        Drop audio from the start of the uncommitted audio.
+        :param frames:
+        :return:
+        """
+        with self.condition:
+            # Only the transcriptions drop audio, so the audio added since the last one is all after the cut
+            remaining = self.window_frames - frames
+            self.buffer[:remaining] = self.buffer[frames:self.window_frames]
+            self.window_frames = remaining
+        self.offset += frames / self.rate
+
+    def add_audio(self, samples):
+        """
+        Add recorded audio, waking the worker once a step of new audio has been added.
+        :param samples: int16 samples
+        :return: True once a step of new audio is waiting to be transcribed
+        """
+        with self.condition:
+            end = self.window_frames + len(samples)
+            if end > len(self.buffer):
+                # Only when transcribing falls well behind the speech
+                self.buffer = np.concatenate((self.buffer[:self.window_frames], np.zeros(
+                    max(end, 2 * len(self.buffer)) - self.window_frames, dtype=np.int16)))
+            self.buffer[self.window_frames:end] = samples
+            self.window_frames = end
+
+            self.new_frames += len(samples)
+            if self.new_frames < self.step_frames:
+                return False
+            self.condition.notify()
+            return True
+
+    def step(self):
+        """
+        Transcribe the newest window of uncommitted audio, committing the words at its start that the previous
+        transcription agreed on.
+        :return: the words committed
+        """
+        with self.condition:
+            self.new_frames = 0
+            window = self.buffer[:self.window_frames].copy()
+
+        hypothesis = self.transcribe(window)
+        if len(window) >= self.max_window_frames:
+            # Nothing has been agreed for too long, so take the latest transcription rather than let the window grow
+            self.previous = []
+            if not hypothesis:
+                # Nothing was said, so none of it needs transcribing again
+                self.drop(len(window))
+            return self.commit(hypothesis, len(window))
+
+        agreed = 0
+        for (word, _), (previous_word, _) in zip(hypothesis, self.previous):
+            if normalize_word(word) != normalize_word(previous_word):
+                break
+            agreed += 1
+
+        words = hypothesis[:agreed]
+        # The rest of the hypothesis is compared with the next one, with its times moved to after the dropped audio
+        shift = words[-1][1] if words else 0.0
+        self.previous = [(word, end - shift) for word, end in hypothesis[agreed:]]
+        committed = self.commit(words, len(window))
+        if committed:
+            logger.debug(f"Committed: {' '.join(committed)}")
+
+        return committed
+
+    def finish(self):
+        """
+        Transcribe the remaining audio once the speaker has stopped.
+        :return: the full transcript
+        """
+        self.close()
+        if self.window_frames > 0:
+            window = self.buffer[:self.window_frames].copy()
+            self.commit(self.transcribe(window), len(window))
+            self.window_frames = 0
+
+        return " ".join(word for word, _ in self.committed)
@@ -1,16 +1,20 @@
 import logging
+import time
 from itertools import cycle
-from time import sleep
 
-from better_profanity import profanity
+import numpy as np
 
-from EventHive.event_hive_runner import EventActor
-from Lakul.integrate_stt import SpeechtoTextHandler
+from components.audio_system import audio_engine_access
+from components.stt_streaming import StreamingTranscriber, whisper_input, whisper_sample_rate
 from config.audio_config import microphone_name
 from config.command_config import override_word, de_override_word
-from config.custom_events import STTEvent, STTDoneEvent, ConversationDoneEvent
+from config.custom_events import STTEvent, STTDoneEvent
 from config.stt_config import (profanity_censor_enabled, offline_mode, model_size, stt_audio_path,
-                               recording_max_seconds, recording_silence_threshold, recording_silence_duration)
+                               recording_max_seconds, recording_silence_threshold, recording_silence_duration,
+                               stt_shared_capture, stt_in_memory, stt_streaming, stt_stream_step_seconds,
+                               stt_stream_max_window_seconds, stt_stream_silence_duration)
+from utils.event_dispatch import EventActor
+from utils.model_manager import model_manager_access
 
 logger = logging.getLogger(__name__)
 logger.debug("Initialized")
@@ -28,17 +32,107 @@ class STTHandlerInterface:
 # Implement the real STT operation handling
 class RealSTTHandler(STTHandlerInterface):
     def __init__(self):
-        self.STT_handler = SpeechtoTextHandler(stt_microphone_name=microphone_name, stt_audio_file=stt_audio_path,
-                                               stt_offline_mode=offline_mode, stt_model_size=model_size,
-                                               init_on_launch=False, custom_name="Real STT")
-        self.STT_handler.init_models()
+        self.mic_key = "STT_MIC"
+        if stt_shared_capture:
+            audio_engine_access().set_microphone_name(self.mic_key, microphone_name)
+
+        self.recording = None
+        self.transcriber = None
+        self.model = None
+        if stt_shared_capture and stt_in_memory and offline_mode:
+            # The recording never leaves memory, so Lakul (which transcribes from a file) is not needed
+            self.model_name = "whisper"
+            model_manager_access().register(self.model_name, self.load_whisper, warm_up=self.warm_up_whisper)
+        else:
+            self.model_name = "lakul_stt"
+            model_manager_access().register(self.model_name, self.load_lakul)
+
+    @staticmethod
+    def load_whisper():
+        # Whisper pulls in torch, so it is only imported when the model is loaded
+        import whisper
+
+        return whisper.load_model(model_size)
+
+    @staticmethod
+    def load_lakul():
+        from Lakul.integrate_stt import SpeechtoTextHandler
+
+        stt_handler = SpeechtoTextHandler(stt_microphone_name=microphone_name, stt_audio_file=stt_audio_path,
+                                          stt_offline_mode=offline_mode, stt_model_size=model_size,
+                                          init_on_launch=False, custom_name="Real STT")
+        stt_handler.init_models()
+        return stt_handler
+
+    @staticmethod
+    def warm_up_whisper(model):
+        model.transcribe(np.zeros(whisper_sample_rate, dtype=np.float32), fp16=False)
 
     def initiate_recording(self, max_seconds=recording_max_seconds, silence_threshold=recording_silence_threshold,
                            silence_duration=recording_silence_duration):
-        self.STT_handler.initiate_recording(max_seconds, silence_threshold, silence_duration)
+        # The model is held from the start of the recording until it is transcribed, so it cannot be unloaded between
+        self.model = model_manager_access().acquire(self.model_name)
+        try:
+            self.record(max_seconds, silence_threshold, silence_duration)
+        except Exception:
+            self.release_model()
+            raise
+
+    def record(self, max_seconds, silence_threshold, silence_duration):
+        if self.model_name == "whisper" and stt_streaming:
+            self.stream_recording(max_seconds, silence_threshold)
+        elif self.model_name == "whisper":
+            self.recording = audio_engine_access().record_until_silence(self.mic_key, max_seconds, silence_threshold,
+                                                                        silence_duration)
+        elif stt_shared_capture:
+            # Record from the shared capture stream into the file Lakul transcribes, so the mic is never opened twice
+            audio_engine_access().record_until_silence(self.mic_key, max_seconds, silence_threshold, silence_duration,
+                                                       audio_file=stt_audio_path)
+        else:
+            self.model.initiate_recording(max_seconds, silence_threshold, silence_duration)
+
+    def stream_recording(self, max_seconds, silence_threshold):
+        """
+        Record until silence, transcribing the speech as it is recorded.
+        :param max_seconds:
+        :param silence_threshold:
+        :return:
+        """
+        engine = audio_engine_access()
+        self.transcriber = StreamingTranscriber(self.model, engine.microphones[self.mic_key]['RATE'],
+                                                step_seconds=stt_stream_step_seconds,
+                                                max_window_seconds=stt_stream_max_window_seconds)
+        # Whisper runs on the transcriber's worker thread, the recording only hands it the audio
+        self.transcriber.start()
+        try:
+            self.recording = engine.record_until_silence(self.mic_key, max_seconds, silence_threshold,
+                                                         stt_stream_silence_duration,
+                                                         on_chunk=self.transcriber.add_audio)
+        except Exception:
+            self.transcriber.close()
+            self.transcriber = None
+            raise
+
+    def release_model(self):
+        self.model = None
+        model_manager_access().release(self.model_name)
 
     def run_inference(self):
-        return self.STT_handler.run_inference()
+        try:
+            return self.transcribe()
+        finally:
+            self.release_model()
+
+    def transcribe(self):
+        if self.transcriber is not None:
+            start_time = time.time()
+            transcript = self.transcriber.finish()
+            logger.debug(f"Finished streaming transcript {time.time() - start_time:.2f} seconds after recording")
+            self.transcriber = None
+            return transcript
+        if self.model_name == "whisper":
+            return self.model.transcribe(whisper_input(self.recording), fp16=False)["text"].strip()
+        return self.model.run_inference()
 
 
 # Implement the test STT operation handling
@@ -66,6 +160,10 @@ class STTOperations(EventActor):
     def __init__(self, event_queue, test_mode=True):
         super().__init__(event_queue)
         self.profanity_censor_enabled = profanity_censor_enabled
+        self.profanity = None
+        if self.profanity_censor_enabled:
+            from better_profanity import profanity
+            self.profanity = profanity
         self.STT_handler = TestSTTHandler() if test_mode else RealSTTHandler()
 
     def run_inference(self):
@@ -73,17 +171,22 @@ class STTOperations(EventActor):
         logger.debug(f"Unfiltered inference output: {inference_output}")
 
         if self.profanity_censor_enabled:
-            inference_output = profanity.censor(inference_output, '-')
+            inference_output = self.profanity.censor(inference_output, '-')
 
         logger.debug(f"Finished inferencing, output: {inference_output}")
 
         self.produce_event(STTDoneEvent(["STT_FINISHED", inference_output], 1))
-        sleep(1)
 
     def record_and_infer(self, event_type=None, event_data=None):
-        self.STT_handler.initiate_recording()
-        self.run_inference()
-        self.produce_event(ConversationDoneEvent(["CONVERSATION_ACTION_FINISHED"], 2))
+        try:
+            self.STT_handler.initiate_recording()
+            self.run_inference()
+        except Exception as e:
+            # Nothing heard restarts the conversation, rather than leaving it waiting for a transcript that never comes
+            logger.exception(f"Speech to text failed: {e}")
+            self.produce_event(STTDoneEvent(["STT_FINISHED", ""], 1))
+        finally:
+            self.finish_action(2)
         return True
 
     def get_event_handlers(self):
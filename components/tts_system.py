@@ -2,122 +2,289 @@ import importlib
 import logging
 import os
 import sys
+import time
 from abc import ABC, abstractmethod
+from pathlib import Path
 
-import pyttsx3
-import soundfile as sf
-from dotenv import load_dotenv
-from fakeyou.fakeyou import FakeYou
-from openai import OpenAI
+import numpy as np
 
-load_dotenv()
-
-open_ai_api_key = os.getenv("OPENAI_API_KEY")
-
-from EventHive.event_hive_runner import EventActor
-from components.fakeyou_api import username, password, voice_model
-from config.custom_events import TTSEvent, ConversationDoneEvent
+from config.custom_events import TTSEvent, TTSDoneEvent, MovementEvent
+from config.head_config import jaw_sync_mode, jaw_track_frame_ms
 from config.tts_config import (tts_mode, nix_dir, audio_dir, file_name, stoch_model_path, pyttsx3_voice, openai_model,
-                               openai_voice)
+                               openai_voice, tts_cache_enabled, tts_cache_dir, tts_cache_max_mb, cached_phrases,
+                               tts_stream_min_chunk_length, tts_stream_file_prefix, tts_save_audio_files,
+                               tts_scratch_dir)
+from utils.audio_buffer import AudioBuffer
+from utils.event_dispatch import EventActor
+from utils.jaw_track import buffer_jaw_track
+from utils.model_manager import model_manager_access
+from utils.string_ops import split_sentences
+from utils.tts_cache import TTSCache
 
 sys.path.append(nix_dir)
 
+# The TTS engines import their libraries when they are created, so only the selected engine's libraries are loaded
+
 logger = logging.getLogger(__name__)
 
 
 class AbstractTTSOperations(ABC):
+    # Identifies the voice/model in the TTS cache key, so changing voice does not reuse old audio
+    cache_voice = None
+
     @abstractmethod
-    def generate_tts(self, text_input):
+    def generate_tts(self, text_input, filename=None):
         pass
 
+    def generate_buffer(self, text_input):
+        """
+        Generate the TTS into memory, engines that can only write files write to the scratch directory and the file is
+        read back.
+        :param text_input:
+        :return: AudioBuffer
+        """
+        scratch_file = f'{tts_scratch_dir}/{file_name}'
+        self.generate_tts(text_input, scratch_file)
+        return AudioBuffer.from_file(scratch_file)
+
 
 class TTSOperationsNix(AbstractTTSOperations):
     def __init__(self):
         self.filename = f'{audio_dir}/{file_name}'
         self.sampling_frequency = 22050
+        self.cache_voice = Path(stoch_model_path).name
+        model_manager_access().register("nix_tts", self.load_model, warm_up=self.warm_up)
+
+    @staticmethod
+    def load_model():
         mod = importlib.import_module('nix-tts.nix.models.TTS')
         klass = getattr(mod, 'NixTTSInference')
-        self.nix_tts = klass(model_dir=stoch_model_path)
+        return klass(model_dir=stoch_model_path)
 
-    def generate_tts(self, text_input):
-        c, c_length, phoneme = self.nix_tts.tokenize(text_input)
-        xw = self.nix_tts.vocalize(c, c_length)
-        sf.write(self.filename, xw[0, 0], self.sampling_frequency)
+    @staticmethod
+    def vocalize(nix_tts, text_input):
+        c, c_length, phoneme = nix_tts.tokenize(text_input)
+        return nix_tts.vocalize(c, c_length)
+
+    def warm_up(self, nix_tts):
+        self.vocalize(nix_tts, "Hello.")
+
+    def generate_tts(self, text_input, filename=None):
+        self.generate_buffer(text_input).to_file(filename or self.filename)
+
+    def generate_buffer(self, text_input):
+        with model_manager_access().use("nix_tts") as nix_tts:
+            xw = self.vocalize(nix_tts, text_input)
+        return AudioBuffer.from_float(xw[0, 0], self.sampling_frequency)
 
 
 class TTSOperationsOpenAI(AbstractTTSOperations):
     def __init__(self):
+        from dotenv import load_dotenv
+        from openai import OpenAI
+
+        load_dotenv()
         self.client = OpenAI(
-            api_key=open_ai_api_key,
+            api_key=os.getenv("OPENAI_API_KEY"),
         )
         self.filename = f'{audio_dir}/{file_name}'
+        self.cache_voice = f"{openai_model}-{openai_voice}"
+
+    def generate_tts(self, text_input, filename=None):
+        response = self.client.audio.speech.create(
+            model=openai_model,
+            voice=openai_voice,
+            input=text_input,
+        )
+        response.stream_to_file(filename or self.filename)
 
-    def generate_tts(self, text_input):
+    def generate_buffer(self, text_input):
+        # Raw PCM is 24kHz 16-bit mono, so it needs no decoding
         response = self.client.audio.speech.create(
             model=openai_model,
             voice=openai_voice,
             input=text_input,
+            response_format="pcm",
         )
-        response.stream_to_file(self.filename)
+        return AudioBuffer(np.frombuffer(response.content, dtype=np.int16), 24000)
 
 
 class TTSOperationsFakeYou(AbstractTTSOperations):
     def __init__(self):
+        from components.fakeyou_api import username, password, voice_model
+        from fakeyou.fakeyou import FakeYou
+
         self.tts_runner = FakeYou()
         self.tts_runner.login(username, password)
         self.filename = f'{audio_dir}/{file_name}'
+        self.voice_model = voice_model
+        self.cache_voice = voice_model
 
-    def generate_tts(self, text_input):
-        output = self.tts_runner.say(text_input, voice_model)
-        output.save(self.filename)
+    def generate_tts(self, text_input, filename=None):
+        output = self.tts_runner.say(text_input, self.voice_model)
+        output.save(filename or self.filename)
 
 
 class TTSOperationsPyTTSx3(AbstractTTSOperations):
     # todo: seems this can be buggy on repeat runs, may need to investigate, remove or find a workaround
     def __init__(self):
+        import pyttsx3
+
         self.engine = pyttsx3.init()
         self.voices = self.engine.getProperty('voices')
         self.engine.setProperty('voice', self.voices[pyttsx3_voice].id)
         self.filename = f'{audio_dir}/{file_name}'
+        self.cache_voice = self.voices[pyttsx3_voice].id
 
-    def generate_tts(self, text_input):
-        self.engine.save_to_file(text_input, self.filename)
+    def generate_tts(self, text_input, filename=None):
+        self.engine.save_to_file(text_input, filename or self.filename)
         self.engine.runAndWait()
 
 
 class TestTTSHandler(AbstractTTSOperations):
-    def generate_tts(self, text_input):
+    def generate_tts(self, text_input, filename=None):
         logger.debug("Test mode: Skipping actual TTS generation")
 
+    def generate_buffer(self, text_input):
+        self.generate_tts(text_input)
+        return None
+
+
+tts_class_map = {
+    'nix': TTSOperationsNix,
+    'fakeyou': TTSOperationsFakeYou,
+    'pyttsx3': TTSOperationsPyTTSx3,
+    'openai': TTSOperationsOpenAI,
+    'test': TestTTSHandler  # Handling test mode
+}
+
+
+def create_tts_cache(tts):
+    """
+    Create the TTS cache for the given TTS backend.
+    :param tts:
+    :return:
+    """
+    return TTSCache(tts_cache_dir, engine=tts_mode, voice=tts.cache_voice, max_bytes=tts_cache_max_mb * 1024 * 1024)
+
 
 class TTSOperations(EventActor):
     def __init__(self, event_queue, test_mode=True):
         super().__init__(event_queue)
         self.filename = f'{audio_dir}/{file_name}'
 
-        tts_class_map = {
-            'nix': TTSOperationsNix,
-            'fakeyou': TTSOperationsFakeYou,
-            'pyttsx3': TTSOperationsPyTTSx3,
-            'openai': TTSOperationsOpenAI,
-            'test': TestTTSHandler  # Handling test mode
-        }
-
-        self.tts = tts_class_map.get('test')() if test_mode else tts_class_map.get(tts_mode)()
-        if self.tts is None:
+        tts_class = tts_class_map.get('test') if test_mode else tts_class_map.get(tts_mode)
+        if tts_class is None:
             raise ValueError(f'Invalid tts_mode: {tts_mode}')
-        logger.debug(f"Initialized with TTS mode: {self.tts.__class__.__name__}")
+        self.tts = tts_class()
+
+        self.stream_index = 0
+        self.stream_request_time = time.time()
+
+        # Test mode does not generate any audio, so there is nothing to cache
+        self.tts_cache = create_tts_cache(self.tts) if tts_cache_enabled and not test_mode else None
+        # The jaw track is computed straight after synthesis, so it is cached with the audio
+        self.precompute_jaw_track = jaw_sync_mode == "track" and not test_mode
+        logger.debug(f"Initialized with TTS mode: {self.tts.__class__.__name__}, cache: {self.tts_cache is not None}")
+
+    def synthesize(self, text, filename):
+        """
+        Generate the TTS for the text into memory, loading it from the cache where possible.
+        :param text:
+        :param filename: where the audio is saved if tts_save_audio_files is on
+        :return: AudioBuffer, or None in test mode
+        """
+        audio = self.tts_cache.load(text) if self.tts_cache is not None else None
+        if audio is not None:
+            logger.info(f"TTS for: {text} loaded from cache")
+        else:
+            logger.info(f"Generating TTS with text: {text} using tts_mode: {tts_mode}")
+            audio = self.tts.generate_buffer(text)
+            if audio is None:
+                return None
+
+            logger.info(f"TTS generated, {audio.duration:.2f} seconds of audio")
+            if self.precompute_jaw_track:
+                buffer_jaw_track(audio, jaw_track_frame_ms)
+            if self.tts_cache is not None:
+                self.tts_cache.store(text, audio, pinned=text in cached_phrases)
+
+        if tts_save_audio_files:
+            audio.to_file(filename)
+
+        return audio
 
     def generate_tts(self, event_type=None, event_data=None):
-        logger.info(f"Generating TTS with event data: {event_data} using tts_mode: {tts_mode}")
-        self.tts.generate_tts(event_data)
-        logger.info(f"TTS generated and saved to: {self.filename}")
-        self.produce_event(ConversationDoneEvent(["CONVERSATION_ACTION_FINISHED"], 1))
+        audio = self.synthesize(event_data, self.filename)
+        # The conversation engine hands the audio to the jaw system to play
+        self.produce_event(TTSDoneEvent(["TTS_FINISHED", audio], 1))
+        self.finish_action(1)
+        return True
+
+    def stream_tts(self, event_type=None, event_data=None):
+        """
+        Generate the TTS sentence by sentence, handing each one to the jaw system for playback as soon as it is ready,
+        so later sentences are generated while the earlier ones are being played.
+        :param event_type:
+        :param event_data:
+        :return:
+        """
+        self.start_tts_stream()
+        chunks = split_sentences(event_data, min_length=tts_stream_min_chunk_length)
+        logger.info(f"Streaming TTS in {len(chunks)} chunks with event data: {event_data} using tts_mode: {tts_mode}")
+
+        for index, chunk in enumerate(chunks):
+            self.queue_tts_phrase(event_data=chunk)
+
+            if index == 0:
+                # The first audio is ready, so the conversation can move on to playback while the rest is generated,
+                # the audio goes to the jaw system with the stream rather than through the conversation engine
+                self.produce_event(TTSDoneEvent(["TTS_FINISHED", None], 1))
+                self.finish_action(1)
+
+        self.end_tts_stream()
+
+        if not chunks:
+            self.produce_event(TTSDoneEvent(["TTS_FINISHED", None], 1))
+            self.finish_action(1)
+
+        return True
+
+    def start_tts_stream(self, event_type=None, event_data=None):
+        self.stream_index = 0
+        self.stream_request_time = time.time()
+
+        return True
+
+    def queue_tts_phrase(self, event_type=None, event_data=None):
+        """
+        Generate the TTS for one phrase of a stream and hand it to the jaw system for playback.
+        :param event_type:
+        :param event_data:
+        :return:
+        """
+        chunk_filename = f'{audio_dir}/{tts_stream_file_prefix}_{self.stream_index}.wav'
+        self.stream_index += 1
+
+        audio = self.synthesize(event_data, chunk_filename)
+        self.produce_event(MovementEvent(["JAW_TTS_AUDIO_CHUNK", [audio, self.stream_request_time]], 1))
+
+        return True
+
+    def end_tts_stream(self, event_type=None, event_data=None):
+        self.produce_event(MovementEvent(["JAW_TTS_AUDIO_STREAM_END"], 1))
+        logger.info(f"Streaming TTS of {self.stream_index} chunks generated in "
+                    f"{time.time() - self.stream_request_time:.2f} seconds")
+
         return True
 
     def get_event_handlers(self):
         return {
-            "GENERATE_TTS": self.generate_tts
+            "GENERATE_TTS": self.generate_tts,
+            "STREAM_TTS": self.stream_tts,
+            "START_TTS_STREAM": self.start_tts_stream,
+            "QUEUE_TTS_PHRASE": self.queue_tts_phrase,
+            "END_TTS_STREAM": self.end_tts_stream,
         }
 
     def get_consumable_events(self):
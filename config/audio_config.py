@@ -2,3 +2,26 @@
 microphone_name = "USB PnP Sound Device"
 loopback_name = "Loopback: PCM (hw:0,0)"
 audio_input_detection_threshold = 100
+
+# seconds of audio kept by the shared capture buffer of each microphone, readers falling further behind lose audio
+capture_buffer_seconds = 10
+
+# frames handed to the output stream per callback, smaller values start playback sooner but risk underruns
+playback_chunk = 1024
+# seconds playback may run past the length of a clip before the output stream is taken to have stalled and reopened
+playback_timeout_margin = 2
+# seconds without a clip after which the output stream stops calling back for silence, the next clip restarts it
+playback_idle_seconds = 5
+
+# voice activity detection, human presence is only detected on sustained speech-like sound above the noise floor
+voice_activity_detection = True
+vad_frame_ms = 20
+vad_window_ms = 500
+# fraction of the frames in the window that must be speech-like
+vad_speech_ratio = 0.6
+# a speech-like frame is louder than the noise floor times this ratio, and peaks above audio_input_detection_threshold
+vad_energy_ratio = 3.0
+vad_noise_floor_alpha = 0.05
+vad_zcr_range = (0.01, 0.35)
+# white noise is close to 1, voiced speech well below
+vad_max_spectral_flatness = 0.5
@@ -5,5 +5,39 @@ role = ("You are a prototype westworld host (the 2016 show), who has just been a
 chat_backend = "ollama"
 use_history = True
 
+# With use_history on, the history is kept here rather than by ChattingGPT, so both streamed and whole responses use it.
+# At most this many tokens of history (estimated at chat_history_chars_per_token characters a token) are sent with each
+# message; the most recent turns word for word, older turns summarised in up to chat_history_summary_token_budget
+chat_history_token_budget = 1024
+chat_history_summary_token_budget = 256
+# most recent turns always sent word for word, even over the budget
+chat_history_min_turns = 1
+chat_history_chars_per_token = 4
+# The history is forgotten when scan mode has been on this long before someone is detected, as the last visitor has
+# gone and someone new has arrived
+chat_history_reset_seconds = 120
+
 # only used for 'ollama' chat backend, defaulting to one of the smallest models available
 ollama_model = "westworld-prototype"
+
+# Stream the chat response token by token, speaking each phrase as soon as it is complete rather than waiting for the
+# whole response; the skull then greets on detection and answers straight after listening
+stream_chat_response = False
+# minimum number of characters in a streamed phrase sent to TTS (other than the last)
+stream_min_phrase_length = 20
+
+ollama_host = "http://localhost:11434"
+# Ollama unloads a model once it has been idle for a while (5 minutes by default), so the first response after a quiet
+# spell waits for it to load again; this is sent with every request to keep it loaded, as a duration like "30m", or -1
+# to keep it loaded for as long as Ollama runs
+ollama_keep_alive = -1
+# Load the model in the background as soon as someone is detected, so it is ready by the time they have been listened to
+ollama_warm_up_on_detection = True
+# overrides the Modelfile num_predict when streaming, as the first phrase is spoken before generation finishes
+ollama_stream_num_predict = 48
+# seconds to wait for the connection to Ollama, and for each line of its response; a model that is not loaded yet has
+# to load before the first line, so the second is generous. A reply that times out is dropped
+ollama_timeout = (5, 120)
+
+# used for streaming with the 'gpt' chat backend, and for whole responses with use_history on
+openai_chat_model = "gpt-3.5-turbo"
@@ -1,2 +1,31 @@
+from config.tts_config import shutdown_text, reboot_text, test_command_text
+
 override_word = "freeze all motor functions"
 de_override_word = "resume all motor functions"
+
+# voice commands run in command mode, with the phrases that trigger each one, the response spoken before it is run and
+# the hardware event it sends to the Pi operations system
+voice_commands = {
+    "shutdown_command": {
+        "phrases": ["shutdown", "shut down", "power off", "poweroff", "turn off"],
+        "response": shutdown_text,
+        "hardware_event": "SHUTDOWN",
+    },
+    "reboot_command": {
+        "phrases": ["restart", "reboot", "restart now", "reboot now"],
+        "response": reboot_text,
+        "hardware_event": "REBOOT",
+    },
+    "test_command": {
+        "phrases": ["test", "test command"],
+        "response": test_command_text,
+        "hardware_event": "SHUTDOWN",
+    },
+}
+
+# words that do not count against a command when said around it, e.g. "please shut down now" is still a shutdown
+command_filler_words = ["please", "now", "the", "can", "could", "you", "will", "would", "ok", "okay", "hey", "system",
+                        "skull", "right", "go", "ahead", "and"]
+
+# confidence, from 0 to 1, a transcript needs to match a command phrase with; exact matches have a confidence of 1
+command_match_threshold = 0.8
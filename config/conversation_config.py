@@ -1,23 +1,67 @@
-conversation_function_list = [
-    'generate_tts_bot_response',
-    'activate_jaw_audio',
-    'listen_stt',
-    'command_checker',
-    'get_bot_engine_response',
-    'scan_mode_on',
-]
+# Each conversation is a graph of actions: every action is listed with the actions it has to wait for, and runs as soon
+# as they have finished, so actions that do not depend on each other run at the same time. To run the same action
+# more than once in a conversation, give the node its own name and set the action, e.g.
+# 'speak_bot_response': {'action': 'activate_jaw_audio', 'after': [...]}
 
-demo_mode_function_list = [
-    'generate_tts_bot_response',
-    'activate_jaw_audio',
-    'scan_mode_on',
-]
+# The LLM is asked for a response while the transcript is checked for commands; if a command is found, the response
+# is dropped
+conversation_action_graph = {
+    'generate_tts_bot_response': [],
+    'activate_jaw_audio': ['generate_tts_bot_response'],
+    'listen_stt': ['activate_jaw_audio'],
+    'command_checker': ['listen_stt'],
+    'get_bot_engine_response': ['listen_stt'],
+    'scan_mode_on': ['command_checker', 'get_bot_engine_response'],
+}
 
-command_function_list = [
-    'generate_tts_bot_response',
-    'activate_jaw_audio',
-    'execute_command',
-    'listen_stt',
-    'command_checker',
-    'scan_mode_on',
-]
+demo_mode_action_graph = {
+    'generate_tts_bot_response': [],
+    'activate_jaw_audio': ['generate_tts_bot_response'],
+    'scan_mode_on': ['activate_jaw_audio'],
+}
+
+command_action_graph = {
+    'generate_tts_bot_response': [],
+    'activate_jaw_audio': ['generate_tts_bot_response'],
+    'execute_command': ['activate_jaw_audio'],
+    'listen_stt': ['execute_command'],
+    'command_checker': ['listen_stt'],
+    'scan_mode_on': ['command_checker'],
+}
+
+# Used instead of conversation_action_graph when stream_chat_response is on, the response is spoken while it streams.
+# The streamed response is spoken as soon as it starts, so it waits for the command check
+streamed_conversation_action_graph = {
+    'generate_tts_bot_response': [],
+    'activate_jaw_audio': ['generate_tts_bot_response'],
+    'listen_stt': ['activate_jaw_audio'],
+    'command_checker': ['listen_stt'],
+    'stream_bot_engine_response': ['command_checker'],
+    'speak_bot_response': {'action': 'activate_jaw_audio', 'after': ['stream_bot_engine_response']},
+    'scan_mode_on': ['speak_bot_response'],
+}
+
+# The system that answers each action with CONVERSATION_ACTION_FINISHED once it has run it
+action_systems = {
+    'generate_tts_bot_response': 'TTSOperations',
+    'activate_jaw_audio': 'AudioJawSync',
+    'listen_stt': 'STTOperations',
+    'command_checker': 'CommandCheckOperations',
+    'get_bot_engine_response': 'ChatbotOperations',
+    'stream_bot_engine_response': 'ChatbotOperations',
+    'execute_command': 'PiOperations',
+    'scan_mode_on': 'AudioDetector',
+}
+
+# Results an action has to hand back to the conversation engine, alongside CONVERSATION_ACTION_FINISHED, before the
+# actions waiting on it are run
+action_result_tokens = {
+    'generate_tts_bot_response': ['TTS_FINISHED'],
+    'listen_stt': ['STT_FINISHED'],
+    'command_checker': ['COMMAND_CHECKED'],
+    'get_bot_engine_response': ['BOT_FINISHED'],
+}
+
+# match the STT output against the voice commands in the conversation engine as soon as it arrives, rather than in a
+# round trip through the command system; commands spoken outside of command mode are answered without asking the LLM
+command_fast_path = True
@@ -73,6 +73,14 @@ class TTSEvent(Event):
         return self.__class__
 
 
+class TTSDoneEvent(Event):
+    def __init__(self, content, priority):
+        super().__init__("TTS_Done_Event", content, priority)
+
+    def get_event_type(self):
+        return self.__class__
+
+
 class BotEvent(Event):
     def __init__(self, content, priority):
         super().__init__("Bot_Event", content, priority)
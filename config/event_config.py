@@ -0,0 +1,5 @@
+# Options are: "blocking" (actors wait on their own inbox, routed by event type) or "polling" (EventHive sleep loop)
+event_dispatch_mode = "blocking"
+
+# only used for the "polling" dispatch mode, seconds each actor sleeps between checks of the queue
+polling_sleep_time = 1
@@ -1,2 +1,18 @@
 open_pulse_width = 0
 close_pulse_width = -30
+# maximum servo writes per second, jaw positions set faster than this are coalesced into the newest one
+jaw_servo_update_rate = 50
+# servo writes that would move the jaw less than this are skipped
+jaw_min_pulse_delta = 0.5
+# time constants (in ms) smoothing the jaw movement as it opens (attack) and closes (release), 0 to not smooth
+jaw_attack_ms = 20
+jaw_release_ms = 60
+
+# Options are: loopback/track; "loopback" moves the jaw from the played audio re-captured through the ALSA loopback,
+# "track" precomputes the jaw movement from the audio file once and replays it in time with playback
+jaw_sync_mode = "track"
+jaw_track_frame_ms = 20
+
+# RMS of the audio (in 16-bit sample values) above which the jaw opens, and at which it is fully open
+jaw_min_rms = 300
+jaw_max_rms = 3000
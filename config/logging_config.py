@@ -1,3 +1,14 @@
 # 'debug', 'info', 'warning', 'error', 'critical'
 log_level = 'info'
 log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Log records are handed to a background thread that formats and writes them, so logging never holds up the audio and
+# jaw threads on a slow console
+log_queue = True
+
+# Most debug and info records a second, per message, for the loggers that log on every audio chunk; the rest are dropped
+# and counted in the next record let through. Warnings and errors are never dropped
+log_rate_limits = {
+    "components.jaw_system": 5,
+    "hardware.jaw_controller": 5,
+}
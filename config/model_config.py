@@ -0,0 +1,16 @@
+# how each model is kept in memory:
+#   "resident" - loaded and warmed up at boot, never unloaded
+#   "preload" - loaded and warmed up at boot, unloaded under memory pressure and reloaded when next used
+#   "lazy" - loaded and warmed up when first used, unloaded under memory pressure
+# models not listed here are lazy
+model_policies = {
+    "whisper": "resident",
+    "lakul_stt": "resident",
+    "nix_tts": "preload",
+}
+
+# run one inference on each model as it is loaded, so the first real request is not slowed by lazy initialisation
+model_warm_up = True
+
+# when less memory than this is available, in MB, models that are not in use are unloaded, least recently used first
+model_min_available_mb = 64
@@ -1 +1,7 @@
 led_brightness = 0.1
+
+# how many times a second the LEDs are redrawn, only the LEDs that have changed are written to the board
+led_frame_rate = 20
+
+# how many times a second CPU and memory use are sampled, the LEDs ease towards each sample between samples
+led_sample_rate = 4
@@ -19,3 +19,23 @@ recording_silence_duration = 3
 
 # silence threshold for STT recording
 recording_silence_threshold = 40
+
+# record STT audio from the shared capture buffer of the audio engine rather than Lakul opening the microphone itself
+stt_shared_capture = True
+
+# in offline mode, transcribe the shared capture recording with Whisper straight from memory rather than saving
+# stt_recording.wav for Lakul to read back
+stt_in_memory = True
+
+# with the in-memory Whisper model, transcribe while the user is still speaking rather than after the recording stops
+stt_streaming = True
+
+# seconds of new speech between streaming transcriptions of the words not yet committed
+stt_stream_step_seconds = 1.0
+
+# once this many seconds of speech are uncommitted, the latest transcription of them is committed as it is
+stt_stream_max_window_seconds = 15
+
+# silence duration until a streaming recording stops, in seconds. Most of the speech is transcribed by then, so this is
+# most of the wait for the transcript; too short and a pause mid sentence ends the recording
+stt_stream_silence_duration = 1.5
@@ -31,10 +31,33 @@ override_text = "Override command detected. Activating command system."
 test_text = "Test command detected. Command system working."
 test_command_text = "Test command detected. Command system working."
 no_command_text = "I'm sorry, I didn't understand that command."
+command_locked_text = "I can only do that once the override phrase has been given."
 
 audio_on = True
 file_name = "tts_output.wav"
 
+# Options are: file/stream; "file" generates the whole response before playing it, "stream" generates it sentence by
+# sentence, playing each sentence while the next one is generated
+tts_playback_mode = "file"
+# Sentences shorter than this (in characters) are merged with the next one when streaming
+tts_stream_min_chunk_length = 20
+tts_stream_file_prefix = "tts_stream"
+
+# Generated audio is passed to the jaw system in memory; set this to also save it to the audio folder for debugging
+tts_save_audio_files = False
+# TTS engines that can only write files write them here, in memory (tmpfs) where available to spare the SD card
+tts_scratch_dir = Path("/dev/shm") if Path("/dev/shm").is_dir() else audio_dir
+
+# Generated TTS audio is cached on disk, keyed by TTS engine, voice and text, so repeated phrases are not regenerated
+tts_cache_enabled = True
+tts_cache_dir = Path(__file__).parent.parent / 'audio' / 'tts_cache'
+# Size limit for cached bot responses, the static phrases below are always kept
+tts_cache_max_mb = 50
+
+# Static phrases pre-rendered into the cache by setup/build_tts_cache.py
+cached_phrases = [greeting_text, override_text, shutdown_text, reboot_text, no_command_text, test_command_text,
+                  command_locked_text, demo_text]
+
 jaw_test_audio_path = Path(__file__).parent.parent / 'audio' / 'jaw_test.wav'
 
 whisper_test_audio_path = Path(__file__).parent.parent / 'audio' / 'whisper_test.wav'
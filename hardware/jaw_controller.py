@@ -1,8 +1,10 @@
 import logging
+import math
 import time
-from threading import Thread
+from threading import Thread, Condition
 
-from config.head_config import open_pulse_width, close_pulse_width
+from config.head_config import (open_pulse_width, close_pulse_width, jaw_servo_update_rate, jaw_min_pulse_delta,
+                                jaw_attack_ms, jaw_release_ms)
 from hardware.inventor_hat_controller import InventorHATCoreInit
 
 logger = logging.getLogger(__name__)
@@ -10,28 +12,127 @@ logger.debug("Initialized")
 
 
 class JawController(Thread):
-    def __init__(self, ):
-        Thread.__init__(self)
+    """
+    Moves the jaw servo. Once started, the controller thread is the only writer to the servo: set_pulse_width just
+    records the latest target and returns, and the thread moves the servo towards it at most jaw_servo_update_rate
+    times a second, so targets that arrive faster than that are coalesced and only the newest one is followed.
+    The movement is smoothed with separate time constants for opening (attack) and closing (release), and writes that
+    would move the servo less than jaw_min_pulse_delta are skipped.
+    Without the thread running (e.g. the setup scripts) every pulse width is written straight away.
+    """
+
+    def __init__(self, update_rate=jaw_servo_update_rate, min_pulse_delta=jaw_min_pulse_delta, attack_ms=jaw_attack_ms,
+                 release_ms=jaw_release_ms):
+        Thread.__init__(self, daemon=True)
         self.keep_running = True
         self._open_pulse_width = open_pulse_width
         self._close_pulse_width = close_pulse_width
 
+        self.write_interval = 1 / update_rate
+        self.min_pulse_delta = min_pulse_delta
+        # Fraction of the remaining distance to the target covered by each write
+        self.attack = 1 - math.exp(-self.write_interval * 1000 / attack_ms) if attack_ms > 0 else 1.0
+        self.release = 1 - math.exp(-self.write_interval * 1000 / release_ms) if release_ms > 0 else 1.0
+
+        self.target_condition = Condition()
+        self.target_pulse_width = None
+        self.target_time = None
+        self.new_target = False
+        self.position = None
+        self.written_pulse_width = None
+
+        # Statistics on how the scheduler kept up with the targets
+        self.targets_set = 0
+        self.targets_coalesced = 0
+        self.writes = 0
+        self.writes_suppressed = 0
+        self.lagged_writes = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+
         self.close_jaw()
 
+    def moving(self):
+        return self.target_pulse_width is not None and (
+                self.written_pulse_width is None or
+                abs(self.target_pulse_width - self.written_pulse_width) >= self.min_pulse_delta)
+
+    def smooth(self, target):
+        """
+        Step the smoothed position towards the target.
+        :param target:
+        :return:
+        """
+        if self.position is None or abs(target - self.position) < self.min_pulse_delta:
+            self.position = target
+            return
+
+        opening = (target - self.position) * (self._open_pulse_width - self._close_pulse_width) > 0
+        self.position += (target - self.position) * (self.attack if opening else self.release)
+
     def run(self):
-        # Continuous running behavior can be added here if needed
-        pass
+        while True:
+            with self.target_condition:
+                self.target_condition.wait_for(lambda: self.moving() or not self.keep_running)
+                if not self.keep_running:
+                    break
+                target, target_time, new_target = self.target_pulse_width, self.target_time, self.new_target
+                self.new_target = False
+
+            self.smooth(target)
+            if self.written_pulse_width is not None and abs(
+                    self.position - self.written_pulse_width) < self.min_pulse_delta:
+                self.writes_suppressed += 1
+            else:
+                self.write_pulse_width(self.position)
+                self.written_pulse_width = self.position
+                self.writes += 1
+
+                if new_target:
+                    lag = time.monotonic() - target_time
+                    self.lagged_writes += 1
+                    self.total_lag += lag
+                    self.max_lag = max(self.max_lag, lag)
+
+            # Rate limit writes to the servo, targets set in the meantime are coalesced into the newest one
+            time.sleep(self.write_interval)
+
+        logger.debug(f"Servo scheduler stopped after {self.writes} writes ({self.writes_suppressed} suppressed) for "
+                     f"{self.targets_set} targets")
 
     def stop(self):
-        self.keep_running = False
+        with self.target_condition:
+            self.keep_running = False
+            self.target_condition.notify()
+
+    def write_pulse_width(self, pulse_width):
+        InventorHATCoreInit.servo.value(pulse_width)
 
     def set_pulse_width(self, pulse_width):
         """
         Set the pulse width directly.
         :param pulse_width: The pulse width in microseconds.
         """
-        InventorHATCoreInit.servo.value(pulse_width)
-        time.sleep(0.5)
+        if not self.is_alive():
+            self.write_pulse_width(pulse_width)
+            self.position = self.written_pulse_width = pulse_width
+            # Give the servo time to move, as the caller may exit straight after
+            time.sleep(0.5)
+            return
+
+        with self.target_condition:
+            if self.new_target:
+                self.targets_coalesced += 1
+            self.target_pulse_width = pulse_width
+            self.target_time = time.monotonic()
+            self.new_target = True
+            self.targets_set += 1
+            if self.moving():
+                self.target_condition.notify()
+            else:
+                # The servo is already there, so there is nothing to write
+                self.new_target = False
+                self.writes_suppressed += 1
 
     def open_jaw(self, pulse_width=None):
         pulse_width = pulse_width if pulse_width is not None else self._open_pulse_width
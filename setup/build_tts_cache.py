@@ -0,0 +1,45 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+top_dir = Path(__file__).parent.parent
+
+sys.path.append(str(top_dir))
+
+from components.tts_system import tts_class_map, create_tts_cache
+from config.head_config import jaw_sync_mode, jaw_track_frame_ms
+from config.tts_config import tts_mode, cached_phrases, tts_cache_dir
+from utils.jaw_track import buffer_jaw_track
+
+
+def main():
+    """
+    Pre-render all the static phrases from the TTS config into the TTS cache with the configured TTS engine, so they
+    are never synthesised at runtime.
+    :return:
+    """
+    parser = argparse.ArgumentParser(description="Pre-render the static TTS phrases into the TTS cache.")
+    parser.add_argument("--force", action="store_true", help="Re-render phrases that are already cached.")
+    args = parser.parse_args()
+
+    tts = tts_class_map[tts_mode]()
+    tts_cache = create_tts_cache(tts)
+
+    for phrase in cached_phrases:
+        if tts_cache.lookup(phrase) is not None and not args.force:
+            print(f"Already cached: '{phrase}'")
+            continue
+
+        start_time = time.time()
+        audio = tts.generate_buffer(phrase)
+        if jaw_sync_mode == "track":
+            buffer_jaw_track(audio, jaw_track_frame_ms)
+        tts_cache.store(phrase, audio, pinned=True)
+        print(f"Cached in {time.time() - start_time:.2f} seconds: '{phrase}'")
+
+    print(f"All {len(cached_phrases)} phrases cached for tts_mode '{tts_mode}' in: {tts_cache_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+top_dir = Path(__file__).parent.parent
+
+sys.path.append(str(top_dir))
+
+from components.conversation_engine import ConversationEngine
+from config.custom_events import BotEvent, CommandCheckEvent, MovementEvent
+from utils.action_graph import ActionGraph
+from utils.audio_buffer import AudioBuffer
+from utils.event_dispatch import BlockingEventQueue
+
+
+def compile_graph(spec):
+    return ActionGraph("test", spec, bind=lambda name: name, tokens=lambda name: [name.upper()])
+
+
+class TestActionGraph(unittest.TestCase):
+    def test_ready_runs_independent_actions_together(self):
+        graph = compile_graph({
+            'listen': [],
+            'check': ['listen'],
+            'respond': ['listen'],
+            'scan': ['check', 'respond'],
+        })
+
+        self.assertEqual([node.name for node in graph.ready(set(), {})], ['listen'])
+        self.assertEqual([node.name for node in graph.ready({'listen'}, {})], ['check', 'respond'])
+        self.assertEqual([node.name for node in graph.ready({'listen', 'check'}, {'respond': set()})], [])
+        self.assertEqual([node.name for node in graph.ready({'listen', 'check', 'respond'}, {})], ['scan'])
+
+    def test_named_nodes(self):
+        graph = compile_graph({
+            'speak': [],
+            'speak_again': {'action': 'speak', 'after': ['speak']},
+        })
+
+        self.assertEqual(graph.nodes['speak_again'].action, 'speak')
+        self.assertEqual(graph.nodes['speak_again'].tokens, {'SPEAK'})
+        self.assertEqual([node.name for node in graph.order], ['speak', 'speak_again'])
+
+    def test_invalid_graphs(self):
+        with self.assertRaises(ValueError):
+            compile_graph({'first': ['second'], 'second': ['first']})
+        with self.assertRaises(ValueError):
+            compile_graph({'first': ['missing']})
+
+
+class TestConversationActionGraph(unittest.TestCase):
+    def setUp(self):
+        self.event_queue = BlockingEventQueue()
+        self.engine = ConversationEngine(self.event_queue, demo_mode=False)
+        self.engine.command_matcher = None
+
+    def produced(self, event_class):
+        return [event.content[0] for _, _, event in self.event_queue.unrouted[event_class]]
+
+    def listen(self, transcript):
+        self.engine.conversation_cycle()
+        self.engine.set_tts_audio(event_data=AudioBuffer(np.zeros((1600, 1), dtype=np.int16), 16000))
+        self.engine.action_finished(event_data="TTSOperations")
+        self.engine.action_finished(event_data="AudioJawSync")
+        self.engine.set_inference_output(event_data=transcript)
+        self.engine.action_finished(event_data="STTOperations")
+
+    def test_command_check_alongside_llm(self):
+        self.listen("Hello there.")
+
+        self.assertEqual(self.produced(CommandCheckEvent), ["CHECK_VOICE_COMMANDS"])
+        self.assertEqual(self.produced(BotEvent), ["WARM_UP_BOT", "GET_BOT_RESPONSE"])
+        self.assertEqual(set(self.engine.running_actions), {"command_checker", "get_bot_engine_response"})
+
+        # Results come back in any order, scan mode waits for both
+        self.engine.set_bot_response(event_data="Hi.")
+        self.engine.action_finished(event_data="ChatbotOperations")
+        self.assertEqual(set(self.engine.running_actions), {"command_checker"})
+        self.engine.action_finished(event_data="CommandCheckOperations")
+        self.engine.set_command(event_data=["no_command", ""])
+
+        self.assertEqual(set(self.engine.running_actions), {"scan_mode_on"})
+        self.engine.action_finished(event_data="AudioDetector")
+        self.assertIsNone(self.engine.action_graph)
+        self.assertEqual(self.engine.bot_response, "Hi.")
+
+    def test_override_drops_llm_response(self):
+        self.listen("Freeze all motor functions.")
+        self.engine.activate_command_system()
+        self.engine.set_bot_response(event_data="Late LLM response.")
+
+        self.assertEqual(self.engine.action_graph.name, "command")
+        self.assertNotEqual(self.engine.bot_response, "Late LLM response.")
+
+    def test_tts_audio_handed_to_jaw(self):
+        self.engine.stream_playback = False
+        audio = AudioBuffer(np.zeros((1600, 1), dtype=np.int16), 16000)
+        self.engine.conversation_cycle()
+        self.engine.action_finished(event_data="TTSOperations")
+        self.assertEqual(list(self.engine.running_actions), ["generate_tts_bot_response"])
+
+        self.engine.set_tts_audio(event_data=audio)
+        jaw_events = [event.content for _, _, event in self.event_queue.unrouted[MovementEvent]]
+        self.assertEqual(jaw_events, [["JAW_TTS_AUDIO", audio]])
+        self.assertIsNone(self.engine.tts_audio)
+
+    def test_no_tts_audio_skips_jaw(self):
+        self.engine.stream_playback = False
+        self.engine.conversation_cycle()
+        self.engine.set_tts_audio(event_data=None)
+        self.engine.action_finished(event_data="TTSOperations")
+
+        self.assertNotIn(MovementEvent, self.event_queue.unrouted)
+        self.assertEqual(list(self.engine.running_actions), ["listen_stt"])
+
+    def test_results_from_other_systems_are_ignored(self):
+        self.engine.conversation_cycle()
+        self.engine.action_finished(event_data="ChatbotOperations")
+
+        self.assertEqual(list(self.engine.running_actions), ["generate_tts_bot_response"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+top_dir = Path(__file__).parent.parent
+
+sys.path.append(str(top_dir))
+
+from utils.audio_features import EnvelopeFeatures
+
+RATE = 48000
+CHUNK = 1024
+
+
+def sine(amplitude, samples=CHUNK, frequency=440):
+    return (amplitude * np.sin(2 * np.pi * frequency * np.arange(samples) / RATE)).astype(np.int16)
+
+
+class TestEnvelopeFeatures(unittest.TestCase):
+    def setUp(self):
+        self.features = EnvelopeFeatures(CHUNK)
+
+    def test_loud_sine_does_not_overflow(self):
+        # Squaring these as int16 wraps around
+        self.assertAlmostEqual(self.features.rms(sine(30000)), 30000 / np.sqrt(2), delta=30000 * 0.01)
+
+    def test_quiet_sine(self):
+        self.assertAlmostEqual(self.features.rms(sine(100)), 100 / np.sqrt(2), delta=1)
+
+    def test_noise(self):
+        noise = np.random.default_rng(0).normal(0, 5000, CHUNK).astype(np.int16)
+        self.assertAlmostEqual(self.features.rms(noise), 5000, delta=5000 * 0.05)
+
+    def test_silence_and_empty(self):
+        self.assertEqual(self.features.rms(np.zeros(CHUNK, dtype=np.int16)), 0.0)
+        self.assertEqual(self.features.rms(np.zeros(0, dtype=np.int16)), 0.0)
+
+    def test_buffer_reused_across_chunks(self):
+        buffer = self.features.buffer
+        self.features.rms(sine(1000))
+        self.features.rms(sine(2000, samples=CHUNK // 2))
+        self.assertIs(self.features.buffer, buffer)
+
+    def test_batched_frames_match_single_chunks(self):
+        chunks = [sine(amplitude) for amplitude in (1000, 8000, 30000)]
+        batched = self.features.frame_rms(np.concatenate(chunks))
+        np.testing.assert_allclose(batched, [self.features.rms(chunk) for chunk in chunks], rtol=1e-4)
+
+    def test_last_frame_padded_with_silence(self):
+        np.testing.assert_allclose(EnvelopeFeatures(4).frame_rms(np.full(5, 1000, dtype=np.int16)), [1000, 500])
+
+
+if __name__ == '__main__':
+    unittest.main()
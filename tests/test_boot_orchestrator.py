@@ -0,0 +1,166 @@
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+
+top_dir = Path(__file__).parent.parent
+
+sys.path.append(str(top_dir))
+
+from utils.boot_orchestrator import BootOrchestrator
+
+
+class StubSystem:
+    def __init__(self, name, log, ready=None):
+        self.name = name
+        self.log = log
+        self.ready = ready
+        self.log.append(f"built {name}")
+
+    def start(self):
+        self.log.append(f"started {self.name}")
+
+    def shutdown(self):
+        self.log.append(f"shut down {self.name}")
+
+
+class StoppingSystem:
+    # Like the LED monitor, stopped rather than shut down
+    def __init__(self, name, log):
+        self.name = name
+        self.log = log
+
+    def start(self):
+        self.log.append(f"started {self.name}")
+
+    def stop(self):
+        self.log.append(f"stopped {self.name}")
+
+
+class ReportingSystem(StubSystem):
+    def wait_until_ready(self, timeout=None):
+        return self.ready.wait(timeout)
+
+
+class TestBootOrchestrator(unittest.TestCase):
+    def setUp(self):
+        self.log = []
+        self.orchestrator = BootOrchestrator(ready_timeout=2)
+
+    def test_dependent_built_after_dependency_ready(self):
+        ready = threading.Event()
+
+        def build_slow():
+            # Only ready a while after it has started, the dependent must wait for that rather than the build
+            threading.Timer(0.2, lambda: (self.log.append("ready slow"), ready.set())).start()
+            return ReportingSystem("slow", self.log, ready)
+
+        self.orchestrator.add("dependent", lambda: StubSystem("dependent", self.log), depends_on=["slow"])
+        self.orchestrator.add("slow", build_slow)
+        systems = self.orchestrator.boot()
+
+        self.assertEqual([system.name for system in systems], ["dependent", "slow"])
+        self.assertLess(self.log.index("ready slow"), self.log.index("built dependent"))
+
+    def test_independent_systems_boot_concurrently(self):
+        both_building = threading.Barrier(2, timeout=2)
+
+        def build(name):
+            # Each waits for the other to be building, which only works if they are built at the same time
+            both_building.wait()
+            return StubSystem(name, self.log)
+
+        self.orchestrator.add("first", lambda: build("first"))
+        self.orchestrator.add("second", lambda: build("second"))
+        self.assertEqual(len(self.orchestrator.boot()), 2)
+
+    def test_failure_skips_dependents_and_is_raised(self):
+        def fail():
+            raise OSError("mic not found")
+
+        self.orchestrator.add("dependent", lambda: StubSystem("dependent", self.log), depends_on=["broken"])
+        self.orchestrator.add("broken", fail)
+        self.orchestrator.add("independent", lambda: StubSystem("independent", self.log))
+
+        with self.assertRaises(RuntimeError):
+            self.orchestrator.boot()
+
+        self.assertNotIn("built dependent", self.log)
+        self.assertIn("started independent", self.log)
+        self.assertIsInstance(self.orchestrator.components["broken"].error, OSError)
+        self.assertIsInstance(self.orchestrator.components["dependent"].error, RuntimeError)
+
+    def test_dependency_failure_raised_when_registered_first(self):
+        def fail():
+            raise OSError("mic not found")
+
+        self.orchestrator.add("broken", fail)
+        self.orchestrator.add("dependent", lambda: StubSystem("dependent", self.log), depends_on=["broken"])
+
+        with self.assertRaises(OSError):
+            self.orchestrator.boot()
+
+    def test_started_systems_shut_down_when_sibling_fails(self):
+        def fail():
+            raise OSError("mic not found")
+
+        self.orchestrator.add("leds", lambda: StoppingSystem("leds", self.log))
+        self.orchestrator.add("independent", lambda: StubSystem("independent", self.log))
+        self.orchestrator.add("broken", fail)
+        self.orchestrator.add("dependent", lambda: StubSystem("dependent", self.log), depends_on=["broken"])
+
+        with self.assertRaises(OSError):
+            self.orchestrator.boot()
+
+        self.assertIn("stopped leds", self.log)
+        self.assertIn("shut down independent", self.log)
+        self.assertNotIn("shut down dependent", self.log)
+
+    def test_booted_systems_left_running(self):
+        self.orchestrator.add("leds", lambda: StoppingSystem("leds", self.log))
+        self.orchestrator.add("independent", lambda: StubSystem("independent", self.log))
+        self.orchestrator.boot()
+
+        self.assertEqual(sorted(self.log), ["built independent", "started independent", "started leds"])
+
+    def test_circular_dependency(self):
+        self.orchestrator.add("first", lambda: StubSystem("first", self.log), depends_on=["second"])
+        self.orchestrator.add("second", lambda: StubSystem("second", self.log), depends_on=["first"])
+
+        with self.assertRaises(ValueError):
+            self.orchestrator.boot()
+        self.assertEqual(self.log, [])
+
+    def test_unknown_dependency(self):
+        self.orchestrator.add("first", lambda: StubSystem("first", self.log), depends_on=["missing"])
+
+        with self.assertRaises(ValueError):
+            self.orchestrator.boot()
+        self.assertEqual(self.log, [])
+
+    def test_duplicate_system(self):
+        self.orchestrator.add("first", lambda: StubSystem("first", self.log))
+
+        with self.assertRaises(ValueError):
+            self.orchestrator.add("first", lambda: StubSystem("first", self.log))
+
+    def test_ready_timeout(self):
+        orchestrator = BootOrchestrator(ready_timeout=0.1)
+        never_ready = threading.Event()
+        orchestrator.add("stuck", lambda: ReportingSystem("stuck", self.log, never_ready))
+        orchestrator.add("dependent", lambda: StubSystem("dependent", self.log), depends_on=["stuck"])
+
+        start_time = time.monotonic()
+        with self.assertRaises(TimeoutError):
+            orchestrator.boot()
+
+        self.assertLess(time.monotonic() - start_time, 1)
+        self.assertIn("started stuck", self.log)
+        self.assertNotIn("built dependent", self.log)
+        # Started but never ready, its thread is still shut down
+        self.assertIn("shut down stuck", self.log)
+
+
+if __name__ == '__main__':
+    unittest.main()
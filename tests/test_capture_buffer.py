@@ -0,0 +1,152 @@
+import queue
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+top_dir = Path(__file__).parent.parent
+
+sys.path.append(str(top_dir))
+
+from components.audio_system import CaptureBuffer
+
+RATE = 100
+CHUNK = 30
+
+
+class StubStream:
+    """
+    Input stream returning the chunks queued by the test, or nothing while there are none.
+    """
+
+    def __init__(self):
+        self.chunks = queue.Queue()
+        self.stopped = False
+        self.closed = False
+
+    def read(self, frames, exception_on_overflow=True):
+        try:
+            chunk = self.chunks.get(timeout=0.01)
+        except queue.Empty:
+            return b""
+        if isinstance(chunk, Exception):
+            raise chunk
+        return chunk
+
+    def stop_stream(self):
+        self.stopped = True
+
+    def close(self):
+        self.closed = True
+
+
+class StubPyAudio:
+    def __init__(self):
+        self.stream = StubStream()
+
+    def open(self, **kwargs):
+        return self.stream
+
+
+class TestCaptureBuffer(unittest.TestCase):
+    def setUp(self):
+        self.p = StubPyAudio()
+        # One second of capacity, so 100 frames
+        self.buffer = CaptureBuffer(self.p, device=0, rate=RATE, chunk=CHUNK, seconds=1)
+        self.frames_queued = 0
+
+    def tearDown(self):
+        self.buffer.stop()
+
+    def queue_frames(self, frames):
+        # Counting samples, so each frame says where it is in the recording
+        samples = np.arange(self.frames_queued, self.frames_queued + frames, dtype=np.int16)
+        self.p.stream.chunks.put(samples.tobytes())
+        self.frames_queued += frames
+
+    def test_read_across_wraparound(self):
+        self.buffer.add_reader("reader")
+        chunks = []
+        # Reading each chunk as it is captured keeps the reader within the capacity while the writes wrap around
+        for _ in range(5):
+            self.queue_frames(CHUNK)
+            chunks.append(self.buffer.read("reader", CHUNK, timeout=1))
+
+        np.testing.assert_array_equal(np.concatenate(chunks), np.arange(5 * CHUNK))
+
+    def test_lagging_reader_skipped_forward(self):
+        self.buffer.add_reader("lagging")
+        self.buffer.add_reader("keeping_up")
+        for _ in range(5):
+            self.queue_frames(CHUNK)
+        # Once this reader has everything the lagging one is more than the capacity behind
+        self.buffer.read("keeping_up", 5 * CHUNK, timeout=1)
+
+        with self.assertLogs("components.audio_system", level="WARNING"):
+            data = self.buffer.read("lagging", 10, timeout=1)
+        # Skipped to the oldest frame still in the buffer
+        np.testing.assert_array_equal(data, np.arange(50, 60))
+
+    def test_independent_readers(self):
+        self.buffer.add_reader("first")
+        self.buffer.add_reader("second")
+        self.queue_frames(CHUNK)
+        self.queue_frames(CHUNK)
+
+        np.testing.assert_array_equal(self.buffer.read("first", 2 * CHUNK, timeout=1), np.arange(2 * CHUNK))
+        np.testing.assert_array_equal(self.buffer.read("second", CHUNK, timeout=1), np.arange(CHUNK))
+        np.testing.assert_array_equal(self.buffer.read("second", CHUNK, timeout=1), np.arange(CHUNK, 2 * CHUNK))
+
+    def test_reader_added_later_starts_at_current_position(self):
+        self.buffer.add_reader("first")
+        self.queue_frames(CHUNK)
+        self.buffer.read("first", CHUNK, timeout=1)
+
+        self.buffer.add_reader("second")
+        self.queue_frames(CHUNK)
+        np.testing.assert_array_equal(self.buffer.read("second", CHUNK, timeout=1), np.arange(CHUNK, 2 * CHUNK))
+
+    def test_remove_waiting_reader(self):
+        self.buffer.add_reader("reader")
+        results = []
+        reading = threading.Thread(target=lambda: results.append(self.buffer.read("reader", CHUNK)))
+        reading.start()
+
+        self.buffer.remove_reader("reader")
+        reading.join(1)
+        self.assertFalse(reading.is_alive())
+        self.assertEqual(results, [None])
+
+    def test_read_timeout(self):
+        self.buffer.add_reader("reader")
+        self.assertIsNone(self.buffer.read("reader", CHUNK, timeout=0.05))
+
+    def test_capture_failure_wakes_readers(self):
+        self.buffer.add_reader("reader")
+        results = []
+        reading = threading.Thread(target=lambda: results.append(self.buffer.read("reader", CHUNK)))
+        reading.start()
+
+        with self.assertLogs("components.audio_system", level="ERROR"):
+            self.p.stream.chunks.put(OSError("Device unavailable"))
+            reading.join(1)
+
+        self.assertFalse(reading.is_alive())
+        self.assertEqual(results, [None])
+        self.assertTrue(self.buffer.closed)
+        self.assertIsInstance(self.buffer.error, OSError)
+        self.assertIsNone(self.buffer.read("reader", CHUNK))
+
+    def test_stop_closes_stream(self):
+        self.buffer.stop()
+
+        self.assertFalse(self.buffer.thread.is_alive())
+        self.assertTrue(self.p.stream.stopped)
+        self.assertTrue(self.p.stream.closed)
+        self.assertIsNone(self.buffer.error)
+
+
+if __name__ == '__main__':
+    unittest.main()
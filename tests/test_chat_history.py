@@ -0,0 +1,111 @@
+import sys
+import unittest
+from pathlib import Path
+
+top_dir = Path(__file__).parent.parent
+
+sys.path.append(str(top_dir))
+
+from components.chat_streaming import ChatStream
+from utils.chat_history import ChatHistory
+
+
+class EchoChatStream(ChatStream):
+    def __init__(self, role, history):
+        super().__init__(role, history)
+        self.sent = []
+
+    def stream_tokens(self, messages):
+        self.sent.append(messages)
+        yield "You said: "
+        yield messages[-1]["content"]
+
+
+def turn_text(number):
+    # 40 characters, 10 tokens
+    return f"Message number {number:02d}. Padded out to forty."[:40]
+
+
+class TestChatHistory(unittest.TestCase):
+    def test_keeps_every_turn_within_budget(self):
+        history = ChatHistory(token_budget=100, summary_token_budget=20)
+        history.add_turn("Hello there.", "Hello visitor.")
+        history.add_turn("What is this place?", "The lab.")
+
+        messages = history.build_messages("role", "Who are you?")
+        self.assertEqual([message["role"] for message in messages],
+                         ["system", "user", "assistant", "user", "assistant", "user"])
+        self.assertEqual(messages[0]["content"], "role")
+        self.assertEqual(messages[-1]["content"], "Who are you?")
+
+    def test_summarises_oldest_turns_over_budget(self):
+        history = ChatHistory(token_budget=100, summary_token_budget=40)
+        for number in range(6):
+            history.add_turn(turn_text(number), turn_text(number))
+
+        # Each turn is 20 tokens, so three fit in the 60 tokens left by the summary
+        self.assertEqual(len(history.turns), 3)
+        self.assertEqual(history.summarised_turns, 3)
+        self.assertLessEqual(history.history_tokens(), 100)
+        messages = history.build_messages("role", "next")
+        self.assertIn('The visitor said "Message number 02." and you said "Message number 02."', messages[0]["content"])
+        self.assertEqual(messages[1]["content"], turn_text(3))
+        self.assertEqual(messages[-2]["content"], turn_text(5))
+
+    def test_summary_forgets_oldest_lines_over_its_budget(self):
+        history = ChatHistory(token_budget=60, summary_token_budget=30)
+        for number in range(10):
+            history.add_turn(turn_text(number), turn_text(number))
+
+        self.assertEqual(len(history.turns), 1)
+        self.assertEqual(len(history.summary), 1)
+        self.assertIn("08", history.summary[-1])
+
+    def test_prompt_size_stays_flat(self):
+        history = ChatHistory(token_budget=100, summary_token_budget=40)
+        sizes = []
+        for number in range(50):
+            history.build_messages("role", turn_text(number))
+            sizes.append(history.last_prompt_tokens)
+            history.add_turn(turn_text(number), turn_text(number))
+
+        self.assertEqual(max(sizes[10:]), max(sizes[10:20]))
+        # The history budget, plus the system prompt, the summary heading and the new message
+        self.assertLessEqual(history.max_prompt_tokens, 100 + 30)
+
+    def test_min_turns_kept_over_budget(self):
+        history = ChatHistory(token_budget=5, min_turns=1)
+        history.add_turn(turn_text(1), turn_text(1))
+        self.assertEqual(len(history.turns), 1)
+
+    def test_reset(self):
+        history = ChatHistory(token_budget=20, summary_token_budget=10)
+        for number in range(3):
+            history.add_turn(turn_text(number), turn_text(number))
+        history.reset()
+
+        self.assertEqual(len(history.build_messages("role", "hi")), 2)
+        self.assertEqual(history.stats()["resets"], 1)
+        self.assertEqual(history.stats()["turns"], 3)
+
+
+class TestChatStreamHistory(unittest.TestCase):
+    def test_streams_share_history(self):
+        history = ChatHistory()
+        first = EchoChatStream("role", history)
+        second = EchoChatStream("role", history)
+
+        self.assertEqual(first.get_response("hello"), "You said: hello")
+        self.assertEqual("".join(second.stream("again")), "You said: again")
+        self.assertEqual([message["content"] for message in second.sent[-1][1:]],
+                         ["hello", "You said: hello", "again"])
+
+    def test_no_history(self):
+        stream = EchoChatStream("role", None)
+        stream.get_response("hello")
+        stream.get_response("again")
+        self.assertEqual(len(stream.sent[-1]), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
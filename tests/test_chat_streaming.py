@@ -0,0 +1,114 @@
+import json
+import sys
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+top_dir = Path(__file__).parent.parent
+
+sys.path.append(str(top_dir))
+
+from components.chat_streaming import ChatBackendError, OllamaChatStream
+from utils.chat_history import ChatHistory
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    # Keeps the connection open between requests, as Ollama does
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append((self.client_address, payload))
+
+        if payload["messages"]:
+            chunks = [{"message": {"content": token}, "done": False} for token in ["Hello ", "visitor."]]
+            chunks.append({"message": {"content": ""}, "done": True})
+        else:
+            # An empty chat only loads the model
+            chunks = [{"message": {"role": "assistant", "content": ""}, "done": True}]
+        lines = [(json.dumps(chunk) + "\n").encode() for chunk in chunks]
+
+        # Streamed in chunks as Ollama does, so each line can be read as soon as it is sent
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for line in lines:
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                self.wfile.flush()
+                if payload["messages"] and payload["messages"][-1]["content"] == "Stall.":
+                    # Stops generating mid response
+                    time.sleep(0.5)
+            self.wfile.write(b"0\r\n\r\n")
+        except ConnectionError:
+            # The client gave up waiting
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestOllamaChatStream(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubOllamaHandler)
+        self.server.requests = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        host = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.chat = OllamaChatStream(model="westworld-prototype", role="role", history=ChatHistory(), host=host,
+                                     keep_alive=-1)
+
+    def tearDown(self):
+        self.chat.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_streams_response(self):
+        self.assertEqual(list(self.chat.stream("Hi.")), ["Hello ", "visitor."])
+        _, payload = self.server.requests[0]
+        self.assertEqual(payload["model"], "westworld-prototype")
+        self.assertTrue(payload["stream"])
+        self.assertEqual(payload["messages"][-1], {"role": "user", "content": "Hi."})
+
+    def test_pins_model(self):
+        self.chat.get_response("Hi.")
+        self.chat.warm_up()
+
+        self.assertEqual([payload["keep_alive"] for _, payload in self.server.requests], [-1, -1])
+
+    def test_reuses_connection(self):
+        self.chat.get_response("Hi.")
+        self.chat.warm_up()
+        self.chat.get_response("Again.")
+
+        # Every request came from the same client port, so over the same connection
+        self.assertEqual(len({address for address, _ in self.server.requests}), 1)
+
+    def test_stalled_response_times_out(self):
+        self.chat.timeout = (1, 0.1)
+        tokens = []
+
+        with self.assertRaises(ChatBackendError) as raised:
+            for token in self.chat.stream("Stall."):
+                tokens.append(token)
+        self.assertIsInstance(raised.exception.__cause__, requests.RequestException)
+        self.assertEqual(tokens, ["Hello "])
+        # The failed exchange is not part of the conversation
+        self.assertEqual(self.chat.history.stats()["turns"], 0)
+
+    def test_warm_up_loads_without_generating(self):
+        self.chat.warm_up()
+
+        _, payload = self.server.requests[0]
+        self.assertEqual(payload["messages"], [])
+        self.assertFalse(payload["stream"])
+        # Warming up is not a turn of the conversation
+        self.assertEqual(self.chat.history.stats()["turns"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
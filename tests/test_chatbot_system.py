@@ -0,0 +1,82 @@
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import openai
+
+top_dir = Path(__file__).parent.parent
+
+sys.path.append(str(top_dir))
+
+from components import chatbot_system
+from components.chat_streaming import ChatBackendError
+from components.chatbot_system import ChatbotOperations, ChatHandler, RealChatHandler
+from config.custom_events import BotDoneEvent, ConversationDoneEvent, TTSEvent
+from utils.event_dispatch import BlockingEventQueue
+
+
+class UnreachableChatHandler(ChatHandler):
+    # The chat backend stops answering after the first phrase
+    def get_response(self, event_data):
+        raise ChatBackendError("Read timed out.")
+
+    def stream_response(self, event_data):
+        yield "Hello there, visitor. "
+        raise ChatBackendError("Read timed out.")
+
+
+class TestChatbotOperations(unittest.TestCase):
+    def setUp(self):
+        self.event_queue = BlockingEventQueue()
+        self.chatbot = ChatbotOperations(self.event_queue, test_mode=True)
+        self.chatbot.chat_handler = UnreachableChatHandler()
+
+    def produced(self, event_class):
+        return [event.content for _, _, event in self.event_queue.unrouted[event_class]]
+
+    def use_timed_out_gpt_handler(self):
+        # The OpenAI client times out on every request
+        with mock.patch.object(chatbot_system, "chat_backend", "gpt"), mock.patch("openai.OpenAI") as client:
+            self.chatbot.chat_handler = RealChatHandler()
+        client.return_value.chat.completions.create.side_effect = openai.APITimeoutError(request=mock.Mock())
+
+    def test_failed_response_finishes_action(self):
+        with self.assertLogs("components.chatbot_system", level="ERROR"):
+            self.chatbot.process_chatbot_response(event_data="Hi.")
+
+        # An empty response, which restarts the conversation
+        self.assertEqual(self.produced(BotDoneEvent), [["BOT_FINISHED", ""]])
+        self.assertEqual(self.produced(ConversationDoneEvent), [["CONVERSATION_ACTION_FINISHED", "ChatbotOperations"]])
+
+    def test_failed_stream_ends_stream(self):
+        with self.assertLogs("components.chatbot_system", level="ERROR"):
+            self.chatbot.stream_chatbot_response(event_data="Hi.")
+
+        self.assertEqual(self.produced(TTSEvent), [["START_TTS_STREAM"], ["QUEUE_TTS_PHRASE", "Hello there, visitor."],
+                                                   ["END_TTS_STREAM"]])
+        self.assertEqual(self.produced(ConversationDoneEvent), [["CONVERSATION_ACTION_FINISHED", "ChatbotOperations"]])
+        self.assertEqual(self.produced(BotDoneEvent), [["BOT_STREAM_FINISHED", "Hello there, visitor."]])
+
+    def test_failed_gpt_response_finishes_action(self):
+        self.use_timed_out_gpt_handler()
+
+        with self.assertLogs("components.chatbot_system", level="ERROR"):
+            self.chatbot.process_chatbot_response(event_data="Hi.")
+
+        self.assertEqual(self.produced(BotDoneEvent), [["BOT_FINISHED", ""]])
+        self.assertEqual(self.produced(ConversationDoneEvent), [["CONVERSATION_ACTION_FINISHED", "ChatbotOperations"]])
+
+    def test_failed_gpt_stream_ends_stream(self):
+        self.use_timed_out_gpt_handler()
+
+        with self.assertLogs("components.chatbot_system", level="ERROR"):
+            self.chatbot.stream_chatbot_response(event_data="Hi.")
+
+        self.assertEqual(self.produced(TTSEvent), [["START_TTS_STREAM"], ["END_TTS_STREAM"]])
+        self.assertEqual(self.produced(ConversationDoneEvent), [["CONVERSATION_ACTION_FINISHED", "ChatbotOperations"]])
+        self.assertEqual(self.produced(BotDoneEvent), [["BOT_STREAM_FINISHED", ""]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,7 +7,7 @@ top_dir = Path(__file__).parent.parent
 
 sys.path.append(str(top_dir))
 
-from components.chatbot_system import IntegrateChatGPT, IntegrateOllama
+from ChattingGPT.integrate_chatgpt import IntegrateChatGPT, IntegrateOllama
 
 
 class TestChatGPTIntegration(unittest.TestCase):
@@ -0,0 +1,54 @@
+import sys
+import unittest
+from pathlib import Path
+
+top_dir = Path(__file__).parent.parent
+
+sys.path.append(str(top_dir))
+
+from utils.command_index import CommandIndex
+
+PHRASES = {
+    "shut down": "shutdown",
+    "shutdown": "shutdown",
+    "turn off": "shutdown",
+    "reboot": "reboot",
+    "freeze all motor functions": "override",
+}
+
+
+class TestCommandIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = CommandIndex(PHRASES, filler_words=["please", "now", "the", "can", "you"], threshold=0.8)
+
+    def test_exact(self):
+        match = self.index.search("Shut down.")
+
+        self.assertEqual((match.command, match.phrase, match.confidence), ("shutdown", "shut down", 1.0))
+
+    def test_fuzzy(self):
+        match = self.index.search("Freeze all motor function.")
+
+        self.assertEqual(match.command, "override")
+        self.assertGreater(match.confidence, 0.8)
+        self.assertLess(match.confidence, 1.0)
+
+    def test_substring_with_filler(self):
+        self.assertEqual(self.index.search("Can you shut down please").command, "shutdown")
+        self.assertEqual(self.index.search("reboot now").command, "reboot")
+
+    def test_conversation_is_not_a_command(self):
+        for text in ["Can you turn off the light in the kitchen", "What do you think about shutting down the economy",
+                     "Tell me a story", ""]:
+            with self.subTest(text=text):
+                self.assertIsNone(self.index.search(text))
+
+    def test_threshold(self):
+        strict = CommandIndex(PHRASES, threshold=1.0)
+
+        self.assertIsNone(strict.search("freeze all motor function"))
+        self.assertIsNone(strict.search("shut down please"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+top_dir = Path(__file__).parent.parent
+
+sys.path.append(str(top_dir))
+
+from components.command_system import CommandMatcher
+from components.conversation_engine import ConversationEngine
+from config.command_config import override_word
+from config.custom_events import BotEvent
+from config.tts_config import command_locked_text
+from utils.audio_buffer import AudioBuffer
+from utils.event_dispatch import BlockingEventQueue
+
+
+class TestCommandMatcher(unittest.TestCase):
+    def test_match(self):
+        matcher = CommandMatcher()
+
+        self.assertEqual(matcher.match(override_word.upper() + "."), ["OVERRIDE_COMMAND_FOUND"])
+        self.assertEqual(matcher.match(" Shut down! ")[1][0], "shutdown_command")
+        self.assertEqual(matcher.match("Reboot now")[1][0], "reboot_command")
+        self.assertIsNone(matcher.match("what is the weather like"))
+
+
+class TestCommandFastPath(unittest.TestCase):
+    def setUp(self):
+        self.event_queue = BlockingEventQueue()
+        self.engine = ConversationEngine(self.event_queue, demo_mode=False)
+        self.engine.stream_playback = False
+        self.engine.command_matcher = CommandMatcher()
+
+    def bot_events(self):
+        # Requests for a response, the chat model is warmed up on every detection
+        return [event.content for _, _, event in self.event_queue.unrouted[BotEvent]
+                if event.content != ["WARM_UP_BOT"]]
+
+    def speak(self, transcript):
+        # Run the conversation up to listening to the user, then answer as the systems would
+        self.engine.conversation_cycle()
+        self.engine.set_tts_audio(event_data=AudioBuffer(np.zeros((1600, 1), dtype=np.int16), 16000))
+        self.engine.action_finished(event_data="TTSOperations")
+        self.engine.action_finished(event_data="AudioJawSync")
+        self.engine.set_inference_output(event_data=transcript)
+        self.engine.action_finished(event_data="STTOperations")
+
+    def test_command_skips_llm(self):
+        self.speak("Shut down.")
+
+        self.assertEqual(self.bot_events(), [])
+        self.assertEqual(self.engine.bot_response, command_locked_text)
+        self.assertEqual(list(self.engine.running_actions), ["scan_mode_on"])
+
+    def test_override_enters_command_mode(self):
+        self.speak(override_word)
+
+        self.assertTrue(self.engine.command_mode)
+        self.assertEqual(self.engine.action_graph.name, "command")
+        self.assertEqual(self.bot_events(), [])
+
+    def test_detection_warms_up_llm(self):
+        self.engine.conversation_cycle()
+
+        self.assertIn(["WARM_UP_BOT"], [event.content for _, _, event in self.event_queue.unrouted[BotEvent]])
+
+    def test_conversation_asks_llm(self):
+        self.speak("Hello there.")
+
+        self.assertEqual(self.bot_events(), [["GET_BOT_RESPONSE", "Hello there."]])
+        self.assertEqual(self.engine.running_actions, {"get_bot_engine_response": {"ChatbotOperations",
+                                                                                   "BOT_FINISHED"}})
+
+
+if __name__ == '__main__':
+    unittest.main()
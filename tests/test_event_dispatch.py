@@ -0,0 +1,92 @@
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+top_dir = Path(__file__).parent.parent
+
+sys.path.append(str(top_dir))
+
+from config.custom_events import TTSEvent, STTEvent
+from utils.event_dispatch import BlockingEventQueue, EventActor
+
+
+class RecordingActor(EventActor):
+    def __init__(self, event_queue, consumable_events, expected=1):
+        self.consumable_events = consumable_events
+        super().__init__(event_queue)
+        self.received = []
+        self.expected = expected
+        self.done = threading.Event()
+
+    def record(self, event_type=None, event_data=None):
+        self.received.append((event_type, event_data))
+        if len(self.received) >= self.expected:
+            self.done.set()
+        return True
+
+    def get_event_handlers(self):
+        return {"FIRST": self.record, "SECOND": self.record}
+
+    def get_consumable_events(self):
+        return self.consumable_events
+
+
+class TestBlockingEventQueue(unittest.TestCase):
+    def setUp(self):
+        self.event_queue = BlockingEventQueue()
+        self.actors = []
+
+    def tearDown(self):
+        for actor in self.actors:
+            actor.shutdown()
+            actor.join(1)
+
+    def make_actor(self, consumable_events, expected=1, start=True):
+        actor = RecordingActor(self.event_queue, consumable_events, expected)
+        actor.daemon = True
+        self.actors.append(actor)
+        if start:
+            actor.start()
+        return actor
+
+    def test_events_routed_by_type(self):
+        tts_actor = self.make_actor([TTSEvent])
+        stt_actor = self.make_actor([STTEvent])
+
+        self.event_queue.queue_addition(TTSEvent(["FIRST", "tts"], 1))
+        self.event_queue.queue_addition(STTEvent(["FIRST", "stt"], 1))
+
+        self.assertTrue(tts_actor.done.wait(1))
+        self.assertTrue(stt_actor.done.wait(1))
+        self.assertEqual(tts_actor.received, [("FIRST", "tts")])
+        self.assertEqual(stt_actor.received, [("FIRST", "stt")])
+
+    def test_priority_order_within_inbox(self):
+        actor = self.make_actor([TTSEvent], expected=2, start=False)
+
+        self.event_queue.queue_addition(TTSEvent(["SECOND", "low"], 2))
+        self.event_queue.queue_addition(TTSEvent(["FIRST", "high"], 1))
+        actor.start()
+
+        self.assertTrue(actor.done.wait(1))
+        self.assertEqual([data for _, data in actor.received], ["high", "low"])
+
+    def test_events_held_until_consumer_registered(self):
+        self.event_queue.queue_addition(TTSEvent(["FIRST"], 1))
+        actor = self.make_actor([TTSEvent])
+
+        self.assertTrue(actor.done.wait(1))
+        self.assertEqual(actor.received, [("FIRST", None)])
+
+    def test_shutdown_wakes_waiting_actor(self):
+        actor = self.make_actor([TTSEvent])
+
+        actor.shutdown()
+        actor.join(1)
+
+        self.assertFalse(actor.is_alive())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+top_dir = Path(__file__).parent.parent
+
+sys.path.append(str(top_dir))
+
+from hardware import jaw_controller
+from hardware.inventor_hat_controller import InventorHATCoreInit
+from hardware.jaw_controller import JawController
+
+
+class StubServo:
+    """
+    Records the pulse widths written, and can hold the scheduler inside a write while targets are set.
+    """
+
+    def __init__(self):
+        self.values = []
+        self.writing = threading.Event()
+        self.released = threading.Event()
+        self.released.set()
+
+    def value(self, pulse_width):
+        self.values.append(pulse_width)
+        self.writing.set()
+        self.released.wait()
+
+
+class TestJawController(unittest.TestCase):
+    def setUp(self):
+        self.servo = StubServo()
+        servo_patch = mock.patch.object(InventorHATCoreInit, "servo", self.servo)
+        servo_patch.start()
+        self.addCleanup(servo_patch.stop)
+
+    def start_controller(self, **kwargs):
+        # Without the thread running the constructor closes the jaw and waits for the servo to get there
+        with mock.patch.object(jaw_controller.time, "sleep"):
+            controller = JawController(**kwargs)
+        self.servo.writing.clear()
+        controller.start()
+        self.addCleanup(controller.join, 1)
+        self.addCleanup(controller.stop)
+        return controller
+
+    def wait_until_still(self, controller, timeout=2):
+        deadline = time.monotonic() + timeout
+        while controller.moving():
+            self.assertLess(time.monotonic(), deadline, "Servo did not reach its target")
+            time.sleep(0.01)
+
+    def test_targets_coalesced(self):
+        controller = self.start_controller(update_rate=100, attack_ms=0, release_ms=0)
+        close_pulse_width = controller.close_pulse_width
+
+        # Hold the scheduler in the first write while the next targets arrive
+        self.servo.released.clear()
+        controller.set_pulse_width(-10)
+        self.assertTrue(self.servo.writing.wait(1))
+        for pulse_width in (-20, -25, 0):
+            controller.set_pulse_width(pulse_width)
+        time.sleep(0.05)
+        self.servo.released.set()
+        self.wait_until_still(controller)
+
+        # Only the newest of the targets set during the write was followed
+        self.assertEqual(self.servo.values, [close_pulse_width, -10, 0])
+        self.assertEqual(controller.targets_set, 4)
+        self.assertEqual(controller.targets_coalesced, 2)
+        self.assertEqual(controller.writes, 2)
+
+        self.assertEqual(controller.lagged_writes, 2)
+        # The last target waited at least as long as the write was held
+        self.assertGreaterEqual(controller.max_lag, 0.05)
+        self.assertLessEqual(controller.max_lag, controller.total_lag)
+
+    def test_small_moves_suppressed(self):
+        controller = self.start_controller(min_pulse_delta=0.5)
+
+        controller.set_pulse_width(controller.close_pulse_width + 0.2)
+        time.sleep(0.05)
+
+        self.assertEqual(controller.writes, 0)
+        self.assertEqual(controller.writes_suppressed, 1)
+        self.assertEqual(self.servo.values, [controller.close_pulse_width])
+
+    def test_attack_faster_than_release(self):
+        controller = self.start_controller(update_rate=100, attack_ms=20, release_ms=60)
+        open_pulse_width, close_pulse_width = controller.open_pulse_width, controller.close_pulse_width
+
+        controller.open_jaw()
+        self.wait_until_still(controller)
+        opening = self.servo.values[1:]
+        controller.close_jaw()
+        self.wait_until_still(controller)
+        closing = self.servo.values[1 + len(opening):]
+
+        # Each write covers the attack or release fraction of the distance left, until within the minimum delta
+        self.assertAlmostEqual(opening[0],
+                               close_pulse_width + (open_pulse_width - close_pulse_width) * controller.attack)
+        self.assertAlmostEqual(closing[0], opening[-1] + (close_pulse_width - opening[-1]) * controller.release)
+        self.assertLess(abs(opening[-1] - open_pulse_width), controller.min_pulse_delta)
+        self.assertLess(abs(closing[-1] - close_pulse_width), controller.min_pulse_delta)
+        self.assertEqual(opening, sorted(opening))
+        self.assertEqual(closing, sorted(closing, reverse=True))
+        self.assertGreater(len(closing), len(opening))
+
+        self.assertEqual(controller.writes, len(opening) + len(closing))
+        # Only the first write towards each target counts towards the lag
+        self.assertEqual(controller.lagged_writes, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
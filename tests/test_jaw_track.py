@@ -0,0 +1,56 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+top_dir = Path(__file__).parent.parent
+
+sys.path.append(str(top_dir))
+
+from utils.audio_buffer import AudioBuffer
+from utils.jaw_track import jaw_track_path, buffer_jaw_track, save_jaw_track, read_jaw_track
+
+RATE = 16000
+
+
+def tts_audio(amplitude, channels=1):
+    # 0.1 seconds of silence then 0.1 seconds of a tone
+    tone = amplitude * np.sin(2 * np.pi * 200 * np.arange(RATE // 10) / RATE)
+    samples = np.concatenate((np.zeros(RATE // 10), tone)).astype(np.int16)
+    return AudioBuffer(np.repeat(samples.reshape(-1, 1), channels, axis=1), RATE)
+
+
+class TestJawTrack(unittest.TestCase):
+    def test_envelope_frame_aligned(self):
+        envelope = buffer_jaw_track(tts_audio(10000), frame_ms=20)
+
+        self.assertEqual(len(envelope), 10)
+        self.assertTrue(np.all(envelope[:5] == 0))
+        np.testing.assert_allclose(envelope[5:], 10000 / np.sqrt(2), rtol=0.01)
+
+    def test_stereo_mixed_to_mono(self):
+        np.testing.assert_allclose(buffer_jaw_track(tts_audio(10000, channels=2), frame_ms=20),
+                                   buffer_jaw_track(tts_audio(10000), frame_ms=20), rtol=0.01)
+
+    def test_envelope_kept_in_metadata(self):
+        audio = tts_audio(10000)
+        envelope = buffer_jaw_track(audio, frame_ms=20)
+
+        self.assertIs(buffer_jaw_track(audio, frame_ms=20), envelope)
+        self.assertEqual(len(buffer_jaw_track(audio, frame_ms=10)), 20)
+
+    def test_saved_track_read_back(self):
+        envelope = buffer_jaw_track(tts_audio(10000), frame_ms=20)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            track_path = jaw_track_path(Path(temp_dir) / "tts_output.wav")
+            save_jaw_track(track_path, envelope, 20)
+
+            saved_envelope, frame_ms = read_jaw_track(track_path)
+            np.testing.assert_array_equal(saved_envelope, envelope)
+            self.assertEqual(frame_ms, 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import logging
+import queue
+import sys
+import unittest
+from logging.handlers import QueueListener
+from pathlib import Path
+
+top_dir = Path(__file__).parent.parent
+
+sys.path.append(str(top_dir))
+
+from utils.logging_system import DeferredQueueHandler, RateLimitFilter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_record(name, msg, *args, level=logging.DEBUG):
+    return logging.LogRecord(name, level, __file__, 0, msg, args, None)
+
+
+class TestRateLimitFilter(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.rate_limit = RateLimitFilter({"jaw": 2}, clock=self.clock)
+
+    def test_limits_each_message_per_second(self):
+        passed = [self.rate_limit.filter(make_record("jaw", "RMS: %s", rms)) for rms in range(5)]
+        self.assertEqual(passed, [True, True, False, False, False])
+        # Another message from the same logger has its own limit
+        self.assertTrue(self.rate_limit.filter(make_record("jaw", "Jaw closed")))
+
+    def test_reports_dropped_records_in_the_next_second(self):
+        for rms in range(5):
+            self.rate_limit.filter(make_record("jaw", "RMS: %s", rms))
+
+        self.clock.now = 1.0
+        record = make_record("jaw", "RMS: %s", 7)
+        self.assertTrue(self.rate_limit.filter(record))
+        self.assertEqual(record.getMessage(), "RMS: 7 (3 similar messages dropped)")
+
+    def test_never_drops_warnings_or_other_loggers(self):
+        for _ in range(5):
+            self.assertTrue(self.rate_limit.filter(make_record("jaw", "Fell behind", level=logging.WARNING)))
+            self.assertTrue(self.rate_limit.filter(make_record("conversation", "Action finished")))
+
+
+class CollectingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(self.format(record))
+
+
+class TestDeferredQueueHandler(unittest.TestCase):
+    def test_records_are_formatted_by_the_listener(self):
+        handler = DeferredQueueHandler(queue.SimpleQueue())
+        collected = CollectingHandler()
+        listener = QueueListener(handler.queue, collected)
+        logger = logging.getLogger("test_deferred_queue_handler")
+        logger.propagate = False
+        logger.setLevel(logging.DEBUG)
+        logger.addHandler(handler)
+
+        logger.debug("Pulse width: %.1f", 1500.04)
+        logger.removeHandler(handler)
+        record = handler.queue.get()
+        # Still unformatted on the queue
+        self.assertEqual(record.msg, "Pulse width: %.1f")
+        handler.queue.put(record)
+
+        listener.start()
+        listener.stop()
+
+        self.assertEqual(collected.messages, ["Pulse width: 1500.0"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+top_dir = Path(__file__).parent.parent
+
+sys.path.append(str(top_dir))
+
+from utils.model_manager import ModelManager
+
+MB = 1024 * 1024
+
+
+class FakeModelManager(ModelManager):
+    # Each model loaded takes 100 MB out of 300 MB of memory
+    def available_memory(self):
+        return (300 - 100 * sum(managed.loaded for managed in self.models.values())) * MB
+
+
+class TestModelManager(unittest.TestCase):
+    def setUp(self):
+        self.loaded = []
+        self.warmed_up = []
+
+    def loader(self, name):
+        def load():
+            self.loaded.append(name)
+            return f"{name} model"
+        return load
+
+    def register(self, manager, name):
+        manager.register(name, self.loader(name), warm_up=self.warmed_up.append)
+
+    def test_policies(self):
+        manager = FakeModelManager(policies={"stt": "resident", "tts": "preload"}, min_available_mb=0)
+        for name in ("stt", "tts", "chat"):
+            self.register(manager, name)
+
+        self.assertEqual(self.loaded, ["stt", "tts"])
+        self.assertEqual(self.warmed_up, ["stt model", "tts model"])
+
+        with manager.use("chat") as model:
+            self.assertEqual(model, "chat model")
+        self.assertEqual(self.loaded, ["stt", "tts", "chat"])
+
+    def test_evicts_least_recently_used_under_pressure(self):
+        manager = FakeModelManager(policies={"stt": "resident"}, min_available_mb=150)
+        for name in ("stt", "tts", "chat"):
+            self.register(manager, name)
+
+        with manager.use("tts"):
+            pass
+        # Only 100 MB would be left with the chat model loaded too, so the TTS model is unloaded first
+        with manager.use("chat"):
+            pass
+
+        stats = manager.stats()
+        self.assertTrue(stats["stt"]["loaded"])
+        self.assertFalse(stats["tts"]["loaded"])
+        self.assertEqual(stats["tts"]["unloads"], 1)
+        self.assertTrue(stats["chat"]["loaded"])
+
+        with manager.use("tts") as model:
+            self.assertEqual(model, "tts model")
+        self.assertEqual(manager.stats()["tts"]["loads"], 2)
+
+    def test_models_in_use_are_not_evicted(self):
+        manager = FakeModelManager(policies={}, min_available_mb=150)
+        for name in ("tts", "chat"):
+            self.register(manager, name)
+
+        with manager.use("tts"):
+            with manager.use("chat"):
+                pass
+            self.assertEqual(manager.relieve_memory_pressure(), ["chat"])
+            self.assertTrue(manager.stats()["tts"]["loaded"])
+            with self.assertRaises(RuntimeError):
+                manager.unload("tts")
+
+    def test_stats(self):
+        manager = FakeModelManager(policies={"stt": "preload"}, warm_up=False)
+        self.register(manager, "stt")
+        manager.unload("stt")
+
+        stats = manager.stats()["stt"]
+        self.assertEqual(self.warmed_up, [])
+        self.assertFalse(stats["loaded"])
+        self.assertEqual((stats["loads"], stats["unloads"]), (1, 1))
+        self.assertGreaterEqual(stats["load_duration"], 0)
+        self.assertGreaterEqual(stats["unload_duration"], 0)
+        self.assertGreaterEqual(stats["estimated_bytes"], 0)
+
+    def test_loading_does_not_block_other_models(self):
+        manager = FakeModelManager(policies={"stt": "preload"}, min_available_mb=0)
+        self.register(manager, "stt")
+        loading = threading.Event()
+        finish_loading = threading.Event()
+
+        def load_slowly():
+            loading.set()
+            finish_loading.wait(2)
+            return "chat model"
+
+        manager.register("chat", load_slowly)
+        results = []
+        load_threads = [threading.Thread(target=lambda: results.append(manager.acquire("chat"))) for _ in range(2)]
+        for thread in load_threads:
+            thread.start()
+        self.assertTrue(loading.wait(1))
+
+        # The model already loaded can be used while the other one loads
+        with manager.use("stt") as model:
+            self.assertEqual(model, "stt model")
+        self.assertFalse(manager.stats()["chat"]["loaded"])
+
+        finish_loading.set()
+        for thread in load_threads:
+            thread.join(1)
+        # Both systems asking for it got the one model
+        self.assertEqual(results, ["chat model", "chat model"])
+        self.assertEqual(manager.stats()["chat"]["loads"], 1)
+
+    def test_invalid_policy(self):
+        manager = FakeModelManager(policies={"stt": "forever"})
+        with self.assertRaises(ValueError):
+            self.register(manager, "stt")
+
+
+if __name__ == '__main__':
+    unittest.main()
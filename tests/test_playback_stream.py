@@ -0,0 +1,119 @@
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+top_dir = Path(__file__).parent.parent
+
+sys.path.append(str(top_dir))
+
+from components import audio_system
+from components.audio_system import PlaybackStream
+
+RATE = 1000
+CHUNK = 50
+
+
+class StubOutputStream:
+    """
+    Output stream calling back for a chunk every chunk length, like PortAudio, until stopped or told to stall.
+    """
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.played = []
+        self.stalled = False
+        self.active = True
+        self.closed = False
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while not self.closed:
+            if self.active and not self.stalled:
+                data, flag = self.callback(None, CHUNK, {}, 0)
+                self.played.append(np.frombuffer(data, dtype=np.int16))
+                if flag != audio_system.pyaudio.paContinue:
+                    self.active = False
+            time.sleep(CHUNK / RATE)
+
+    def is_active(self):
+        return self.active
+
+    def stop_stream(self):
+        self.active = False
+
+    def start_stream(self):
+        self.active = True
+
+    def close(self):
+        self.closed = True
+
+
+class StubPyAudio:
+    def __init__(self):
+        self.streams = []
+
+    def open(self, stream_callback=None, **kwargs):
+        self.streams.append(StubOutputStream(stream_callback))
+        return self.streams[-1]
+
+
+class TestPlaybackStream(unittest.TestCase):
+    def setUp(self):
+        self.p = StubPyAudio()
+        self.playback_stream = PlaybackStream(self.p, RATE, 1, chunk=CHUNK)
+        self.stream = self.p.streams[0]
+        self.addCleanup(self.playback_stream.close)
+
+    @staticmethod
+    def clip(seconds):
+        return np.arange(1, int(RATE * seconds) + 1, dtype=np.int16).reshape(-1, 1)
+
+    def test_plays_clip(self):
+        clip = self.clip(0.2)
+        start_time = time.monotonic()
+        self.playback_stream.play(clip)
+
+        self.assertGreaterEqual(time.monotonic() - start_time, 0.2)
+        played = np.concatenate(self.stream.played)
+        played = played[np.flatnonzero(played)[0]:][:len(clip)]
+        np.testing.assert_array_equal(played, clip[:, 0])
+
+    def test_stalled_callback_times_out(self):
+        self.stream.stalled = True
+
+        with mock.patch.object(audio_system, "playback_timeout_margin", 0.2):
+            start_time = time.monotonic()
+            with self.assertRaises(RuntimeError):
+                self.playback_stream.play(self.clip(0.1))
+
+        self.assertLess(time.monotonic() - start_time, 1)
+        self.assertIsNone(self.playback_stream.clip)
+
+    def test_inactive_stream_fails_fast(self):
+        self.stream.active = False
+
+        start_time = time.monotonic()
+        with self.assertRaises(RuntimeError):
+            self.playback_stream.play(self.clip(1))
+        self.assertLess(time.monotonic() - start_time, 0.5)
+
+    def test_idle_stream_stops_and_restarts(self):
+        with mock.patch.object(audio_system, "playback_idle_seconds", 0.1):
+            time.sleep(0.3)
+            self.assertFalse(self.stream.is_active())
+            callbacks = len(self.stream.played)
+            time.sleep(0.2)
+            self.assertEqual(len(self.stream.played), callbacks)
+
+            self.playback_stream.play(self.clip(0.1))
+        self.assertGreater(len(self.stream.played), callbacks)
+
+
+if __name__ == '__main__':
+    unittest.main()
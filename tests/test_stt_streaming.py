@@ -0,0 +1,139 @@
+import sys
+import time
+import unittest
+from itertools import count
+from pathlib import Path
+
+import numpy as np
+
+top_dir = Path(__file__).parent.parent
+
+sys.path.append(str(top_dir))
+
+from components.stt_streaming import StreamingTranscriber
+
+RATE = 16000
+WORD_SECONDS = 0.5
+
+
+def speech(words):
+    # Each word is half a second of samples holding its number, so the fake model can tell where the words are,
+    # followed by the silence that ends the recording
+    return np.repeat(np.concatenate((np.arange(1, words + 1), [0])), int(WORD_SECONDS * RATE)).astype(np.int16)
+
+
+class FakeWhisper:
+    """
+    Transcribes the audio made by speech(), guessing differently each time at a word cut off by the end of the audio,
+    as Whisper does at a word still being spoken.
+    """
+
+    def __init__(self, agree=True):
+        self.agree = agree
+        self.calls = count()
+        self.transcribed_seconds = []
+
+    def transcribe(self, samples, **options):
+        self.transcribed_seconds.append(len(samples) / RATE)
+        call = next(self.calls)
+        values = np.round(samples * 32768).astype(int)
+        boundaries = np.flatnonzero(np.diff(values)) + 1
+        words = []
+        for start, end in zip(np.concatenate(([0], boundaries)), np.concatenate((boundaries, [len(values)]))):
+            if values[start] == 0:
+                continue
+            word = f"w{values[start]}"
+            if end == len(values) or not self.agree:
+                word = f"{word}-guess{call}"
+            words.append({"word": f" {word}", "end": end / RATE})
+        return {"segments": [{"words": words}]}
+
+
+class SlowWhisper(FakeWhisper):
+    def transcribe(self, samples, **options):
+        time.sleep(0.1)
+        return super().transcribe(samples, **options)
+
+
+def stream(transcriber, samples, chunk=1024):
+    # Transcribes each step as soon as it is added, as the worker would if transcribing took no time
+    committed = []
+    for start in range(0, len(samples), chunk):
+        if transcriber.add_audio(samples[start:start + chunk]):
+            committed.extend(transcriber.step())
+    return committed
+
+
+class TestStreamingTranscriber(unittest.TestCase):
+    def test_commits_while_speaking(self):
+        transcriber = StreamingTranscriber(FakeWhisper(), RATE, step_seconds=0.25)
+
+        committed = stream(transcriber, speech(8))
+
+        self.assertEqual(committed, [f"w{word}" for word in range(1, len(committed) + 1)])
+        self.assertGreaterEqual(len(committed), 6)
+        self.assertEqual(transcriber.finish(), " ".join(f"w{word}" for word in range(1, 9)))
+
+    def test_committed_word_times(self):
+        transcriber = StreamingTranscriber(FakeWhisper(), RATE, step_seconds=0.25)
+
+        stream(transcriber, speech(6))
+        transcriber.finish()
+
+        ends = [end for _, end in transcriber.committed]
+        self.assertTrue(np.allclose(ends, WORD_SECONDS * np.arange(1, 7)))
+
+    def test_transcribes_only_uncommitted_audio(self):
+        model = FakeWhisper()
+        transcriber = StreamingTranscriber(model, RATE, step_seconds=0.25)
+
+        stream(transcriber, speech(20))
+        transcriber.finish()
+
+        self.assertLess(max(model.transcribed_seconds), 1.5)
+
+    def test_max_window_commits_without_agreement(self):
+        model = FakeWhisper(agree=False)
+        transcriber = StreamingTranscriber(model, RATE, step_seconds=0.5, max_window_seconds=2)
+
+        committed = stream(transcriber, speech(12))
+
+        self.assertTrue(committed)
+        self.assertLessEqual(max(model.transcribed_seconds), 2 + 1024 / RATE)
+
+    def test_window_not_reallocated(self):
+        transcriber = StreamingTranscriber(FakeWhisper(), RATE, step_seconds=0.25)
+        buffer = transcriber.buffer
+
+        stream(transcriber, speech(20))
+
+        self.assertIs(transcriber.buffer, buffer)
+
+    def test_worker_does_not_hold_up_recording(self):
+        model = SlowWhisper()
+        transcriber = StreamingTranscriber(model, RATE, step_seconds=0.25)
+        transcriber.start()
+
+        samples = speech(8)
+        add_times = []
+        for start in range(0, len(samples), 1024):
+            start_time = time.perf_counter()
+            transcriber.add_audio(samples[start:start + 1024])
+            add_times.append(time.perf_counter() - start_time)
+
+        self.assertLess(max(add_times), 0.05)
+        self.assertEqual(transcriber.finish(), " ".join(f"w{word}" for word in range(1, 9)))
+        # Steps added while a transcription ran were covered by the next one, rather than each transcribed in turn
+        self.assertLess(len(model.transcribed_seconds), len(samples) / RATE / 0.25)
+        self.assertIsNone(transcriber.worker)
+
+    def test_finish_without_audio(self):
+        model = FakeWhisper()
+        transcriber = StreamingTranscriber(model, RATE)
+
+        self.assertEqual(transcriber.finish(), "")
+        self.assertEqual(model.transcribed_seconds, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import sys
+import unittest
+from pathlib import Path
+
+top_dir = Path(__file__).parent.parent
+
+sys.path.append(str(top_dir))
+
+from components.stt_system import STTOperations, STTHandlerInterface
+from config.custom_events import ConversationDoneEvent, STTDoneEvent
+from utils.event_dispatch import BlockingEventQueue
+
+
+class FailingSTTHandler(STTHandlerInterface):
+    # Whisper fails on the recorded speech
+    def initiate_recording(self, max_seconds=0, silence_threshold=0, silence_duration=0):
+        pass
+
+    def run_inference(self):
+        raise RuntimeError("CUDA out of memory")
+
+
+class TestSTTOperations(unittest.TestCase):
+    def setUp(self):
+        self.event_queue = BlockingEventQueue()
+        self.stt = STTOperations(self.event_queue, test_mode=True)
+
+    def produced(self, event_class):
+        return [event.content for _, _, event in self.event_queue.unrouted[event_class]]
+
+    def test_transcribes_speech(self):
+        self.stt.record_and_infer()
+
+        self.assertEqual(len(self.produced(STTDoneEvent)), 1)
+        self.assertEqual(self.produced(ConversationDoneEvent), [["CONVERSATION_ACTION_FINISHED", "STTOperations"]])
+
+    def test_failed_transcription_finishes_action(self):
+        self.stt.STT_handler = FailingSTTHandler()
+
+        with self.assertLogs("components.stt_system", level="ERROR"):
+            self.stt.record_and_infer()
+
+        # An empty transcript, which restarts the conversation
+        self.assertEqual(self.produced(STTDoneEvent), [["STT_FINISHED", ""]])
+        self.assertEqual(self.produced(ConversationDoneEvent), [["CONVERSATION_ACTION_FINISHED", "STTOperations"]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+top_dir = Path(__file__).parent.parent
+
+sys.path.append(str(top_dir))
+
+from utils.audio_buffer import AudioBuffer
+from utils.tts_cache import TTSCache
+
+
+def generated_audio(value, frames=50):
+    # 50 frames of 16-bit mono are saved as a WAV of a bit under 150 bytes
+    return AudioBuffer(np.full(frames, value, dtype=np.int16), 22050)
+
+
+class TestTTSCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self.temp_dir.name) / "cache"
+        self.cache = TTSCache(self.cache_dir, engine="nix", voice="stochastic", max_bytes=350)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_load_after_store(self):
+        self.cache.store("Hello", generated_audio(1))
+        other_cache = TTSCache(self.cache_dir, engine="nix", voice="stochastic", max_bytes=350)
+
+        audio = other_cache.load("Hello")
+        self.assertEqual(audio.rate, 22050)
+        np.testing.assert_array_equal(audio.mono(), np.full(50, 1, dtype=np.int16))
+        self.assertIsNone(other_cache.load("Goodbye"))
+        self.assertEqual((other_cache.hits, other_cache.misses), (1, 1))
+
+    def test_jaw_track_cached_with_audio(self):
+        audio = generated_audio(1)
+        audio.metadata.update(jaw_envelope=np.array([1.0, 2.0], dtype=np.float32), jaw_frame_ms=20)
+        self.cache.store("Hello", audio)
+
+        loaded = TTSCache(self.cache_dir, engine="nix", voice="stochastic", max_bytes=350).load("Hello")
+        np.testing.assert_array_equal(loaded.metadata["jaw_envelope"], [1.0, 2.0])
+        self.assertEqual(loaded.metadata["jaw_frame_ms"], 20)
+
+    def test_key_includes_engine_and_voice(self):
+        other_voice = TTSCache(self.cache_dir, engine="nix", voice="deterministic", max_bytes=350)
+        self.cache.store("Hello", generated_audio(1))
+
+        self.assertIsNone(other_voice.lookup("Hello"))
+
+    def test_least_recently_used_evicted(self):
+        for value, text in enumerate(("first", "second")):
+            self.cache.store(text, generated_audio(value))
+            time.sleep(0.01)
+
+        # Use the first entry so the second becomes the least recently used
+        self.cache.lookup("first")
+        time.sleep(0.01)
+        self.cache.store("third", generated_audio(3))
+
+        self.assertIsNotNone(self.cache.lookup("first"))
+        self.assertIsNone(self.cache.lookup("second"))
+        self.assertIsNotNone(self.cache.lookup("third"))
+
+    def test_pinned_never_evicted(self):
+        self.cache.store("greeting", generated_audio(1, frames=1000), pinned=True)
+        self.cache.store("response", generated_audio(2))
+
+        self.assertTrue(os.path.exists(self.cache.lookup("greeting")))
+
+    def test_pinned_kept_in_memory(self):
+        audio = generated_audio(1)
+        self.cache.store("greeting", audio, pinned=True)
+        os.remove(self.cache.lookup("greeting"))
+
+        self.assertIs(self.cache.load("greeting"), audio)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+top_dir = Path(__file__).parent.parent
+
+sys.path.append(str(top_dir))
+
+from utils.voice_activity import VoiceActivityDetector
+
+RATE = 16000
+CHUNK = 1024
+
+
+class TestVoiceActivityDetector(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        self.detector = VoiceActivityDetector(RATE)
+        # Let the detector learn the noise floor of a quiet room
+        self.feed(self.noise(1.0))
+
+    def noise(self, seconds, amplitude=30):
+        return self.rng.normal(0, amplitude, int(RATE * seconds)).astype(np.int16)
+
+    def speech(self, seconds, fundamental=150):
+        # Harmonic tone with a syllable rate amplitude modulation, close enough to voiced speech for the features
+        t = np.arange(int(RATE * seconds)) / RATE
+        voiced = sum(np.sin(2 * np.pi * fundamental * harmonic * t) / harmonic for harmonic in range(1, 8))
+        return (voiced * (0.6 + 0.4 * np.sin(2 * np.pi * 4 * t)) * 3000).astype(np.int16) + self.noise(seconds)
+
+    def feed(self, audio):
+        return any(self.detector.process(audio[i:i + CHUNK]) for i in range(0, len(audio), CHUNK))
+
+    def test_sustained_speech_detected(self):
+        self.assertTrue(self.feed(self.speech(1.0)))
+
+    def test_short_speech_ignored(self):
+        self.assertFalse(self.feed(np.concatenate((self.speech(0.2), self.noise(1.0)))))
+
+    def test_click_ignored(self):
+        click = self.noise(1.0)
+        click[1000:1200] = self.rng.normal(0, 15000, 200).astype(np.int16)
+        self.assertFalse(self.feed(click))
+
+    def test_loud_broadband_noise_ignored(self):
+        self.assertFalse(self.feed(self.noise(2.0, amplitude=3000)))
+
+    def test_reset_clears_partial_detection(self):
+        # Either half alone is too short, together they would be detected
+        self.assertFalse(self.feed(self.speech(0.25)))
+        self.detector.reset()
+        self.assertFalse(self.feed(self.speech(0.25)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ActionNode:
+    def __init__(self, name, action, after, tokens):
+        self.name = name
+        self.action = action
+        self.after = frozenset(after)
+        self.tokens = frozenset(tokens)
+
+
+class ActionGraph:
+    """
+    A conversation as a graph of actions, compiled once from the config into bound callables. Every action runs as
+    soon as the actions it comes after have finished, so actions that do not depend on each other run at the same time
+    and a conversation takes as long as its slowest chain of actions, rather than the sum of them all.
+    """
+
+    def __init__(self, name, spec, bind, tokens):
+        """
+        :param name: name of the graph, for logging
+        :param spec: dict of node name to the names of the nodes it comes after, or to a dict with 'after' and the
+        'action' to run, so the same action can be run by more than one node
+        :param bind: callable returning the callable that runs an action, given its name
+        :param tokens: callable returning the results an action has to hand back before it has finished, given its name
+        """
+        self.name = name
+        self.nodes = {}
+        for node_name, node_spec in spec.items():
+            if isinstance(node_spec, dict):
+                action_name, after = node_spec.get('action', node_name), node_spec.get('after', [])
+            else:
+                action_name, after = node_name, node_spec
+            self.nodes[node_name] = ActionNode(node_name, bind(action_name), after, tokens(action_name))
+
+        self.order = self.sort()
+
+        logger.debug(f"Compiled action graph {name}: {[node.name for node in self.order]}")
+
+    def sort(self):
+        """
+        Order the nodes so every node comes after the nodes it depends on, otherwise keeping the order of the config.
+        :return:
+        """
+        order = []
+        visiting = set()
+        visited = set()
+
+        def visit(node):
+            if node.name in visited:
+                return
+            if node.name in visiting:
+                raise ValueError(f'Circular action dependency in {self.name} found at: {node.name}')
+            visiting.add(node.name)
+            for dependency in node.after:
+                if dependency not in self.nodes:
+                    raise ValueError(f'{node.name} in {self.name} comes after unknown action: {dependency}')
+                visit(self.nodes[dependency])
+            visiting.discard(node.name)
+            visited.add(node.name)
+            order.append(node)
+
+        for node in self.nodes.values():
+            visit(node)
+
+        return order
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def ready(self, completed, running):
+        """
+        :param completed: names of the nodes that have finished
+        :param running: names of the nodes that have been started but not finished
+        :return: the nodes that can be started
+        """
+        return [node for node in self.order
+                if node.name not in completed and node.name not in running and node.after <= completed]
@@ -0,0 +1,64 @@
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class AudioBuffer:
+    """
+    Audio held in memory, passed between the TTS, jaw and STT systems in events rather than through WAV files.
+    Metadata carries anything worked out about the audio along the way (e.g. the text spoken, its jaw track).
+    """
+
+    def __init__(self, samples, rate, **metadata):
+        """
+        :param samples: int16 samples, 1D for mono or of shape (frames, channels)
+        :param rate: sample rate
+        :param metadata:
+        """
+        samples = np.asarray(samples)
+        self.samples = samples.reshape(-1, 1) if samples.ndim == 1 else samples
+        self.rate = rate
+        self.metadata = metadata
+
+    @classmethod
+    def from_float(cls, samples, rate, **metadata):
+        """
+        Create from float samples in the range -1 to 1, as produced by TTS models.
+        :param samples:
+        :param rate:
+        :param metadata:
+        :return:
+        """
+        return cls((np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16), rate, **metadata)
+
+    @classmethod
+    def from_file(cls, audio_file, **metadata):
+        # Only needed for audio on disk, which in-memory audio never touches
+        import soundfile as sf
+
+        samples, rate = sf.read(audio_file, dtype="int16", always_2d=True)
+        return cls(samples, rate, **metadata)
+
+    def to_file(self, audio_file):
+        import soundfile as sf
+
+        sf.write(audio_file, self.samples, self.rate)
+        logger.debug(f"Saved {self.duration:.2f} seconds of audio to {audio_file}")
+
+    @property
+    def channels(self):
+        return self.samples.shape[1]
+
+    @property
+    def duration(self):
+        return len(self.samples) / self.rate
+
+    def mono(self):
+        """
+        :return: 1D int16 samples, channels are averaged
+        """
+        if self.channels == 1:
+            return self.samples[:, 0]
+        return self.samples.mean(axis=1).astype(np.int16)
@@ -0,0 +1,70 @@
+import numpy as np
+
+
+class EnvelopeFeatures:
+    """
+    RMS envelope features of int16 audio. Samples are converted to float32 before squaring, so loud audio cannot
+    overflow and wrap as it does when squaring int16 samples. The float32 buffer is preallocated and reused for every
+    chunk, only growing if a larger batch of samples than it holds is passed in.
+    """
+
+    def __init__(self, frame_length, batch_frames=1):
+        """
+        :param frame_length: samples per frame
+        :param batch_frames: number of frames the buffer holds up front, for batching several chunks in one call
+        """
+        self.frame_length = frame_length
+        self.buffer = np.empty(frame_length * batch_frames, dtype=np.float32)
+
+    def load(self, samples):
+        """
+        Copy samples into the float32 buffer.
+        :param samples:
+        :return: view of the buffer holding the samples
+        """
+        if len(samples) > len(self.buffer):
+            self.buffer = np.empty(len(samples), dtype=np.float32)
+        loaded = self.buffer[:len(samples)]
+        loaded[:] = samples
+        return loaded
+
+    def load_frames(self, samples):
+        """
+        Copy samples into the float32 buffer as frames, the last frame is padded with silence.
+        :param samples:
+        :return: view of the buffer of shape (frame count, frame length)
+        """
+        frame_count = -(-len(samples) // self.frame_length)
+        if frame_count * self.frame_length > len(self.buffer):
+            self.buffer = np.empty(frame_count * self.frame_length, dtype=np.float32)
+        frames = self.buffer[:frame_count * self.frame_length]
+        frames[:len(samples)] = samples
+        frames[len(samples):] = 0
+        return frames.reshape(frame_count, self.frame_length)
+
+    def rms(self, samples):
+        """
+        RMS of a whole chunk.
+        :param samples: int16 samples
+        :return:
+        """
+        if len(samples) == 0:
+            return 0.0
+        loaded = self.load(samples)
+        return float(np.sqrt(np.dot(loaded, loaded) / len(loaded)))
+
+    def frame_rms(self, samples):
+        """
+        RMS of each frame of the samples, so several chunks can be batched into one call.
+        :param samples: int16 samples
+        :return: float32 array with one RMS value per frame
+        """
+        return self.rms_of_frames(self.load_frames(samples))
+
+    def rms_of_frames(self, frames):
+        """
+        RMS of each frame of frames already loaded into the buffer.
+        :param frames: view returned by load_frames
+        :return: float32 array with one RMS value per frame
+        """
+        return np.sqrt(np.einsum("ij,ij->i", frames, frames) / self.frame_length)
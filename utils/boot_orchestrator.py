@@ -0,0 +1,145 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class BootComponent:
+    def __init__(self, name, factory, depends_on):
+        self.name = name
+        self.factory = factory
+        self.depends_on = list(depends_on)
+        self.system = None
+        self.error = None
+        self.booted = threading.Event()
+        self.started = False
+        self.start_offset = None
+        self.init_duration = None
+        self.ready_duration = None
+
+
+class BootOrchestrator:
+    """
+    Builds and starts systems concurrently, each one only waiting on the systems it depends on, so total boot time is
+    bounded by the slowest chain of dependencies rather than the sum of every system.
+    """
+
+    def __init__(self, ready_timeout=None):
+        self.components = {}
+        self.ready_timeout = ready_timeout
+        self.boot_start_time = None
+
+        logger.debug("Initialized")
+
+    def add(self, name, factory, depends_on=()):
+        """
+        Register a system to boot.
+        :param name: name used for dependencies and the boot report
+        :param factory: callable that builds the system, any model loading or hardware setup happens in here
+        :param depends_on: names of the systems that must be ready before this one is built
+        :return:
+        """
+        if name in self.components:
+            raise ValueError(f'System already registered: {name}')
+
+        self.components[name] = BootComponent(name, factory, depends_on)
+
+    def check_dependencies(self):
+        visiting = set()
+        visited = set()
+
+        def visit(name):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f'Circular boot dependency found at: {name}')
+            visiting.add(name)
+            for dependency in self.components[name].depends_on:
+                if dependency not in self.components:
+                    raise ValueError(f'{name} depends on unknown system: {dependency}')
+                visit(dependency)
+            visiting.discard(name)
+            visited.add(name)
+
+        for component_name in self.components:
+            visit(component_name)
+
+    def boot_component(self, component):
+        try:
+            for dependency in component.depends_on:
+                self.components[dependency].booted.wait()
+                if self.components[dependency].error is not None:
+                    raise RuntimeError(f'{component.name} not started, dependency {dependency} failed to boot')
+
+            component.start_offset = time.perf_counter() - self.boot_start_time
+            logger.debug(f"Initializing {component.name}")
+            component.system = component.factory()
+            component.init_duration = time.perf_counter() - self.boot_start_time - component.start_offset
+
+            logger.debug(f"Starting {component.name} thread")
+            component.system.start()
+            component.started = True
+
+            # Systems that can report readiness are waited on, anything else is ready once started
+            if hasattr(component.system, "wait_until_ready"):
+                if not component.system.wait_until_ready(self.ready_timeout):
+                    raise TimeoutError(f'{component.name} did not become ready within {self.ready_timeout} seconds')
+            component.ready_duration = (time.perf_counter() - self.boot_start_time - component.start_offset -
+                                        component.init_duration)
+            logger.debug(f"Started {component.name} thread")
+        except Exception as e:
+            component.error = e
+            logger.exception(f"{component.name} failed to boot: {e}")
+        finally:
+            component.booted.set()
+
+    def boot(self):
+        """
+        Boot every registered system, returns the systems in the order they were registered. If any system fails to
+        boot, the ones already started are shut down before its error is raised.
+        :return:
+        """
+        self.check_dependencies()
+        self.boot_start_time = time.perf_counter()
+
+        threads = [threading.Thread(target=self.boot_component, args=(component,), daemon=True,
+                                    name=f"boot-{component.name}") for component in self.components.values()]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.report()
+
+        for component in self.components.values():
+            if component.error is not None:
+                self.shutdown_started()
+                raise component.error
+
+        return [component.system for component in self.components.values()]
+
+    def shutdown_started(self):
+        for component in self.components.values():
+            if not component.started:
+                continue
+            logger.debug(f"Shutting down {component.name}")
+            try:
+                # Actors shut down, anything else (e.g. the LED monitor) stops
+                if hasattr(component.system, "shutdown"):
+                    component.system.shutdown()
+                else:
+                    component.system.stop()
+            except Exception as e:
+                logger.exception(f"{component.name} failed to shut down: {e}")
+
+    def report(self):
+        total = time.perf_counter() - self.boot_start_time
+        logger.info(f"Boot finished in {total:.2f} seconds")
+
+        for component in sorted(self.components.values(), key=lambda c: c.start_offset or 0.0):
+            if component.error is not None:
+                logger.info(f"  {component.name}: failed - {component.error}")
+            else:
+                logger.info(f"  {component.name}: started at {component.start_offset:.2f}s, init "
+                            f"{component.init_duration:.2f}s, ready after {component.ready_duration:.2f}s")
@@ -0,0 +1,124 @@
+import logging
+import math
+import threading
+
+from utils.string_ops import split_sentences
+
+logger = logging.getLogger(__name__)
+
+
+class ChatHistory:
+    """
+    Conversation history for the chat backends, kept within a token budget so the prompt (and the time the LLM takes to
+    read it) stops growing after the first few turns. The most recent turns are kept word for word; once they go over
+    their share of the budget the oldest are moved into a short summary of the conversation so far, which keeps within
+    the rest of the budget by forgetting its oldest lines. Tokens are estimated from the length of the text, as the
+    tokenizers differ between backends.
+    """
+
+    def __init__(self, token_budget=1024, summary_token_budget=256, min_turns=1, chars_per_token=4):
+        """
+        :param token_budget: most tokens of history, including the summary, sent with each message
+        :param summary_token_budget: tokens of the budget set aside for the summary of older turns
+        :param min_turns: most recent turns always kept word for word, even when they go over the budget
+        :param chars_per_token: characters counted as one token
+        """
+        self.token_budget = token_budget
+        self.summary_token_budget = summary_token_budget
+        self.min_turns = min_turns
+        self.chars_per_token = chars_per_token
+
+        self.lock = threading.Lock()
+        # (user message, assistant message) of the turns kept word for word, oldest first
+        self.turns = []
+        self.summary = []
+
+        self.total_turns = 0
+        self.summarised_turns = 0
+        self.resets = 0
+        self.last_prompt_tokens = 0
+        self.max_prompt_tokens = 0
+
+    def estimate_tokens(self, text):
+        return math.ceil(len(text) / self.chars_per_token)
+
+    def turn_tokens(self, turn):
+        return sum(self.estimate_tokens(message["content"]) for message in turn)
+
+    def turns_tokens(self):
+        return sum(self.turn_tokens(turn) for turn in self.turns)
+
+    def summary_tokens(self):
+        return sum(self.estimate_tokens(line) for line in self.summary)
+
+    def history_tokens(self):
+        return self.turns_tokens() + self.summary_tokens()
+
+    @staticmethod
+    def summarise_turn(turn):
+        """
+        Boil a turn down to the first sentence each side said.
+        :param turn: (user message, assistant message)
+        :return:
+        """
+        user, reply = (split_sentences(message["content"], min_length=0)[:1] or [""] for message in turn)
+        return f'The visitor said "{user[0]}" and you said "{reply[0]}"'
+
+    def build_messages(self, role, user_input):
+        """
+        :param role: system prompt
+        :param user_input: message to send
+        :return: the chat messages to send, with the history
+        """
+        with self.lock:
+            system = role
+            if self.summary:
+                system = f"{role}\nEarlier in this conversation: {' '.join(self.summary)}"
+            messages = [{"role": "system", "content": system}]
+            for turn in self.turns:
+                messages.extend(turn)
+            messages.append({"role": "user", "content": user_input})
+
+            prompt_tokens = sum(self.estimate_tokens(message["content"]) for message in messages)
+            self.last_prompt_tokens = prompt_tokens
+            self.max_prompt_tokens = max(self.max_prompt_tokens, prompt_tokens)
+            logger.info(f"Prompt for turn {self.total_turns + 1}: {len(messages)} messages, about {prompt_tokens} "
+                        f"tokens, of which {self.history_tokens()} history ({len(self.turns)} turns, "
+                        f"{len(self.summary)} summarised)")
+
+        return messages
+
+    def add_turn(self, user_input, reply):
+        with self.lock:
+            self.turns.append(({"role": "user", "content": user_input}, {"role": "assistant", "content": reply}))
+            self.total_turns += 1
+
+            while (len(self.turns) > self.min_turns and
+                   self.turns_tokens() > self.token_budget - self.summary_token_budget):
+                self.summary.append(self.summarise_turn(self.turns.pop(0)))
+                self.summarised_turns += 1
+
+            # The summary grows with every turn moved into it, so it forgets its oldest lines to stay in what is left
+            summary_budget = min(self.summary_token_budget, self.token_budget - self.turns_tokens())
+            while self.summary and self.summary_tokens() > summary_budget:
+                self.summary.pop(0)
+
+    def reset(self):
+        with self.lock:
+            if not self.turns and not self.summary:
+                return
+            logger.info(f"Chat history of {len(self.turns) + len(self.summary)} turns forgotten")
+            self.turns = []
+            self.summary = []
+            self.resets += 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                "turns": self.total_turns,
+                "summarised_turns": self.summarised_turns,
+                "resets": self.resets,
+                "history_tokens": self.history_tokens(),
+                "last_prompt_tokens": self.last_prompt_tokens,
+                "max_prompt_tokens": self.max_prompt_tokens,
+            }
@@ -0,0 +1,108 @@
+from collections import defaultdict
+
+from utils.string_ops import clean_text
+
+
+def bigrams(text):
+    """
+    Character bigrams of the text, padded so the start and end of each word count.
+    :param text: cleaned text
+    :return: set of bigrams
+    """
+    padded = f" {text} "
+    return {padded[index:index + 2] for index in range(len(padded) - 1)}
+
+
+def dice(first, second):
+    if not first or not second:
+        return 0.0
+    return 2 * len(first & second) / (len(first) + len(second))
+
+
+class CommandMatch:
+    def __init__(self, command, phrase, confidence):
+        self.command = command
+        self.phrase = phrase
+        self.confidence = confidence
+
+    def __repr__(self):
+        return f"CommandMatch({self.command!r}, {self.phrase!r}, {self.confidence:.2f})"
+
+
+class CommandIndex:
+    """
+    Fuzzy lookup of command phrases in a transcript. Every phrase is cleaned and broken into character bigrams up
+    front, with an inverted index from each bigram to the phrases containing it, so a transcript is only compared with
+    the phrases it shares enough bigrams with. Each of those is compared with every run of transcript words of about the
+    phrase's length, scoring by the overlap of their bigrams (which shrugs off the dropped letters and plurals Whisper
+    gets wrong), scaled down by how much of the transcript is left over, other than filler words like "please".
+    """
+
+    def __init__(self, phrases, filler_words=(), threshold=0.8):
+        """
+        :param phrases: dict of phrase to the command it triggers
+        :param filler_words: words that do not count against a match when they are spoken around the phrase
+        :param threshold: lowest confidence, from 0 to 1, that counts as a match
+        """
+        self.threshold = threshold
+        self.filler_words = {clean_text(word) for word in filler_words}
+        self.exact = {}
+        self.phrases = []
+        self.phrase_bigrams = []
+        self.index = defaultdict(list)
+
+        for phrase, command in phrases.items():
+            cleaned = clean_text(phrase)
+            self.exact[cleaned] = command
+            phrase_id = len(self.phrases)
+            self.phrases.append((cleaned, len(cleaned.split()), command))
+            self.phrase_bigrams.append(bigrams(cleaned))
+            for bigram in self.phrase_bigrams[phrase_id]:
+                self.index[bigram].append(phrase_id)
+
+    def candidates(self, text):
+        """
+        :param text: cleaned transcript
+        :return: ids of the phrases sharing enough bigrams with the transcript to possibly match it
+        """
+        shared = defaultdict(int)
+        for bigram in bigrams(text):
+            for phrase_id in self.index.get(bigram, ()):
+                shared[phrase_id] += 1
+
+        # A window of the transcript shares no more bigrams with a phrase than the whole transcript does, so it can only
+        # reach the threshold if the transcript shares at least this many
+        return [phrase_id for phrase_id, count in shared.items()
+                if count >= self.threshold * len(self.phrase_bigrams[phrase_id]) / 2]
+
+    def search(self, text):
+        """
+        Find the command spoken in the transcript.
+        :param text: transcript
+        :return: CommandMatch of the best matching phrase, or None if no phrase matches with enough confidence
+        """
+        cleaned = clean_text(text)
+        if cleaned in self.exact:
+            return CommandMatch(self.exact[cleaned], cleaned, 1.0)
+
+        words = cleaned.split()
+        # Running count of the words that are not filler, to count those left over outside each window
+        spoken = [0]
+        for word in words:
+            spoken.append(spoken[-1] + (word not in self.filler_words))
+        best = None
+        for phrase_id in self.candidates(cleaned):
+            phrase, length, command = self.phrases[phrase_id]
+            for window in range(max(1, length - 1), min(len(words), length + 1) + 1):
+                for start in range(len(words) - window + 1):
+                    leftover = spoken[-1] - spoken[start + window] + spoken[start]
+                    coverage = window / (window + leftover)
+                    if coverage < self.threshold:
+                        # Too much else was said for this window to match, however close its words are
+                        continue
+                    confidence = coverage * dice(bigrams(" ".join(words[start:start + window])),
+                                                 self.phrase_bigrams[phrase_id])
+                    if confidence >= self.threshold and (best is None or confidence > best.confidence):
+                        best = CommandMatch(command, phrase, confidence)
+
+        return best
@@ -0,0 +1,170 @@
+import heapq
+import itertools
+import logging
+import threading
+from collections import defaultdict
+
+from EventHive.event_hive_runner import EventActor as HiveEventActor
+
+from config.custom_events import ConversationDoneEvent
+
+logger = logging.getLogger(__name__)
+
+
+class EventInbox:
+    """
+    Priority ordered inbox for a single actor; the actor thread blocks on the condition until an event arrives instead
+    of sleeping and polling the shared queue.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.condition = threading.Condition()
+        self.events = []
+        self.closed = False
+
+    def __len__(self):
+        return len(self.events)
+
+    def put(self, priority, sequence, event):
+        with self.condition:
+            heapq.heappush(self.events, (priority, sequence, event))
+            self.condition.notify()
+
+    def get(self, timeout=None):
+        """
+        Wait for the next event, returns None if the inbox was closed or the timeout passed.
+        :param timeout:
+        :return:
+        """
+        with self.condition:
+            while not self.events:
+                if self.closed:
+                    return None
+                if not self.condition.wait(timeout):
+                    return None
+
+            return heapq.heappop(self.events)[2]
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class BlockingEventQueue:
+    """
+    Drop in replacement for the EventHive EventQueue that routes each event straight to the inbox of the actor that
+    consumes its type (based on get_consumable_events), waking that actor immediately.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = defaultdict(list)
+        self.unrouted = defaultdict(list)
+        self.sequence = itertools.count()
+
+        logger.debug("Initialized")
+
+    def register(self, actor):
+        """
+        Create an inbox for the actor and route all of its consumable event types to it, any events produced for those
+        types before the actor was registered are handed over straight away.
+        :param actor:
+        :return:
+        """
+        inbox = EventInbox(actor.__class__.__name__)
+
+        with self.lock:
+            for event_class in actor.get_consumable_events():
+                self.routes[event_class].append(inbox)
+                for priority, sequence, event in self.unrouted.pop(event_class, []):
+                    inbox.put(priority, sequence, event)
+
+        logger.debug(f"Registered {inbox.name} for events: {actor.get_consumable_events()}")
+
+        return inbox
+
+    def queue_addition(self, event):
+        event_class = event.get_event_type()
+        sequence = next(self.sequence)
+
+        with self.lock:
+            inboxes = self.routes.get(event_class)
+            if not inboxes:
+                self.unrouted[event_class].append((event.priority, sequence, event))
+                logger.debug(f"No consumer registered yet for {event_class.__name__}, holding event")
+                return
+
+            # Each event is consumed once, as with the shared queue; spread across consumers of the same type
+            inbox = min(inboxes, key=len)
+
+        inbox.put(event.priority, sequence, event)
+
+
+class EventActor(HiveEventActor):
+    """
+    EventHive actor which waits on its own inbox when given a BlockingEventQueue, falling back to the EventHive polling
+    loop for any other queue.
+    """
+
+    def __init__(self, event_queue):
+        super().__init__(event_queue)
+        self.dispatch_stop = threading.Event()
+        self.ready = threading.Event()
+        self.inbox = event_queue.register(self) if isinstance(event_queue, BlockingEventQueue) else None
+
+    def produce_event(self, event):
+        if self.inbox is None:
+            return super().produce_event(event)
+
+        self.event_queue.queue_addition(event)
+
+    def finish_action(self, priority=1):
+        """
+        Tell the conversation engine this system has finished the conversation action it was asked to run, naming the
+        system so the engine knows which of the actions it is running has finished.
+        :param priority:
+        :return:
+        """
+        self.produce_event(ConversationDoneEvent(["CONVERSATION_ACTION_FINISHED", self.__class__.__name__], priority))
+
+    def dispatch_event(self, event):
+        event_type = event.content[0]
+        event_data = event.content[1] if len(event.content) > 1 else None
+
+        handler = self.get_event_handlers().get(event_type)
+        if handler is None:
+            logger.warning(f"{self.__class__.__name__} has no handler for event: {event_type}")
+            return
+
+        try:
+            handler(event_type=event_type, event_data=event_data)
+        except Exception as e:
+            logger.exception(f"{self.__class__.__name__} failed handling {event_type}: {e}")
+
+    def wait_until_ready(self, timeout=None):
+        """
+        Wait until the actor thread is running and consuming events, any model loading or hardware setup has already
+        happened in the constructor by this point.
+        :param timeout:
+        :return:
+        """
+        return self.ready.wait(timeout)
+
+    def run(self):
+        self.ready.set()
+
+        if self.inbox is None:
+            return super().run()
+
+        while not self.dispatch_stop.is_set():
+            event = self.inbox.get()
+            if event is not None:
+                self.dispatch_event(event)
+
+    def shutdown(self):
+        self.dispatch_stop.set()
+        if self.inbox is not None:
+            self.inbox.close()
+        super().shutdown()
@@ -0,0 +1,70 @@
+import builtins
+import importlib.util
+import logging
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ImportProfiler:
+    """
+    Times every module imported while it is running, by wrapping the import statement. Each module gets the time taken
+    to import it including the modules it imports in turn (cumulative), and without them (self), so a slow import can be
+    traced to the module at fault. Modules imported with importlib rather than an import statement are counted in the
+    module importing them.
+    """
+
+    def __init__(self):
+        # Module name to (cumulative seconds, self seconds), in the order they finished importing
+        self.times = {}
+        self.original_import = None
+        self.start_time = None
+        # Time spent in nested imports, for each import in progress on the thread
+        self.local = threading.local()
+
+    def start(self):
+        self.original_import = builtins.__import__
+        builtins.__import__ = self.timed_import
+        self.start_time = time.perf_counter()
+        return self
+
+    def stop(self):
+        if self.original_import is not None:
+            builtins.__import__ = self.original_import
+            self.original_import = None
+
+    def timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        module_name = name
+        if level:
+            try:
+                module_name = importlib.util.resolve_name("." * level + name, (globals or {}).get("__package__"))
+            except (ImportError, ValueError):
+                pass
+        if module_name in sys.modules:
+            return self.original_import(name, globals, locals, fromlist, level)
+
+        stack = self.local.__dict__.setdefault("stack", [])
+        stack.append(0.0)
+        start_time = time.perf_counter()
+        try:
+            return self.original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start_time
+            nested = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            self.times.setdefault(module_name, (elapsed, elapsed - nested))
+
+    def report(self, count=25):
+        """
+        Log the slowest imports.
+        :param count: number of modules to list
+        :return:
+        """
+        logger.info(f"Imported {len(self.times)} modules in the {time.perf_counter() - self.start_time:.2f} seconds "
+                    f"since profiling started, slowest imports:")
+        slowest = sorted(self.times.items(), key=lambda item: item[1][1], reverse=True)[:count]
+        for name, (cumulative, own) in slowest:
+            logger.info(f"  {name}: {own * 1000:.1f} ms self, {cumulative * 1000:.1f} ms cumulative")
@@ -0,0 +1,47 @@
+import logging
+from pathlib import Path
+
+import numpy as np
+
+from utils.audio_features import EnvelopeFeatures
+
+logger = logging.getLogger(__name__)
+
+
+def jaw_track_path(audio_file):
+    """
+    The jaw track of an audio file is kept next to it, e.g. tts_output.wav has tts_output.jaw.npz.
+    :param audio_file:
+    :return:
+    """
+    return Path(audio_file).with_suffix(".jaw.npz")
+
+
+def save_jaw_track(track_path, envelope, frame_ms):
+    np.savez(track_path, envelope=envelope, frame_ms=frame_ms)
+
+
+def read_jaw_track(track_path):
+    """
+    Read a saved jaw track.
+    :param track_path:
+    :return: the envelope and the frame length in milliseconds it was computed with
+    """
+    with np.load(track_path) as track:
+        return track["envelope"], int(track["frame_ms"])
+
+
+def buffer_jaw_track(audio, frame_ms):
+    """
+    The RMS envelope of the audio, one value per frame of playback, kept in the audio metadata once computed.
+    :param audio: AudioBuffer
+    :param frame_ms: length of each frame in milliseconds
+    :return: the envelope
+    """
+    if audio.metadata.get("jaw_frame_ms") != frame_ms:
+        frame_length = max(1, int(audio.rate * frame_ms / 1000))
+        audio.metadata["jaw_envelope"] = EnvelopeFeatures(frame_length).frame_rms(audio.mono())
+        audio.metadata["jaw_frame_ms"] = frame_ms
+        logger.debug(f"Computed jaw track of {len(audio.metadata['jaw_envelope'])} frames")
+
+    return audio.metadata["jaw_envelope"]
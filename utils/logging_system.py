@@ -1,6 +1,11 @@
+import atexit
 import logging
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
 
-from config.logging_config import log_level, log_format
+from config.logging_config import log_level, log_format, log_queue, log_rate_limits
 
 
 class LockedLogger(logging.Logger):
@@ -33,6 +38,61 @@ class LockedStreamHandler(logging.StreamHandler):
         self._formatter_locked = True
 
 
+class DeferredQueueHandler(QueueHandler):
+    """
+    Puts log records on a queue as they are, so the message is formatted by the listener thread writing it rather than
+    by the thread logging it. Arguments logged are formatted when the record is written, so pass copies of anything that
+    may change in the meantime.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets through at most a set number of debug and info records a second for each message of the rate limited loggers.
+    Messages are told apart by their unformatted text, so messages logged with %-style arguments count as one however
+    their arguments change, while f-string messages only count as one when they come out the same.
+    """
+
+    def __init__(self, limits, clock=time.monotonic):
+        """
+        :param limits: dict of logger name to the records a second let through for each of its messages
+        :param clock: returns the time in seconds
+        """
+        super().__init__()
+        self.limits = limits
+        self.clock = clock
+        # (logger name, message) to [start of the current second, records let through, records dropped]
+        self.windows = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        limit = self.limits.get(record.name)
+        if limit is None or record.levelno > logging.INFO:
+            return True
+
+        now = self.clock()
+        key = (record.name, record.msg)
+        dropped = 0
+        with self.lock:
+            window = self.windows.get(key)
+            if window is None or now - window[0] >= 1.0:
+                if window is not None:
+                    dropped = window[2]
+                window = self.windows[key] = [now, 0, 0]
+            if window[1] >= limit:
+                window[2] += 1
+                return False
+            window[1] += 1
+
+        if dropped:
+            record.msg = f"{record.getMessage()} ({dropped} similar messages dropped)"
+            record.args = ()
+        return True
+
+
 def get_locked_root_logger():
     if not isinstance(logging.root, LockedLogger):
         logging.root = LockedLogger(name="root", level=logging.WARNING)
@@ -56,6 +116,20 @@ def activate_logging_system():
     console_handler.setLevel(numeric_level)
     formatter = logging.Formatter(log_format)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+
+    if log_queue:
+        # The console handler is run by the listener thread, the loggers only put records on the queue
+        handler = DeferredQueueHandler(queue.SimpleQueue())
+        handler.setLevel(numeric_level)
+        listener = QueueListener(handler.queue, console_handler, respect_handler_level=True)
+        listener.start()
+        # Stopping the listener writes out the records still on the queue
+        atexit.register(listener.stop)
+    else:
+        handler = console_handler
+
+    # Filtered before the queue, so dropped records cost no more than the check
+    handler.addFilter(RateLimitFilter(log_rate_limits))
+    logger.addHandler(handler)
 
     logger = logging.getLogger(__name__)
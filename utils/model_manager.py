@@ -0,0 +1,233 @@
+import gc
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+import psutil
+
+from config.model_config import model_policies, model_warm_up, model_min_available_mb
+
+logger = logging.getLogger(__name__)
+
+model_policy_names = ("resident", "preload", "lazy")
+
+
+class ManagedModel:
+    def __init__(self, name, loader, warm_up, policy):
+        self.name = name
+        self.loader = loader
+        self.warm_up = warm_up
+        self.policy = policy
+        self.model = None
+        self.users = 0
+        self.last_used = 0.0
+        self.loads = 0
+        self.unloads = 0
+        self.load_duration = None
+        self.warm_up_duration = None
+        self.unload_duration = None
+        # Growth of the process RSS while the model loaded, an estimate as other systems may allocate at the same time
+        self.estimated_bytes = None
+        # Held while the model loads, so it is loaded once however many systems ask for it at the same time
+        self.load_lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self.model is not None
+
+
+class ModelManager:
+    """
+    Loads models when they are needed rather than when their system is built, warms them up with one inference so the
+    first real request is not slow, and unloads the least recently used ones when memory runs low, per the policies in
+    model_config.py. The manager lock is not held while a model loads, so models already loaded can be used meanwhile;
+    the memory each model takes is estimated from the growth of the process RSS while it loaded, which also counts
+    anything else allocated at the same time (e.g. systems still booting).
+    """
+
+    def __init__(self, policies=None, warm_up=model_warm_up, min_available_mb=model_min_available_mb):
+        self.policies = model_policies if policies is None else policies
+        self.warm_up = warm_up
+        self.min_available_bytes = min_available_mb * 1024 * 1024
+        self.models = {}
+        self.lock = threading.RLock()
+        self.process = psutil.Process()
+
+        logger.debug("Initialized")
+
+    def register(self, name, loader, warm_up=None):
+        """
+        Register a model, models with a boot policy are loaded straight away. Registering a name again has no effect.
+        :param name: name the model is used by and configured under in model_policies
+        :param loader: callable that loads the model and returns it
+        :param warm_up: callable run with the loaded model to warm it up
+        :return:
+        """
+        policy = self.policies.get(name, "lazy")
+        if policy not in model_policy_names:
+            raise ValueError(f'Invalid policy for model {name}: {policy}')
+
+        with self.lock:
+            if name in self.models:
+                # Another instance of the same system registered it already, so they share the one model
+                logger.debug(f"Model {name} already registered")
+                return
+            self.models[name] = ManagedModel(name, loader, warm_up, policy)
+
+        if policy != "lazy":
+            self.load(name)
+
+    def available_memory(self):
+        return psutil.virtual_memory().available
+
+    def resident_memory(self):
+        return self.process.memory_info().rss
+
+    def load(self, name):
+        """
+        Load and warm up a model if it is not already loaded, unloading others first if memory is low.
+        :param name:
+        :return: the model
+        """
+        with self.lock:
+            managed = self.models[name]
+
+        with managed.load_lock:
+            with self.lock:
+                if managed.loaded:
+                    return managed.model
+                self.relieve_memory_pressure()
+
+            rss = self.resident_memory()
+            start_time = time.perf_counter()
+            model = managed.loader()
+            load_duration = time.perf_counter() - start_time
+
+            warm_up_duration = None
+            if self.warm_up and managed.warm_up is not None:
+                start_time = time.perf_counter()
+                managed.warm_up(model)
+                warm_up_duration = time.perf_counter() - start_time
+            estimated_bytes = max(0, self.resident_memory() - rss)
+
+            with self.lock:
+                managed.model = model
+                managed.load_duration = load_duration
+                managed.warm_up_duration = warm_up_duration
+                managed.estimated_bytes = estimated_bytes
+                managed.loads += 1
+                managed.last_used = time.monotonic()
+
+            warm_up = ""
+            if warm_up_duration is not None:
+                warm_up = f", warmed up in {warm_up_duration:.2f} seconds"
+            logger.info(f"Loaded model {name} in {load_duration:.2f} seconds{warm_up}, about "
+                        f"{estimated_bytes / 1024 / 1024:.1f} MB (estimated from the process RSS)")
+
+            return model
+
+    def unload(self, name):
+        with self.lock:
+            managed = self.models[name]
+            if not managed.loaded:
+                return
+            if managed.users:
+                raise RuntimeError(f'Model {name} is in use')
+
+            start_time = time.perf_counter()
+            managed.model = None
+            gc.collect()
+            managed.unload_duration = time.perf_counter() - start_time
+            managed.unloads += 1
+            logger.info(f"Unloaded model {name} in {managed.unload_duration:.2f} seconds")
+
+    def relieve_memory_pressure(self):
+        """
+        Unload models that are not in use, least recently used first, until enough memory is available.
+        :return: names of the models unloaded
+        """
+        unloaded = []
+        with self.lock:
+            candidates = sorted((managed for managed in self.models.values()
+                                 if managed.loaded and not managed.users and managed.policy != "resident"),
+                                key=lambda managed: managed.last_used)
+            for managed in candidates:
+                available = self.available_memory()
+                if available >= self.min_available_bytes:
+                    break
+                logger.warning(f"{available / 1024 / 1024:.0f} MB of memory available, unloading model {managed.name}")
+                self.unload(managed.name)
+                unloaded.append(managed.name)
+
+        return unloaded
+
+    def acquire(self, name):
+        """
+        Get a model, loading it if needed, it is not unloaded until it is released.
+        :param name:
+        :return: the model
+        """
+        while True:
+            self.load(name)
+            with self.lock:
+                managed = self.models[name]
+                # Unless another system's load unloaded it in the meantime to free memory
+                if managed.loaded:
+                    managed.users += 1
+                    managed.last_used = time.monotonic()
+                    return managed.model
+
+    def release(self, name):
+        with self.lock:
+            managed = self.models[name]
+            managed.users -= 1
+            managed.last_used = time.monotonic()
+
+    @contextmanager
+    def use(self, name):
+        model = self.acquire(name)
+        try:
+            yield model
+        finally:
+            self.release(name)
+
+    def stats(self):
+        """
+        :return: dict of the load/unload timings and estimated memory of each model
+        """
+        with self.lock:
+            return {name: {
+                "policy": managed.policy,
+                "loaded": managed.loaded,
+                "loads": managed.loads,
+                "unloads": managed.unloads,
+                "load_duration": managed.load_duration,
+                "warm_up_duration": managed.warm_up_duration,
+                "unload_duration": managed.unload_duration,
+                "estimated_bytes": managed.estimated_bytes,
+            } for name, managed in self.models.items()}
+
+    def report(self):
+        if self.models:
+            logger.info("Models:")
+        for name, stats in self.stats().items():
+            if stats["loads"] == 0:
+                logger.info(f"  {name} ({stats['policy']}): not loaded")
+                continue
+            logger.info(f"  {name} ({stats['policy']}): {'loaded' if stats['loaded'] else 'unloaded'}, "
+                        f"loaded {stats['loads']} times, last in {stats['load_duration']:.2f}s, about "
+                        f"{stats['estimated_bytes'] / 1024 / 1024:.1f} MB (estimated), unloaded {stats['unloads']} "
+                        f"times")
+
+
+model_manager_lock = threading.Lock()
+shared_model_manager = None
+
+
+def model_manager_access():
+    global shared_model_manager
+    with model_manager_lock:
+        if shared_model_manager is None:
+            shared_model_manager = ModelManager()
+        return shared_model_manager
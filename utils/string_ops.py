@@ -1,3 +1,4 @@
+import re
 import string
 
 
@@ -14,3 +15,51 @@ def clean_text(text):
     # Remove extra spaces and replace internal multiple spaces with single space
     normalized = ' '.join(no_punctuation.split())
     return normalized
+
+
+def split_sentences(text, min_length=20):
+    """
+    Split text into sentences/clauses for streaming TTS, short fragments are merged into the following one so each
+    chunk is long enough to sound natural
+    :param text:
+    :param min_length: minimum number of characters in a chunk, other than the last
+    :return:
+    """
+    fragments = [fragment.strip() for fragment in re.split(r'(?<=[.!?;:])\s+', text.strip()) if fragment.strip()]
+
+    chunks = []
+    pending = ""
+    for fragment in fragments:
+        pending = f"{pending} {fragment}" if pending else fragment
+        if len(pending) >= min_length:
+            chunks.append(pending)
+            pending = ""
+
+    if pending:
+        chunks.append(pending)
+
+    return chunks
+
+
+def assemble_phrases(tokens, min_length=20):
+    """
+    Join streamed tokens into speakable phrases, yielding each phrase as soon as a sentence/clause boundary has been
+    streamed, rather than waiting for the whole text
+    :param tokens: iterable of text tokens
+    :param min_length: minimum number of characters in a phrase, other than the last
+    :return:
+    """
+    pending = ""
+    for token in tokens:
+        pending += token
+
+        # Only split on punctuation followed by whitespace, so numbers like 3.5 are not split part way through
+        boundaries = [match.start() + 1 for match in re.finditer(r'[.!?;:](?=\s)', pending)
+                      if len(pending[:match.start() + 1].strip()) >= min_length]
+        if boundaries:
+            phrase = pending[:boundaries[-1]].strip()
+            pending = pending[boundaries[-1]:]
+            yield phrase
+
+    if pending.strip():
+        yield pending.strip()
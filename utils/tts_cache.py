@@ -0,0 +1,115 @@
+import hashlib
+import logging
+import os
+from pathlib import Path
+
+from utils.audio_buffer import AudioBuffer
+from utils.jaw_track import jaw_track_path, save_jaw_track, read_jaw_track
+
+logger = logging.getLogger(__name__)
+
+
+class TTSCache:
+    """
+    Content addressed on-disk cache of generated TTS audio, keyed by (engine, voice, text).
+    Pinned entries (the static phrases from the config) are never evicted, other entries are evicted least recently used
+    first once the dynamic part of the cache goes over its size limit.
+    The jaw track of an entry, if one was computed, is cached next to its audio. Pinned entries are kept in memory once
+    loaded, as they are spoken over and over.
+    """
+
+    def __init__(self, cache_dir, engine, voice, max_bytes):
+        self.engine = engine
+        self.voice = voice
+        self.max_bytes = max_bytes
+
+        self.pinned_dir = Path(cache_dir) / "pinned"
+        self.dynamic_dir = Path(cache_dir) / "dynamic"
+        self.pinned_dir.mkdir(parents=True, exist_ok=True)
+        self.dynamic_dir.mkdir(parents=True, exist_ok=True)
+
+        self.pinned_audio = {}
+
+        self.hits = 0
+        self.misses = 0
+
+        logger.debug(f"Initialized for engine: {engine}, voice: {voice}, at: {cache_dir}")
+
+    def key(self, text):
+        return hashlib.sha256(f"{self.engine}\0{self.voice}\0{text}".encode("utf-8")).hexdigest()
+
+    def lookup(self, text):
+        """
+        Return the path of the cached audio for the text, or None if it has not been generated before.
+        :param text:
+        :return:
+        """
+        file_name = f"{self.key(text)}.wav"
+
+        pinned_path = self.pinned_dir / file_name
+        if pinned_path.exists():
+            return pinned_path
+
+        dynamic_path = self.dynamic_dir / file_name
+        if dynamic_path.exists():
+            # Access time is not reliable on noatime mounts, so bump the modified time to track recent use
+            os.utime(dynamic_path)
+            return dynamic_path
+
+        return None
+
+    def load(self, text):
+        """
+        Load the cached audio for the text, with its jaw track if one was cached.
+        :param text:
+        :return: AudioBuffer, or None on a cache miss
+        """
+        audio = self.pinned_audio.get(text)
+        if audio is None:
+            cached_path = self.lookup(text)
+            if cached_path is None:
+                self.misses += 1
+                return None
+
+            audio = AudioBuffer.from_file(cached_path, text=text)
+            if jaw_track_path(cached_path).exists():
+                envelope, frame_ms = read_jaw_track(jaw_track_path(cached_path))
+                audio.metadata.update(jaw_envelope=envelope, jaw_frame_ms=frame_ms)
+            if cached_path.parent == self.pinned_dir:
+                self.pinned_audio[text] = audio
+
+        self.hits += 1
+        logger.debug(f"Cache hit for: '{text}' ({self.hits} hits, {self.misses} misses)")
+
+        return audio
+
+    def store(self, text, audio, pinned=False):
+        """
+        Add generated audio to the cache, with its jaw track if one has been computed.
+        :param text:
+        :param audio: AudioBuffer
+        :param pinned: pinned entries are never evicted
+        :return:
+        """
+        cache_path = (self.pinned_dir if pinned else self.dynamic_dir) / f"{self.key(text)}.wav"
+        audio.to_file(cache_path)
+        if "jaw_envelope" in audio.metadata:
+            save_jaw_track(jaw_track_path(cache_path), audio.metadata["jaw_envelope"], audio.metadata["jaw_frame_ms"])
+        logger.debug(f"Cached {'pinned' if pinned else 'dynamic'} audio for: '{text}'")
+
+        if pinned:
+            self.pinned_audio[text] = audio
+        else:
+            self.evict()
+
+    def evict(self):
+        entries = [(entry.stat().st_mtime, entry.stat().st_size, entry) for entry in self.dynamic_dir.glob("*.wav")]
+        total_bytes = sum(size for _, size, _ in entries)
+
+        for _, size, entry in sorted(entries, key=lambda item: item[0]):
+            if total_bytes <= self.max_bytes:
+                break
+            entry.unlink()
+            jaw_track_path(entry).unlink(missing_ok=True)
+            total_bytes -= size
+            logger.debug(f"Evicted {entry.name} from the TTS cache")
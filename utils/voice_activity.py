@@ -0,0 +1,103 @@
+import logging
+from collections import deque
+
+import numpy as np
+
+from utils.audio_features import EnvelopeFeatures
+
+logger = logging.getLogger(__name__)
+
+
+class VoiceActivityDetector:
+    """
+    Detects sustained speech in a stream of int16 audio chunks.
+    Each chunk is split into frames and every frame is classed as speech-like from its energy relative to a running
+    noise floor, its zero crossing rate and its spectral flatness; speech is only detected once enough of the frames
+    in a sliding window are speech-like, so short broadband noises (door slams, servo clicks) are ignored.
+    """
+
+    def __init__(self, rate, frame_ms=20, window_ms=500, speech_ratio=0.6, energy_ratio=3.0, min_peak=100,
+                 noise_floor_alpha=0.05, zcr_range=(0.01, 0.35), max_spectral_flatness=0.5):
+        self.frame_length = max(1, int(rate * frame_ms / 1000))
+        self.window = deque(maxlen=max(1, int(window_ms / frame_ms)))
+        self.speech_ratio = speech_ratio
+        self.energy_ratio = energy_ratio
+        self.min_peak = min_peak
+        self.noise_floor_alpha = noise_floor_alpha
+        self.zcr_range = zcr_range
+        self.max_spectral_flatness = max_spectral_flatness
+
+        self.noise_floor = None
+        self.pending = np.zeros(0, dtype=np.int16)
+        self.spectrum_window = np.hanning(self.frame_length).astype(np.float32)
+        self.envelope_features = EnvelopeFeatures(self.frame_length, batch_frames=8)
+
+        logger.debug(f"Initialized with frame length: {self.frame_length}, window: {self.window.maxlen} frames")
+
+    def reset(self):
+        """
+        Clear the sliding window and any partial frame, the noise floor is kept as the surroundings have not changed.
+        :return:
+        """
+        self.window.clear()
+        self.pending = np.zeros(0, dtype=np.int16)
+
+    def frame_features(self, samples):
+        """
+        Calculate the energy, zero crossing rate, spectral flatness and peak of each frame.
+        :param samples: int16 samples, a whole number of frames long
+        :return:
+        """
+        samples = self.envelope_features.load_frames(samples)
+        energy = self.envelope_features.rms_of_frames(samples)
+
+        zcr = np.mean(np.signbit(samples[:, 1:]) != np.signbit(samples[:, :-1]), axis=1)
+
+        power = np.abs(np.fft.rfft(samples * self.spectrum_window, axis=1)) ** 2 + 1e-10
+        flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+
+        peak = np.max(np.abs(samples), axis=1)
+
+        return energy, zcr, flatness, peak
+
+    def update_noise_floor(self, energy):
+        for frame_energy in energy:
+            if frame_energy < self.noise_floor:
+                # Fall straight to quieter surroundings, but only rise slowly
+                self.noise_floor = frame_energy
+            else:
+                self.noise_floor += (frame_energy - self.noise_floor) * self.noise_floor_alpha
+
+        # Digital silence would otherwise make any sound at all look like speech
+        self.noise_floor = max(self.noise_floor, 1.0)
+
+    def process(self, audio_chunk):
+        """
+        Add a chunk of audio, returns True once sustained speech has been detected.
+        :param audio_chunk: int16 numpy array
+        :return:
+        """
+        samples = np.concatenate((self.pending, audio_chunk))
+        frame_count = len(samples) // self.frame_length
+        self.pending = samples[frame_count * self.frame_length:]
+        if frame_count == 0:
+            return False
+
+        energy, zcr, flatness, peak = self.frame_features(samples[:frame_count * self.frame_length])
+
+        if self.noise_floor is None:
+            self.noise_floor = max(float(np.min(energy)), 1.0)
+
+        speech = ((energy > self.noise_floor * self.energy_ratio) & (peak > self.min_peak) &
+                  (zcr >= self.zcr_range[0]) & (zcr <= self.zcr_range[1]) & (flatness < self.max_spectral_flatness))
+
+        self.update_noise_floor(energy[~speech])
+        self.window.extend(speech.tolist())
+
+        if len(self.window) == self.window.maxlen and sum(self.window) >= self.speech_ratio * self.window.maxlen:
+            logger.debug(f"Speech detected, noise floor: {self.noise_floor:.1f}, energy: {np.mean(energy):.1f}, "
+                         f"zero crossing rate: {np.mean(zcr):.3f}, spectral flatness: {np.mean(flatness):.3f}")
+            self.reset()
+            return True
+
+        return False